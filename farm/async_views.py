@@ -0,0 +1,121 @@
+"""
+Versiones asíncronas de los endpoints de estadísticas, para servir con ASGI.
+
+Hacen las mismas consultas que las vistas DRF (farm.stats_queries), pero
+cada parte independiente se ejecuta en su propio hilo con
+``asyncio.gather``: la latencia pasa a ser la de la consulta más lenta y no
+la suma de todas. Comparten con las vistas síncronas la autenticación JWT,
+la caché de respuestas y los ETag.
+"""
+import asyncio
+from contextlib import nullcontext
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+
+from statsprime import instrumentation
+from users.authentication import CachedJWTAuthentication
+
+from . import conditional, stats_cache, stats_queries
+
+_authenticator = CachedJWTAuthentication()
+
+
+def _json(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(JSONRenderer().render(data), content_type="application/json", status=status_code)
+
+
+def _authenticate(request):
+    """(usuario, None) o (None, respuesta 401), como IsAuthenticated en DRF."""
+    try:
+        result = _authenticator.authenticate(request)
+        if result is None:
+            raise exceptions.NotAuthenticated()
+    except exceptions.APIException as exc:
+        data = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+        response = _json(data, status.HTTP_401_UNAUTHORIZED)
+        response["WWW-Authenticate"] = _authenticator.authenticate_header(request)
+        return None, response
+    return result[0], None
+
+
+def _isolated(part, stats):
+    """Ejecuta una parte en un hilo del pool, con su propia conexión."""
+    def run():
+        close_old_connections()
+        try:
+            with instrumentation.track(stats) if stats else nullcontext():
+                return part()
+        finally:
+            close_old_connections()
+    return run
+
+
+async def gather(parts):
+    """Ejecuta las partes de ``stats_queries`` a la vez y devuelve sus resultados."""
+    if not getattr(settings, "FARM_ASYNC_STATS_CONCURRENT", True):
+        return await sync_to_async(stats_queries.run)(parts)
+
+    stats = instrumentation.current_stats()
+    results = await asyncio.gather(*(
+        sync_to_async(_isolated(part, stats), thread_sensitive=False)()
+        for part in parts.values()
+    ))
+    return dict(zip(parts, results))
+
+
+async def _payload(stats, pairs, kwargs, query_params):
+    if not getattr(settings, "FARM_STATS_CACHE_ENABLED", True):
+        return stats.payload(await gather(stats.parts()))
+
+    key = await sync_to_async(stats_cache.cache_key)(stats.view_name, pairs, kwargs, query_params)
+    data = await sync_to_async(stats_cache.lookup)(stats.view_name, key)
+    if data is None:
+        data = stats.payload(await gather(stats.parts()))
+        await sync_to_async(stats_cache.store)(key, data)
+    return data
+
+
+def stats_view(stats_class):
+    """Vista asíncrona (solo GET) para una clase de farm.stats_queries."""
+    scopes = (stats_class.scope,)
+
+    async def view(request, **kwargs):
+        if request.method != "GET":
+            response = _json({"detail": f'Method "{request.method}" not allowed.'}, status.HTTP_405_METHOD_NOT_ALLOWED)
+            response["Allow"] = "GET"
+            return response
+
+        user, error = await sync_to_async(_authenticate)(request)
+        if error is not None:
+            return error
+
+        query_params = request.GET
+        pairs = stats_cache.scope_pairs(scopes, user.pk, query_params, kwargs)
+        # Mismo ETag que la vista DRF con renderer JSON
+        etag = await sync_to_async(conditional.compute_etag)(
+            f"{stats_class.view_name}.get", pairs, kwargs, query_params, "json"
+        )
+        if conditional.etag_matches(request, etag):
+            return conditional.add_etag_headers(HttpResponse(status=status.HTTP_304_NOT_MODIFIED), etag, scopes)
+
+        stats = stats_class(user, query_params, kwargs)
+        if stats.error:
+            return _json({"error": stats.error}, status.HTTP_400_BAD_REQUEST)
+
+        data = await _payload(stats, pairs, kwargs, query_params)
+        return conditional.add_etag_headers(_json(data), etag, scopes)
+
+    view.__name__ = f"{stats_class.view_name}Async"
+    return view
+
+
+user_stats = stats_view(stats_queries.UserStats)
+drop_rate_stats = stats_view(stats_queries.DropRateStats)
+farm_stats = stats_view(stats_queries.FarmStats)
+user_stats_series = stats_view(stats_queries.UserSeries)
+farm_stats_series = stats_view(stats_queries.FarmSeries)
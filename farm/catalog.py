@@ -0,0 +1,84 @@
+"""
+Snapshot del catálogo (fuentes + recompensas) por juego.
+
+Cada fuente se serializa una vez con FarmSourceSerializer y se guarda ya
+renderizada como JSON. El snapshot se asocia al token de versión del
+catálogo de su juego (farm.versions): mientras no cambie ninguna fuente o
+recompensa del juego, el endpoint responde sin tocar la base de datos, y el
+filtro ``source_type`` se aplica en memoria. Cada proceso guarda como mucho
+``FARM_CATALOG_MAX_GAMES`` snapshots y descarta el menos usado.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from rest_framework.renderers import JSONRenderer
+
+from . import versions
+from .models import FarmSource
+from .serializers import FarmSourceSerializer
+
+_snapshots = OrderedDict()
+_lock = threading.Lock()
+
+
+class CatalogSnapshot:
+    def __init__(self, token, sources):
+        self.token = token
+        # [(id, source_type, bytes JSON)] en el orden de la base de datos
+        self.sources = sources
+        self._by_id = {source_id: body for source_id, _, body in sources}
+
+    def render(self, source_type=None):
+        """Lista JSON de las fuentes que cumplen el filtro ``source_type``."""
+        bodies = [
+            body for _, kind, body in self.sources
+            if not source_type or matches_source_type(kind, source_type)
+        ]
+        return b"[" + b",".join(bodies) + b"]"
+
+    def get(self, source_id):
+        return self._by_id.get(source_id)
+
+
+def matches_source_type(source_type, requested):
+    """Mismo criterio que FarmSourceViewSet.get_queryset para ?source_type=."""
+    normalized = requested.strip().upper().replace(" ", "_")
+    if normalized.startswith("DOMINIO"):
+        return source_type.upper().startswith("DOMINIO")
+    if normalized in ["JEFE", "JEFE_SEMANAL", "JEFE-SEMANAL"]:
+        return source_type.upper() == normalized
+    return False
+
+
+def get_snapshot(game_id):
+    """Snapshot vigente del juego; se reconstruye si cambió el catálogo."""
+    game_id = int(game_id)
+    # El token se lee antes que los datos: si el catálogo cambia durante la
+    # construcción, el snapshot queda con el token viejo y se rehace después.
+    token = versions.get_versions([("catalog", game_id)])[0]
+
+    with _lock:
+        snapshot = _snapshots.get(game_id)
+        if snapshot is not None and snapshot.token == token:
+            _snapshots.move_to_end(game_id)
+            return snapshot
+
+    renderer = JSONRenderer()
+    sources = [
+        (source.id, source.source_type, renderer.render(FarmSourceSerializer(source).data))
+        for source in FarmSource.objects.filter(game_id=game_id).prefetch_related("rewards")
+    ]
+    snapshot = CatalogSnapshot(token, sources)
+    with _lock:
+        _snapshots[game_id] = snapshot
+        _snapshots.move_to_end(game_id)
+        while len(_snapshots) > getattr(settings, "FARM_CATALOG_MAX_GAMES", 64):
+            _snapshots.popitem(last=False)
+    return snapshot
+
+
+def clear():
+    with _lock:
+        _snapshots.clear()
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from . import versions
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Las versiones de farm.versions, las respuestas cacheadas, los ETag y los
+    contadores de stats_cache_report viven en la caché: con varios procesos
+    tiene que ser compartida (Redis, base de datos...). Se comprueba con
+    ``manage.py check --deploy`` (start.sh).
+    """
+    if settings.DEBUG or versions.shared_cache():
+        return []
+    return [
+        Error(
+            f"La caché por defecto ({settings.CACHES['default']['BACKEND']}) es local a cada proceso.",
+            hint=(
+                "Define REDIS_URL o un CACHE_BACKEND compartido (p. ej. "
+                "django.core.cache.backends.db.DatabaseCache): sin ella, cada worker "
+                "tiene sus propias versiones y sirve datos o 304 obsoletos."
+            ),
+            id="farm.E001",
+        )
+    ]
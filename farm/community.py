@@ -0,0 +1,161 @@
+"""
+Agregados de toda la comunidad, mantenidos en la ruta de escritura.
+
+- CommunitySourceStats: por fuente, cuántos eventos se han registrado,
+  cuántos traen algún drop y cuántos algún legendario (la tasa de
+  referencia para la suerte relativa de farm.leaderboards).
+- CommunityDropStats: por recompensa, eventos en los que cayó, drops y
+  sumas de cantidades y de cuadrados. Con la fila de su fuente dan la tasa
+  de drop global y la media/desviación de la cantidad sin recorrer eventos
+  (DropRateStatsView con ``scope=global``).
+
+Se actualizan con ``record_events`` desde farm.ingest (también al borrar en
+cascada los eventos de un usuario o una fuente, farm.signals) y se
+reconstruyen con ``manage.py rebuild_leaderboards``.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from . import rollups
+from .models import CommunityDropStats, CommunitySourceStats, FarmDrop, FarmEvent, FarmReward
+
+LEGENDARY = "LEGENDARIO"
+
+
+def legendary_rewards(entries):
+    """Ids de las recompensas legendarias entre los drops de ``entries`` (una consulta)."""
+    reward_ids = {drop.reward_id for _, drops in entries for drop in drops}
+    if not reward_ids:
+        return set()
+    return set(
+        FarmReward.objects.filter(id__in=reward_ids, rarity=LEGENDARY).values_list("id", flat=True)
+    )
+
+
+def record_events(entries, legendary, sign=1):
+    """
+    Suma (``sign=1``) o resta (``sign=-1``, al borrar o modificar eventos) los
+    pares (evento, drops) de ``entries``. ``legendary`` son los ids de
+    ``legendary_rewards``. Se llama dentro de la transacción de la escritura.
+    """
+    counts = defaultdict(lambda: [0, 0, 0])
+    rewards = defaultdict(lambda: [0, 0, 0, 0])
+    for event, drops in entries:
+        totals = counts[(event.game_id, event.source_id)]
+        totals[0] += 1
+        totals[1] += bool(drops)
+        totals[2] += any(drop.reward_id in legendary for drop in drops)
+        for drop in drops:
+            totals = rewards[(drop.reward_id, event.game_id, event.source_id)]
+            totals[1] += 1
+            totals[2] += drop.quantity
+            totals[3] += drop.quantity * drop.quantity
+        for reward_id in {drop.reward_id for drop in drops}:
+            rewards[(reward_id, event.game_id, event.source_id)][0] += 1
+
+    fields = ("events_with_item", "drop_count", "total_quantity", "sum_squares")
+    if sign < 0:
+        # Las filas ya existen: solo restar (pocas claves, un evento editado o borrado)
+        for (game_id, source_id), (events, drop_events, legendary_events) in sorted(counts.items()):
+            CommunitySourceStats.objects.filter(source_id=source_id).update(
+                event_count=F("event_count") - events,
+                drop_events=F("drop_events") - drop_events,
+                legendary_events=F("legendary_events") - legendary_events,
+            )
+        for (reward_id, game_id, source_id), values in sorted(rewards.items()):
+            CommunityDropStats.objects.filter(reward_id=reward_id).update(
+                **{field: F(field) - value for field, value in zip(fields, values)}
+            )
+        return
+
+    # Una sentencia por tabla, en orden fijo de claves
+    rollups.bulk_upsert(
+        CommunitySourceStats,
+        ("source_id",),
+        [
+            {"source_id": source_id, "game_id": game_id, "event_count": events,
+             "drop_events": drop_events, "legendary_events": legendary_events}
+            for (game_id, source_id), (events, drop_events, legendary_events) in sorted(
+                counts.items(), key=lambda item: item[0][1]
+            )
+        ],
+        {"event_count": "add", "drop_events": "add", "legendary_events": "add"},
+    )
+    rollups.bulk_upsert(
+        CommunityDropStats,
+        ("reward_id",),
+        [
+            dict(zip(fields, values), reward_id=reward_id, game_id=game_id, source_id=source_id)
+            for (reward_id, game_id, source_id), values in sorted(rewards.items())
+        ],
+        dict.fromkeys(fields, "add"),
+    )
+
+
+def source_rate(source_id):
+    """Fracción de eventos de la fuente con algún legendario (None sin eventos)."""
+    row = CommunitySourceStats.objects.filter(source_id=source_id).values_list(
+        "event_count", "legendary_events"
+    ).first()
+    if not row or not row[0]:
+        return None
+    return row[1] / row[0]
+
+
+def game_rate(game_id):
+    """Fracción de eventos del juego (todas sus fuentes) con algún legendario (None sin eventos)."""
+    totals = CommunitySourceStats.objects.filter(game_id=game_id).aggregate(
+        events=Sum("event_count"), legendary=Sum("legendary_events")
+    )
+    if not totals["events"]:
+        return None
+    return totals["legendary"] / totals["events"]
+
+
+def rebuild(game_id=None, batch_size=1000):
+    """
+    Recalcula CommunitySourceStats y CommunityDropStats desde
+    FarmEvent/FarmDrop. Devuelve las filas creadas (fuentes, recompensas).
+    """
+    events = FarmEvent.objects.all()
+    drops = FarmDrop.objects.all()
+    source_stats = CommunitySourceStats.objects.all()
+    drop_stats = CommunityDropStats.objects.all()
+    if game_id is not None:
+        events = events.filter(game_id=game_id)
+        drops = drops.filter(event__game_id=game_id)
+        source_stats = source_stats.filter(game_id=game_id)
+        drop_stats = drop_stats.filter(game_id=game_id)
+
+    source_rows = (
+        CommunitySourceStats(**row)
+        for row in events.order_by()
+        .values("game_id", "source_id")
+        .annotate(
+            event_count=Count("id", distinct=True),
+            drop_events=Count("id", distinct=True, filter=Q(drops__isnull=False)),
+            legendary_events=Count("id", distinct=True, filter=Q(drops__reward__rarity=LEGENDARY)),
+        )
+        .iterator()
+    )
+    drop_rows = (
+        CommunityDropStats(**row)
+        for row in drops.order_by()
+        .values("reward_id", game_id=F("event__game_id"), source_id=F("event__source_id"))
+        .annotate(
+            events_with_item=Count("event_id", distinct=True),
+            drop_count=Count("id"),
+            total_quantity=Sum("quantity"),
+            sum_squares=Sum(F("quantity") * F("quantity")),
+        )
+        .iterator()
+    )
+    with transaction.atomic():
+        source_stats.delete()
+        drop_stats.delete()
+        return (
+            rollups.bulk_insert(CommunitySourceStats, source_rows, batch_size),
+            rollups.bulk_insert(CommunityDropStats, drop_rows, batch_size),
+        )
@@ -0,0 +1,70 @@
+"""
+GET condicional (ETag / If-None-Match) para catálogo y estadísticas.
+
+El ETag se deriva de los tokens de versión (farm.versions) y de los
+parámetros de la petición, no del cuerpo de la respuesta: si el cliente ya
+tiene esa versión se responde 304 antes de ejecutar consultas o serializar.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import versions
+from .stats_cache import normalize_params, scope_pairs
+
+
+def compute_etag(view_name, pairs, kwargs, query_params, renderer_format):
+    payload = json.dumps(
+        [
+            view_name,
+            pairs,
+            versions.get_versions(pairs),
+            kwargs,
+            normalize_params(query_params),
+            renderer_format,
+        ],
+        sort_keys=True, default=str,
+    )
+    return '"%s"' % hashlib.sha1(payload.encode()).hexdigest()
+
+
+def etag_matches(request, etag):
+    client_etags = parse_etags(request.headers.get("If-None-Match", ""))
+    return etag in client_etags or "*" in client_etags
+
+
+def add_etag_headers(response, etag, scopes):
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    if "user" in scopes or "audience" in scopes:
+        patch_vary_headers(response, ["Authorization"])
+    return response
+
+
+def conditional_get(*scopes):
+    """Decora un handler GET (get/list/retrieve) de una vista DRF."""
+    def decorator(handler):
+        view_name = handler.__qualname__
+
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            pairs = scope_pairs(scopes, request.user.pk, request.query_params, kwargs)
+            renderer = getattr(request, "accepted_renderer", None)
+            etag = compute_etag(view_name, pairs, kwargs, request.query_params, getattr(renderer, "format", None))
+
+            if etag_matches(request, etag):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = handler(view, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+
+            return add_etag_headers(response, etag, scopes)
+
+        return wrapper
+    return decorator
@@ -0,0 +1,336 @@
+"""
+Cubo analítico en memoria para las estadísticas globales de un juego.
+
+Carga los drops de un juego en columnas NumPy compactas (ids int32,
+cantidades uint16, días como ordinal) y responde a los filtros de
+FarmStatsView con máscaras vectorizadas y ``bincount``, sin ir a la base de
+datos. Es opcional: solo se usa con ``FARM_CUBE_ENABLED`` y NumPy instalado.
+
+Se refresca por id de evento cuando cambia el token del juego: se leen los
+eventos con id mayor que el último cargado menos ``FARM_CUBE_RESCAN_IDS`` y
+se descartan los ya cargados. Así entran también los eventos que se
+confirman fuera de orden de id (una transacción lenta con un id menor que
+otra ya confirmada), siempre que el hueco quepa en esa ventana. Si se
+modifican o borran eventos ya existentes (token ``versions.REWRITE``),
+cambia el catálogo o pasa ``FARM_CUBE_RELOAD_SECONDS``, el juego se recarga
+entero.
+Cada proceso tiene sus propios cubos: ``memory_usage()`` dice cuánto ocupan.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from . import versions
+from .models import FarmDrop, FarmEvent, FarmReward
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende del entorno
+    np = None
+
+LOAD_CHUNK_SIZE = 50000
+
+
+def available():
+    return np is not None
+
+
+def enabled():
+    return available() and getattr(settings, "FARM_CUBE_ENABLED", False)
+
+
+class _Columns:
+    """Columnas de igual longitud que crecen por duplicación (append amortizado)."""
+
+    def __init__(self, dtypes):
+        self.size = 0
+        self.arrays = {name: np.empty(0, dtype=dtype) for name, dtype in dtypes.items()}
+
+    def append(self, **values):
+        values = {name: np.asarray(value) for name, value in values.items()}
+        count = len(next(iter(values.values())))
+        if not count:
+            return
+        needed = self.size + count
+        for name, value in values.items():
+            array = self.arrays[name]
+            dtype = array.dtype
+            # Subir de tipo si un valor no cabe (p. ej. cantidades > 65535)
+            if np.issubdtype(dtype, np.integer) and value.max() > np.iinfo(dtype).max:
+                dtype = np.uint32 if value.max() <= np.iinfo(np.uint32).max else np.uint64
+            if needed > len(array) or dtype != array.dtype:
+                grown = np.empty(max(needed, 2 * len(array), 1024), dtype=dtype)
+                grown[:self.size] = array[:self.size]
+                self.arrays[name] = array = grown
+            array[self.size:needed] = value
+        self.size = needed
+
+    def view(self):
+        """Vistas de solo lectura de las filas cargadas (estables ante appends posteriores)."""
+        return {name: array[:self.size] for name, array in self.arrays.items()}
+
+    def nbytes(self, allocated=False):
+        return sum(
+            array.nbytes if allocated else array[:self.size].nbytes
+            for array in self.arrays.values()
+        )
+
+
+class GameCube:
+    """Columnas de eventos y drops de un juego."""
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.lock = threading.Lock()
+        self.tokens = None
+        self.loaded_at = None
+        self.reset()
+
+    def reset(self):
+        self.last_event_id = 0
+        # Ids cargados dentro de la ventana que se vuelve a leer en cada refresh
+        self.recent_ids = set()
+        # Recompensas agrupadas por (nombre, rareza), como FarmStatsView
+        self.groups = []
+        self.group_index = {}
+        self.reward_group = {}
+        self.farm_types = []
+        self.farm_type_code = {}
+        self.events = _Columns({"source": np.int32, "farm_type": np.uint8, "day": np.int32})
+        self.drops = _Columns({
+            "source": np.int32, "farm_type": np.uint8, "day": np.int32,
+            "reward": np.int32, "group": np.int32, "quantity": np.uint16,
+        })
+
+    # -----------------------
+    # Carga
+    # -----------------------
+    def refresh(self):
+        """Trae lo nuevo desde la base de datos; recarga entero si hace falta."""
+        tokens = versions.get_versions([
+            ("game", self.game_id), (versions.REWRITE, self.game_id), ("catalog", self.game_id),
+        ])
+        with self.lock:
+            if tokens == self.tokens:
+                return
+            reload_seconds = getattr(settings, "FARM_CUBE_RELOAD_SECONDS", 3600)
+            if (
+                self.tokens is None
+                or tokens[1:] != self.tokens[1:]
+                or time.monotonic() - self.loaded_at > reload_seconds
+            ):
+                self.reset()
+                self.loaded_at = time.monotonic()
+            try:
+                self._load_new()
+            except Exception:
+                # Carga a medias: la próxima vez se empieza de cero
+                self.tokens = None
+                raise
+            self.tokens = tokens
+
+    def _load_new(self):
+        window = getattr(settings, "FARM_CUBE_RESCAN_IDS", 1000)
+        previous_last = self.last_event_id
+        floor = max(previous_last - window, 0)
+        events = (
+            FarmEvent.objects.filter(game_id=self.game_id, id__gt=floor)
+            .order_by("id").values_list("id", "source_id", "farm_type", "date")
+        )
+        last_id = previous_last
+        late, fresh = set(), set()
+        for chunk in _chunks(events.iterator(chunk_size=LOAD_CHUNK_SIZE)):
+            chunk = [row for row in chunk if row[0] not in self.recent_ids]
+            if not chunk:
+                continue
+            ids, sources, farm_types, dates = zip(*chunk)
+            self.events.append(
+                source=sources,
+                farm_type=[self._farm_type(value) for value in farm_types],
+                day=[date.toordinal() for date in dates],
+            )
+            last_id = max(last_id, ids[-1])
+            late.update(event_id for event_id in ids if event_id <= previous_last)
+            # Solo hace falta recordar los del final (acotado por la ventana)
+            fresh.update(event_id for event_id in ids if event_id > max(previous_last, last_id - window))
+        if not late and last_id == previous_last:
+            return
+
+        # Drops de exactamente los eventos cargados: los de la ventana se
+        # comprueban uno a uno (otro evento pudo confirmarse entre las dos consultas)
+        keep = last_id - window
+        drops = (
+            FarmDrop.objects.filter(event__game_id=self.game_id, event_id__gt=floor, event_id__lte=last_id)
+            .values_list("event_id", "reward_id", "quantity", "event__source_id", "event__farm_type", "event__date")
+        )
+        for chunk in _chunks(drops.iterator(chunk_size=LOAD_CHUNK_SIZE)):
+            chunk = [
+                row for row in chunk
+                if row[0] in late or row[0] in fresh or previous_last < row[0] <= keep
+            ]
+            if not chunk:
+                continue
+            _, rewards, quantities, sources, farm_types, dates = zip(*chunk)
+            self._load_rewards(set(rewards) - self.reward_group.keys())
+            self.drops.append(
+                source=sources,
+                farm_type=[self._farm_type(value) for value in farm_types],
+                day=[date.toordinal() for date in dates],
+                reward=rewards,
+                group=[self.reward_group[reward] for reward in rewards],
+                quantity=quantities,
+            )
+        self.recent_ids = {event_id for event_id in self.recent_ids | late | fresh if event_id > keep}
+        self.last_event_id = last_id
+
+    def _farm_type(self, value):
+        code = self.farm_type_code.get(value)
+        if code is None:
+            code = self.farm_type_code[value] = len(self.farm_types)
+            self.farm_types.append(value)
+        return code
+
+    def _load_rewards(self, reward_ids):
+        if not reward_ids:
+            return
+        for reward_id, name, rarity in FarmReward.objects.filter(id__in=reward_ids).values_list("id", "name", "rarity"):
+            key = (name, rarity)
+            index = self.group_index.get(key)
+            if index is None:
+                index = self.group_index[key] = len(self.groups)
+                self.groups.append(key)
+            self.reward_group[reward_id] = index
+
+    # -----------------------
+    # Consultas
+    # -----------------------
+    @staticmethod
+    def _mask(columns, type_codes, farm_type=None, source_id=None, start_date=None, end_date=None):
+        mask = np.ones(len(columns["day"]), dtype=bool)
+        if farm_type:
+            codes = [code for value, code in type_codes.items() if value.lower() == farm_type.lower()]
+            mask &= np.isin(columns["farm_type"], codes)
+        if source_id:
+            mask &= columns["source"] == int(source_id)
+        if start_date:
+            mask &= columns["day"] >= start_date.toordinal()
+        if end_date:
+            mask &= columns["day"] <= end_date.toordinal()
+        return mask
+
+    def farm_stats(self, fractions=(), farm_type=None, source_id=None, reward_id=None,
+                   start_date=None, end_date=None):
+        """
+        Lo mismo que ``rollups.farm_stats`` más ``percentiles.group_percentiles``:
+        (resumen, grupos ordenados por cantidad total, {(nombre, rareza): {fracción: valor}}).
+        """
+        with self.lock:
+            events, drops = self.events.view(), self.drops.view()
+            groups, type_codes = list(self.groups), dict(self.farm_type_code)
+
+        filters = dict(farm_type=farm_type, source_id=source_id, start_date=start_date, end_date=end_date)
+        total_events = int(np.count_nonzero(self._mask(events, type_codes, **filters)))
+
+        mask = self._mask(drops, type_codes, **filters)
+        if reward_id:
+            mask &= drops["reward"] == int(reward_id)
+        group = drops["group"][mask]
+        quantity = drops["quantity"][mask].astype(np.int64)
+
+        counts = np.bincount(group, minlength=len(groups))
+        totals = np.bincount(group, weights=quantity, minlength=len(groups))
+        squares = np.bincount(group, weights=quantity * quantity, minlength=len(groups))
+
+        # Cantidades ordenadas por grupo: mínimo, máximo y percentiles por posición
+        ordered = quantity[np.lexsort((quantity, group))]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        rows, by_group = [], {}
+        for index in np.flatnonzero(counts):
+            count, start = int(counts[index]), int(starts[index])
+            values = ordered[start:start + count]
+            mean = totals[index] / count
+            name, rarity = groups[index]
+            rows.append({
+                "reward__name": name,
+                "reward__rarity": rarity,
+                "total_quantity": int(totals[index]),
+                "drop_count": count,
+                "min_quantity": int(values[0]),
+                "max_quantity": int(values[-1]),
+                "avg_quantity": float(mean),
+                "stddev_quantity": float(np.sqrt(max(squares[index] / count - mean * mean, 0))),
+            })
+            # Interpolación lineal, igual que percentile_cont
+            by_group[(name, rarity)] = {
+                fraction: float(np.percentile(values, fraction * 100)) for fraction in fractions
+            }
+        rows.sort(key=lambda row: row["total_quantity"], reverse=True)
+
+        total_drops = int(totals.sum())
+        drop_count = int(counts.sum())
+        summary = {
+            "total_events": total_events,
+            "total_drops": total_drops,
+            "avg_drops": round(total_drops / drop_count, 2) if drop_count else 0,
+        }
+        return summary, rows, by_group
+
+    def memory(self):
+        return {
+            "events": self.events.size,
+            "drops": self.drops.size,
+            "bytes": self.events.nbytes() + self.drops.nbytes(),
+            "allocated_bytes": self.events.nbytes(allocated=True) + self.drops.nbytes(allocated=True),
+            "last_event_id": self.last_event_id,
+        }
+
+
+def _chunks(rows, size=LOAD_CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# -----------------------
+# Cubos del proceso (LRU por juego)
+# -----------------------
+_cubes = OrderedDict()
+_cubes_lock = threading.Lock()
+
+
+def get_cube(game_id):
+    """Cubo del juego, creado o refrescado si hace falta."""
+    game_id = int(game_id)
+    with _cubes_lock:
+        cube = _cubes.get(game_id)
+        if cube is None:
+            cube = _cubes[game_id] = GameCube(game_id)
+        _cubes.move_to_end(game_id)
+        while len(_cubes) > getattr(settings, "FARM_CUBE_MAX_GAMES", 4):
+            _cubes.popitem(last=False)
+    cube.refresh()
+    return cube
+
+
+def farm_stats(game_id, fractions=(), **filters):
+    return get_cube(game_id).farm_stats(fractions, **filters)
+
+
+def memory_usage():
+    """{game_id: {"events", "drops", "bytes", "allocated_bytes", "last_event_id"}} de este proceso."""
+    with _cubes_lock:
+        cubes = list(_cubes.values())
+    return {cube.game_id: cube.memory() for cube in cubes}
+
+
+def clear():
+    with _cubes_lock:
+        _cubes.clear()
@@ -0,0 +1,205 @@
+"""
+Ruta de escritura de eventos de farmeo.
+
+``record_written`` es el punto único que actualiza los agregados derivados
+(rollups, etc.) tras escribir eventos, tanto desde FarmEventSerializer como
+desde la carga masiva; ``record_removed`` los deshace tras borrarlos. ``create_events`` escribe lotes de eventos ya
+validados con ``bulk_create`` dentro de una sola transacción.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from . import community, leaderboards, rollups, versions
+from .models import FarmDrop, FarmEvent, FarmReward
+from .reward_cache import reward_cache
+
+
+def record_written(entries, legendary=None):
+    """
+    Actualiza los agregados derivados; ``entries`` son pares (evento, drops).
+    ``legendary``: ids de recompensas legendarias, si ya se conocen.
+    """
+    entries = list(entries)
+    rollups.record_events(entries)
+    update_totals(added=entries, legendary=legendary)
+    versions.bump(
+        game_ids=[event.game_id for event, _ in entries],
+        user_ids=[event.user_id for event, _ in entries],
+    )
+
+
+def update_totals(removed=(), added=(), legendary=None):
+    """
+    Resta ``removed`` y suma ``added`` (pares (evento, drops)) en los totales
+    de farm.community y farm.leaderboards. Al modificar un evento se pasa su
+    estado anterior en ``removed`` y el nuevo en ``added``.
+    """
+    removed, added = list(removed), list(added)
+    if legendary is None:
+        legendary = community.legendary_rewards(removed + added)
+    for entries, sign in ((removed, -1), (added, 1)):
+        if entries:
+            community.record_events(entries, legendary, sign)
+            leaderboards.record_events(entries, legendary, sign)
+
+
+def removed_entries(events):
+    """Pares (evento, drops) de ``events``; se leen antes de borrarlos."""
+    return [(event, list(event.drops.all())) for event in events.prefetch_related("drops")]
+
+
+def record_removed(entries, legendary=None):
+    """
+    Deshace en los agregados derivados los eventos ya borrados de ``entries``:
+    recalcula los rollups de sus días (min/max no se pueden restar) y resta
+    los totales.
+    """
+    entries = list(entries)
+    for game_id, date in sorted({(event.game_id, event.date) for event, _ in entries}):
+        rollups.rebuild(game_id=game_id, start_date=date, end_date=date)
+    update_totals(removed=entries, legendary=legendary)
+
+
+def create_events(game, user, items):
+    """
+    Crea los eventos (y sus drops) de ``items``, una lista de ``validated_data``
+    de FarmEventSerializer. Devuelve los eventos en el mismo orden.
+
+    La caché de recompensas es de cada proceso y solo se invalida en el que
+    borra: un id cacheado puede no existir ya. La clave foránea de FarmDrop se
+    comprueba al hacer commit, así que si falla se repite la escritura una vez
+    resolviendo las recompensas en la base de datos.
+    """
+    try:
+        return _create_events(game, user, items, use_cache=True)
+    except IntegrityError:
+        # Dentro de una transacción externa el commit es de quien llama: no hay reintento posible
+        if transaction.get_connection().in_atomic_block:
+            raise
+        return _create_events(game, user, items, use_cache=False)
+
+
+def _create_events(game, user, items, use_cache):
+    with transaction.atomic():
+        reward_keys = {
+            (item["source"].pk, drop["reward_name"], drop["rarity"])
+            for item in items
+            for drop in item.get("drops", [])
+        }
+        reward_ids = resolve_rewards(
+            reward_keys, {item["source"].game_id for item in items}, use_cache=use_cache
+        )
+
+        events = FarmEvent.objects.bulk_create([
+            FarmEvent(
+                user=user,
+                game=game,
+                farm_type=item["farm_type"],
+                source=item["source"],
+                total_drops=sum(drop.get("quantity", 1) for drop in item.get("drops", [])),
+                drop_count=len(item.get("drops", [])),
+            )
+            for item in items
+        ])
+
+        entries = []
+        all_drops = []
+        for event, item in zip(events, items):
+            drops = [
+                FarmDrop(
+                    event=event,
+                    reward_id=reward_ids[(event.source_id, drop["reward_name"], drop["rarity"])],
+                    quantity=drop.get("quantity", 1),
+                )
+                for drop in item.get("drops", [])
+            ]
+            all_drops.extend(drops)
+            entries.append((event, drops))
+
+        FarmDrop.objects.bulk_create(all_drops)
+        # La rareza viene en la petición: no hace falta consultarla
+        record_written(entries, legendary={
+            reward_id for key, reward_id in reward_ids.items() if key[2] == community.LEGENDARY
+        })
+
+    return events
+
+
+def resolve_rewards(keys, game_ids, use_cache=True):
+    """
+    Devuelve {(source_id, nombre, rareza): reward_id}, creando las recompensas
+    que falten. Primero consulta la caché LRU (salvo con ``use_cache=False``);
+    para el resto el número de consultas es constante, sin importar cuántas
+    claves haya. ``game_ids`` son los juegos de las fuentes de ``keys`` (su
+    catálogo cambia si se crean).
+    """
+    resolved = {}
+    pending = set()
+    for key in set(keys):
+        reward_id = reward_cache.get(key) if use_cache else None
+        if reward_id is None:
+            pending.add(key)
+        else:
+            resolved[key] = reward_id
+    if not pending:
+        return resolved
+
+    found = _existing_rewards(pending)
+    missing = pending - found.keys()
+    if missing:
+        FarmReward.objects.bulk_create(
+            [FarmReward(source_id=source_id, name=name, rarity=rarity) for source_id, name, rarity in missing],
+            ignore_conflicts=True,
+        )
+        found.update(_existing_rewards(missing))
+        # bulk_create no emite señales: avisar del cambio de catálogo
+        versions.bump(catalog_game_ids=game_ids)
+
+    # Solo se cachean ids que ya son visibles para otras transacciones
+    transaction.on_commit(lambda: reward_cache.put_many(found))
+    resolved.update(found)
+    return resolved
+
+
+def _existing_rewards(keys):
+    # Filtra por fuente y nombre (superconjunto) y ajusta la clave exacta en Python
+    rows = FarmReward.objects.filter(
+        source_id__in={source_id for source_id, _, _ in keys},
+        name__in={name for _, name, _ in keys},
+    ).values_list("pk", "source_id", "name", "rarity")
+    return {
+        (source_id, name, rarity): pk
+        for pk, source_id, name, rarity in rows
+        if (source_id, name, rarity) in keys
+    }
+
+
+def backfill_event_totals(game_id=None, batch_size=5000):
+    """
+    Recalcula FarmEvent.total_drops/drop_count desde FarmDrop, por lotes de id.
+    Devuelve el número de eventos actualizados.
+    """
+    drops = FarmDrop.objects.filter(event=OuterRef("pk")).order_by().values("event")
+    total = Coalesce(
+        Subquery(drops.annotate(total=Sum("quantity")).values("total"), output_field=IntegerField()),
+        Value(0),
+    )
+    count = Coalesce(
+        Subquery(drops.annotate(count=Count("id")).values("count"), output_field=IntegerField()),
+        Value(0),
+    )
+
+    events = FarmEvent.objects.all()
+    if game_id is not None:
+        events = events.filter(game_id=game_id)
+
+    updated = 0
+    last_id = 0
+    while True:
+        ids = list(events.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return updated
+        with transaction.atomic():
+            updated += FarmEvent.objects.filter(pk__in=ids).update(total_drops=total, drop_count=count)
+        last_id = ids[-1]
@@ -0,0 +1,64 @@
+"""
+Intervalos de confianza para tasas de drop.
+
+Se usa el intervalo de Wilson: a diferencia del intervalo normal (Wald), no
+se sale de [0, 1] y sigue siendo razonable con pocos eventos o con tasas
+cercanas a 0, que es lo habitual con recompensas legendarias.
+
+Con NumPy (ver requirements.txt) la tabla entera se calcula en una pasada
+vectorizada; sin él, como farm.cube, se recurre a un bucle en Python.
+"""
+from math import sqrt
+from statistics import NormalDist
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende del entorno
+    np = None
+
+
+def parse_confidence(raw, default=0.95):
+    """Nivel de confianza de ``?confidence=``; ValueError si no está en (0, 1)."""
+    if raw is None or not raw.strip():
+        return default
+    confidence = float(raw)
+    if not 0 < confidence < 1:
+        raise ValueError(raw)
+    return confidence
+
+
+def wilson_intervals(successes, trials, confidence=0.95):
+    """
+    Intervalos de Wilson [(bajo, alto)] para cada valor de ``successes`` con el
+    mismo número de ``trials``. El término que depende solo de ``trials`` se
+    calcula una vez para toda la lista.
+    """
+    if trials <= 0:
+        return [(0.0, 0.0) for _ in successes]
+
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    z2_n = z * z / trials
+    denominator = 1 + z2_n
+    half_offset = z2_n / 2
+    quarter = z2_n / (4 * trials)
+
+    if np is not None:
+        counts = np.asarray(successes, dtype=np.float64)
+        p = counts / trials
+        center = (p + half_offset) / denominator
+        margin = z * np.sqrt(p * (1 - p) / trials + quarter) / denominator
+        # En los extremos el límite es exacto (evita restos de coma flotante)
+        low = np.where(counts == 0, 0.0, np.maximum(0.0, center - margin))
+        high = np.where(counts == trials, 1.0, np.minimum(1.0, center + margin))
+        return list(zip(low.tolist(), high.tolist()))
+
+    intervals = []
+    for count in successes:
+        p = count / trials
+        center = (p + half_offset) / denominator
+        margin = z * sqrt(p * (1 - p) / trials + quarter) / denominator
+        # En los extremos el límite es exacto (evita restos de coma flotante)
+        low = 0.0 if count == 0 else max(0.0, center - margin)
+        high = 1.0 if count == trials else min(1.0, center + margin)
+        intervals.append((low, high))
+    return intervals
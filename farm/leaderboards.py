@@ -0,0 +1,280 @@
+"""
+Rankings por juego y por fuente, mantenidos de forma incremental.
+
+LeaderboardEntry guarda por usuario, en cada fuente y en todo el juego
+(``source`` nulo), las partidas, los legendarios obtenidos y los eventos con
+algún legendario. Cada escritura de eventos suma sus totales con un UPDATE
+por fila afectada (farm.ingest.record_written), así que leer un ranking es
+recorrer K filas de un índice: nunca se agrupan FarmEvent/FarmDrop.
+
+La posición de un usuario sale de una tabla de rangos: los valores del
+ranking ordenados, guardados en la caché con el token de versión del juego
+(``ranked_values``). Tras una escritura, la primera consulta de posición
+recorre una vez el índice de la partición; las siguientes, de cualquier
+usuario, son una búsqueda binaria, O(log n).
+
+La suerte se ordena por ``luck_score``, el límite inferior del intervalo de
+Wilson de la tasa de eventos con legendario: con pocas partidas el límite es
+bajo, así que un 1 de 1 no encabeza el ranking. Cada fila muestra además
+``luck``, la tasa del usuario dividida entre la de la comunidad
+(farm.community) en el mismo ámbito: la de la fuente en los rankings de una
+fuente y la de todo el juego en los del juego. Dentro de un ranking esa tasa
+es la misma para todos, así que no cambia el orden.
+"""
+from array import array
+from bisect import bisect_right
+from collections import defaultdict
+from statistics import NormalDist
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Greatest, NullIf, Sqrt
+
+from . import community, intervals, rollups, versions
+from .models import FarmEvent, Game, LeaderboardEntry
+
+BOARDS = {"runs": "runs", "legendary": "legendary_drops", "luck": "luck_score"}
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+CONFIDENCE = 0.95
+RANKS_KEY_PREFIX = "farm:ranks"
+_Z = NormalDist().inv_cdf((1 + CONFIDENCE) / 2)
+
+
+# -----------------------
+# Escritura
+# -----------------------
+def luck_score(runs, legendary_events):
+    if not runs:
+        return 0.0
+    return intervals.wilson_intervals([legendary_events], runs, CONFIDENCE)[0][0]
+
+
+def _luck_expression(runs, legendary_events):
+    """``luck_score`` en SQL, para calcularlo en el mismo UPDATE que suma los totales."""
+    n = Cast(NullIf(runs, Value(0)), FloatField())
+    p = Cast(legendary_events, FloatField()) / n
+    z2 = _Z * _Z
+    center = p + Value(z2 / 2) / n
+    margin = Value(_Z) * Sqrt(p * (Value(1.0) - p) / n + Value(z2 / 4) / (n * n))
+    score = (center - margin) / (Value(1.0) + Value(z2) / n)
+    return Greatest(Coalesce(score, Value(0.0)), Value(0.0))
+
+
+def record_events(entries, legendary, sign=1):
+    """
+    Suma (``sign=1``) o resta (``sign=-1``) los pares (evento, drops) de
+    ``entries`` en las filas de su fuente y del juego completo.
+    ``legendary`` son los ids de community.legendary_rewards. Se llama dentro
+    de la transacción de la escritura (farm.ingest.update_totals).
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for event, drops in entries:
+        quantity = sum(drop.quantity for drop in drops if drop.reward_id in legendary)
+        has_legendary = any(drop.reward_id in legendary for drop in drops)
+        for source_id in (event.source_id, None):
+            delta = deltas[(event.game_id, source_id, event.user_id)]
+            delta[0] += 1
+            delta[1] += quantity
+            delta[2] += has_legendary
+
+    # Orden fijo de claves (None al final) para no bloquear filas en distinto orden
+    ordered = sorted(deltas.items(), key=lambda item: (item[0][0], item[0][1] is None, item[0][1] or 0, item[0][2]))
+    for (game_id, source_id, user_id), (runs, quantity, legendary_events) in ordered:
+        key = {"game_id": game_id, "source_id": source_id, "user_id": user_id}
+        runs, quantity, legendary_events = sign * runs, sign * quantity, sign * legendary_events
+        increments = {
+            "runs": F("runs") + runs,
+            "legendary_drops": F("legendary_drops") + quantity,
+            "legendary_events": F("legendary_events") + legendary_events,
+            "luck_score": _luck_expression(F("runs") + runs, F("legendary_events") + legendary_events),
+        }
+        if sign < 0:
+            LeaderboardEntry.objects.filter(**key).update(**increments)
+            LeaderboardEntry.objects.filter(**key, runs=0).delete()
+            continue
+        rollups.upsert(LeaderboardEntry, key, increments, {
+            "runs": runs,
+            "legendary_drops": quantity,
+            "legendary_events": legendary_events,
+            "luck_score": luck_score(runs, legendary_events),
+        })
+
+
+def rebuild(game_id=None, batch_size=1000):
+    """
+    Recalcula los rankings (y los agregados de farm.community) desde
+    FarmEvent/FarmDrop. Devuelve el número de filas de ranking creadas.
+    """
+    events = FarmEvent.objects.all()
+    entries = LeaderboardEntry.objects.all()
+    if game_id is not None:
+        events = events.filter(game_id=game_id)
+        entries = entries.filter(game_id=game_id)
+
+    legendary = Q(drops__reward__rarity=community.LEGENDARY)
+    per_source = (
+        events.order_by()
+        .values("game_id", "source_id", "user_id")
+        .annotate(
+            runs=Count("id", distinct=True),
+            legendary_drops=Coalesce(Sum("drops__quantity", filter=legendary), 0),
+            legendary_events=Count("id", distinct=True, filter=legendary),
+        )
+        .iterator()
+    )
+
+    game_totals = defaultdict(lambda: [0, 0, 0])
+
+    def rows():
+        for row in per_source:
+            totals = game_totals[(row["game_id"], row["user_id"])]
+            totals[0] += row["runs"]
+            totals[1] += row["legendary_drops"]
+            totals[2] += row["legendary_events"]
+            yield LeaderboardEntry(luck_score=luck_score(row["runs"], row["legendary_events"]), **row)
+        # Filas del juego completo, cuando ya se han visto todas las fuentes
+        for (game, user_id), (runs, quantity, legendary_events) in game_totals.items():
+            yield LeaderboardEntry(
+                game_id=game, source_id=None, user_id=user_id, runs=runs,
+                legendary_drops=quantity, legendary_events=legendary_events,
+                luck_score=luck_score(runs, legendary_events),
+            )
+
+    with transaction.atomic():
+        entries.delete()
+        created = rollups.bulk_insert(LeaderboardEntry, rows(), batch_size)
+        community.rebuild(game_id=game_id, batch_size=batch_size)
+    # Las tablas de rangos y las respuestas cacheadas dependen del token del juego
+    versions.bump(game_ids=[game_id] if game_id is not None else Game.objects.values_list("id", flat=True))
+    return created
+
+
+def ranked_values(game_id, source_id, field):
+    """
+    Valores de ``field`` en la partición (juego, fuente), de menor a mayor.
+    Se guardan con el token de versión del juego: se recalculan la primera
+    vez que se piden tras una escritura en el juego.
+    """
+    # El token se lee antes que los datos: una escritura concurrente deja la tabla bajo el token viejo
+    token = versions.get_versions([("game", game_id)])[0]
+    key = f"{RANKS_KEY_PREFIX}:{game_id}:{source_id or 'all'}:{field}:{token}"
+    values = cache.get(key)
+    if values is None:
+        partition = LeaderboardEntry.objects.filter(game_id=game_id, source_id=source_id)
+        values = array("d", partition.order_by(field).values_list(field, flat=True))
+        cache.set(key, values, getattr(settings, "FARM_STATS_CACHE_TIMEOUT", 300))
+    return values
+
+
+# -----------------------
+# Lectura (mismo esquema que farm.stats_queries)
+# -----------------------
+class _Board:
+    def __init__(self, user, query_params, kwargs):
+        self.user = user
+        self.game_id = kwargs["game_id"]
+        self.board = kwargs["board"]
+        self.source_id = query_params.get("sourceID") or None
+        self.error = None
+        self.field = BOARDS.get(self.board)
+        if self.field is None:
+            self.error = "El ranking debe ser runs, legendary o luck."
+        elif self.source_id is not None and not self.source_id.isdigit():
+            self.error = "sourceID debe ser un entero."
+
+    def partition(self):
+        return LeaderboardEntry.objects.filter(game_id=self.game_id, source_id=self.source_id)
+
+    def community_part(self):
+        if self.source_id:
+            return lambda: community.source_rate(self.source_id)
+        return lambda: community.game_rate(self.game_id)
+
+    def entry_payload(self, row, rank, community_rate):
+        rate = row["legendary_events"] / row["runs"] if row["runs"] else 0
+        return {
+            "rank": rank,
+            "user": row["user__username"],
+            "runs": row["runs"],
+            "legendary_drops": row["legendary_drops"],
+            "legendary_events": row["legendary_events"],
+            "legendary_rate": rate,
+            "luck_score": row["luck_score"],
+            "luck": rate / community_rate if community_rate else None,
+        }
+
+    def base_payload(self, community_rate):
+        return {
+            "game_id": self.game_id,
+            "board": self.board,
+            "sourceID": self.source_id,
+            "community_legendary_rate": community_rate,
+        }
+
+
+_FIELDS = ("user__username", "runs", "legendary_drops", "legendary_events", "luck_score")
+
+
+class Top(_Board):
+    """Las ``limit`` primeras filas de un ranking."""
+    view_name = "LeaderboardView"
+
+    def __init__(self, user, query_params, kwargs):
+        super().__init__(user, query_params, kwargs)
+        raw = query_params.get("limit")
+        try:
+            self.limit = int(raw) if raw else DEFAULT_LIMIT
+            if not 1 <= self.limit <= MAX_LIMIT:
+                raise ValueError(raw)
+        except ValueError:
+            self.error = self.error or f"limit debe ser un entero entre 1 y {MAX_LIMIT}."
+
+    def parts(self):
+        return {
+            "entries": lambda: list(
+                self.partition().order_by(f"-{self.field}", "user_id").values(*_FIELDS)[:self.limit]
+            ),
+            "community": self.community_part(),
+        }
+
+    def payload(self, results):
+        entries = []
+        rank, previous = 0, None
+        for position, row in enumerate(results["entries"], start=1):
+            # Empates con la misma posición (1, 2, 2, 4...)
+            if row[self.field] != previous:
+                rank, previous = position, row[self.field]
+            entries.append(self.entry_payload(row, rank, results["community"]))
+        return dict(self.base_payload(results["community"]), limit=self.limit, entries=entries)
+
+
+class Rank(_Board):
+    """Posición de un usuario (?user=, por defecto el autenticado) en un ranking."""
+    view_name = "LeaderboardRankView"
+
+    def __init__(self, user, query_params, kwargs):
+        super().__init__(user, query_params, kwargs)
+        self.username = query_params.get("user") or user.get_username()
+
+    def parts(self):
+        entry = self.partition().filter(user__username=self.username)
+        return {
+            "entry": lambda: entry.values(*_FIELDS).first(),
+            "ranked": lambda: ranked_values(self.game_id, self.source_id, self.field),
+            "community": self.community_part(),
+        }
+
+    def payload(self, results):
+        data = self.base_payload(results["community"])
+        row = results["entry"]
+        if row is None:
+            data["entry"] = {"rank": None, "user": self.username}
+        else:
+            # Filas con mejor valor: búsqueda binaria en la tabla de rangos
+            ranked = results["ranked"]
+            ahead = len(ranked) - bisect_right(ranked, row[self.field])
+            data["entry"] = self.entry_payload(row, ahead + 1, results["community"])
+        return data
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from farm import ingest
+
+
+class Command(BaseCommand):
+    help = "Recalcula FarmEvent.total_drops y drop_count a partir de FarmDrop."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--game", type=int, help="ID del juego (por defecto, todos).")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        updated = ingest.backfill_event_totals(game_id=options["game"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Eventos actualizados: {updated}."))
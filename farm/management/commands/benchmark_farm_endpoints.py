@@ -0,0 +1,156 @@
+import json
+import platform
+import statistics
+import time
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from farm import catalog, synthetic
+from farm.models import FarmEvent, FarmSource
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide los endpoints de estadísticas, historial y creación de eventos sobre una base de "
+        "datos de test con datos sintéticos de varios tamaños, y emite un informe JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000",
+                            help="Número de eventos de cada ronda, separados por comas.")
+        parser.add_argument("--repeat", type=int, default=5, help="Peticiones medidas por endpoint.")
+        parser.add_argument("--warmup", type=int, default=1, help="Peticiones previas no medidas.")
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--games", type=int, default=2)
+        parser.add_argument("--sources", type=int, default=10)
+        parser.add_argument("--rewards", type=int, default=12)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Fichero JSON de salida (por defecto, stdout).")
+
+    def handle(self, *args, **options):
+        sizes = sorted({int(size) for size in options["sizes"].split(",") if size.strip()})
+
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # Se mide el cálculo, no la caché de respuestas
+            with override_settings(FARM_STATS_CACHE_ENABLED=False):
+                results = self.run_sizes(sizes, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "meta": {
+                "seed": options["seed"],
+                "repeat": options["repeat"],
+                "database": connection.vendor,
+                "django": django.get_version(),
+                "python": platform.python_version(),
+            },
+            "results": results,
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as handle:
+                handle.write(output + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Informe escrito en {options['output']}."))
+        else:
+            self.stdout.write(output)
+
+    def run_sizes(self, sizes, options):
+        dataset = synthetic.create_catalog(
+            users=options["users"],
+            games=options["games"],
+            sources_per_game=options["sources"],
+            rewards_per_source=options["rewards"],
+            seed=options["seed"],
+        )
+        results = {}
+        generated = 0
+        for size in sizes:
+            if size > generated:
+                synthetic.generate_events(dataset, size - generated)
+                generated = size
+            synthetic.rebuild_derived(dataset.game_ids)
+            cache.clear()
+            catalog.clear()
+
+            self.stderr.write(f"Midiendo con {generated} eventos...")
+            results[str(size)] = {
+                name: self.measure(method, url, data, options)
+                for name, method, url, data in self.cases(dataset)
+            }
+        return results
+
+    def cases(self, dataset):
+        User = get_user_model()
+        game_id = dataset.game_ids[0]
+        # El usuario y la fuente con más eventos son el peor caso
+        user_id = (
+            FarmEvent.objects.filter(game_id=game_id).values("user_id")
+            .annotate(n=Count("id")).order_by("-n").values_list("user_id", flat=True).first()
+        )
+        user = User.objects.get(pk=user_id)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        # Las vistas asíncronas no son de DRF: autentican con el JWT
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        source = FarmSource.objects.filter(game_id=game_id).order_by("id").first()
+        reward = source.rewards.order_by("id").first()
+        event = {
+            "farm_type": source.source_type,
+            "source": source.id,
+            "drops": [{"reward_name": reward.name, "rarity": reward.rarity, "quantity": 2}],
+        }
+
+        return [
+            ("FarmStatsView", "get", reverse("farm-stats", kwargs={"game_id": game_id}), {}),
+            ("FarmStatsView:source+percentiles", "get", reverse("farm-stats", kwargs={"game_id": game_id}),
+             {"sourceID": source.id, "percentiles": "50,90,99"}),
+            ("FarmStatsView:async", "get", reverse("farm-stats-async", kwargs={"game_id": game_id}), {}),
+            ("UserStatsView", "get", reverse("user-stats"), {"game_id": game_id}),
+            ("UserStatsView:async", "get", reverse("user-stats-async"), {"game_id": game_id}),
+            ("DropRateStatsView", "get", reverse("drop-rate-stats", kwargs={"game_id": game_id}),
+             {"sourceID": source.id}),
+            ("DropRateStatsView:async", "get", reverse("drop-rate-stats-async", kwargs={"game_id": game_id}),
+             {"sourceID": source.id}),
+            ("FarmHistoryView", "get", reverse("farm-history", kwargs={"game_id": game_id}), {}),
+            ("FarmEventCreate", "post", reverse("farm-event-list", kwargs={"game_pk": game_id}), event),
+            ("FarmEventBulk:100", "post", reverse("farm-event-bulk", kwargs={"game_pk": game_id}), [event] * 100),
+        ]
+
+    def measure(self, method, url, data, options):
+        request = getattr(self.client, method)
+        kwargs = {"format": "json"} if method == "post" else {}
+        for _ in range(options["warmup"]):
+            request(url, data, **kwargs)
+
+        timings, queries, status_code = [], [], None
+        for _ in range(options["repeat"]):
+            start = time.perf_counter()
+            response = request(url, data, **kwargs)
+            timings.append((time.perf_counter() - start) * 1000)
+            status_code = response.status_code
+            stats = getattr(response, "query_stats", None)
+            queries.append(stats.count if stats else None)
+
+        timings.sort()
+        return {
+            "status": status_code,
+            "min_ms": round(timings[0], 3),
+            "median_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(timings[min(len(timings) - 1, int(0.95 * len(timings)))], 3),
+            "max_ms": round(timings[-1], 3),
+            "queries": max(queries, key=lambda count: count or 0),
+        }
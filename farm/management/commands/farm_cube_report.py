@@ -0,0 +1,30 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from farm import cube
+from farm.models import Game
+
+
+class Command(BaseCommand):
+    help = "Carga el cubo NumPy de cada juego y muestra filas, memoria ocupada y tiempo de carga."
+
+    def add_arguments(self, parser):
+        parser.add_argument("game_ids", nargs="*", type=int, help="Juegos a cargar (por defecto, todos).")
+
+    def handle(self, *args, **options):
+        if not cube.available():
+            raise CommandError("NumPy no está instalado.")
+
+        game_ids = options["game_ids"] or list(Game.objects.order_by("id").values_list("id", flat=True))
+        report = {}
+        for game_id in game_ids:
+            game_cube = cube.GameCube(game_id)
+            start = time.perf_counter()
+            game_cube.refresh()
+            memory = game_cube.memory()
+            memory["load_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            memory["bytes_per_drop"] = round(memory["bytes"] / memory["drops"], 2) if memory["drops"] else 0
+            report[game_id] = memory
+        self.stdout.write(json.dumps(report, indent=2))
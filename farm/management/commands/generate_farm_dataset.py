@@ -0,0 +1,45 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from farm import synthetic
+
+
+class Command(BaseCommand):
+    help = "Genera un conjunto de datos sintético y determinista (usuarios, catálogo, eventos y drops)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=100000, help="Número de eventos a insertar.")
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--games", type=int, default=2)
+        parser.add_argument("--sources", type=int, default=10, help="Fuentes por juego.")
+        parser.add_argument("--rewards", type=int, default=12, help="Recompensas por fuente.")
+        parser.add_argument("--days", type=int, default=365, help="Días hacia atrás que cubren los eventos.")
+        parser.add_argument(
+            "--end-date", type=datetime.date.fromisoformat, default=synthetic.DEFAULT_END_DATE,
+            help="Último día de los eventos, YYYY-MM-DD (por defecto, una fecha fija).",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        dataset = synthetic.create_catalog(
+            users=options["users"],
+            games=options["games"],
+            sources_per_game=options["sources"],
+            rewards_per_source=options["rewards"],
+            seed=options["seed"],
+            days=options["days"],
+            end_date=options["end_date"],
+        )
+
+        def progress(n_events, n_drops):
+            self.stdout.write(f"  {n_events} eventos, {n_drops} drops")
+
+        n_events, n_drops = synthetic.generate_events(
+            dataset, options["events"], batch_size=options["batch_size"], progress=progress
+        )
+        synthetic.rebuild_derived(dataset.game_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Generados {n_events} eventos y {n_drops} drops en {len(dataset.game_ids)} juegos."
+        ))
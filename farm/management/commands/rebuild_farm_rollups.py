@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from farm import rollups
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los rollups diarios de farmeo a partir de FarmEvent/FarmDrop."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--game", type=int, help="ID del juego (por defecto, todos).")
+        parser.add_argument("--start-date", help="Fecha inicial YYYY-MM-DD (inclusive).")
+        parser.add_argument("--end-date", help="Fecha final YYYY-MM-DD (inclusive).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        n_events, n_drops = rollups.rebuild(
+            game_id=options["game"],
+            start_date=options["start_date"],
+            end_date=options["end_date"],
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollups reconstruidos: {n_events} filas de eventos, {n_drops} filas de drops."
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from farm import leaderboards
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los rankings y los agregados de la comunidad a partir de FarmEvent/FarmDrop."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--game", type=int, help="ID del juego (por defecto, todos).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = leaderboards.rebuild(game_id=options["game"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rankings reconstruidos: {created} filas."))
@@ -0,0 +1,19 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from farm import stats_cache, versions
+from farm import views  # noqa: F401  registra las vistas cacheadas
+
+
+class Command(BaseCommand):
+    help = "Muestra aciertos, fallos y tasa de acierto de la caché de estadísticas."
+
+    def handle(self, *args, **options):
+        if not versions.shared_cache():
+            # Los contadores los escriben los workers: este proceso no los ve
+            self.stderr.write(
+                "La caché es local a este proceso: los contadores salen a 0. "
+                "Configura REDIS_URL o un CACHE_BACKEND compartido."
+            )
+        self.stdout.write(json.dumps(stats_cache.hit_ratios(), indent=2))
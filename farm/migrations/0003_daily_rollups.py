@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:17
+
+from itertools import islice
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Min, Sum
+
+
+def backfill_rollups(apps, schema_editor):
+    FarmEvent = apps.get_model('farm', 'FarmEvent')
+    FarmDrop = apps.get_model('farm', 'FarmDrop')
+    FarmEventDailyRollup = apps.get_model('farm', 'FarmEventDailyRollup')
+    FarmDropDailyRollup = apps.get_model('farm', 'FarmDropDailyRollup')
+
+    event_rows = (
+        FarmEventDailyRollup(**row)
+        for row in FarmEvent.objects.order_by()
+        .values('game_id', 'source_id', 'farm_type', 'date')
+        .annotate(event_count=Count('id'))
+        .iterator()
+    )
+    bulk_insert(FarmEventDailyRollup, event_rows)
+
+    drop_rows = (
+        FarmDropDailyRollup(
+            game_id=row['event__game'], source_id=row['event__source'], reward_id=row['reward'],
+            farm_type=row['event__farm_type'], date=row['event__date'],
+            drop_count=row['drop_count'], total_quantity=row['total_quantity'], sum_squares=row['sum_squares'],
+            min_quantity=row['min_quantity'], max_quantity=row['max_quantity'],
+        )
+        for row in FarmDrop.objects.order_by()
+        .values('event__game', 'event__source', 'reward', 'event__farm_type', 'event__date')
+        .annotate(
+            drop_count=Count('id'),
+            total_quantity=Sum('quantity'),
+            sum_squares=Sum(F('quantity') * F('quantity')),
+            min_quantity=Min('quantity'),
+            max_quantity=Max('quantity'),
+        )
+        .iterator()
+    )
+    bulk_insert(FarmDropDailyRollup, drop_rows)
+
+
+def bulk_insert(model, rows, batch_size=1000):
+    while batch := list(islice(rows, batch_size)):
+        model.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farm', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FarmDropDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('farm_type', models.CharField(choices=[('JEFE', 'Jefe'), ('JEFE-SEMANAL', 'Jefe Semanal'), ('DOMINIO', 'Dominio')], max_length=20)),
+                ('date', models.DateField()),
+                ('drop_count', models.PositiveIntegerField(default=0)),
+                ('total_quantity', models.PositiveBigIntegerField(default=0)),
+                ('sum_squares', models.PositiveBigIntegerField(default=0)),
+                ('min_quantity', models.PositiveIntegerField(null=True)),
+                ('max_quantity', models.PositiveIntegerField(null=True)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farm.game')),
+                ('reward', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farm.farmreward')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farm.farmsource')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['game', 'date'], name='farm_droproll_game_date')],
+                'unique_together': {('game', 'source', 'reward', 'farm_type', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='FarmEventDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('farm_type', models.CharField(choices=[('JEFE', 'Jefe'), ('JEFE-SEMANAL', 'Jefe Semanal'), ('DOMINIO', 'Dominio')], max_length=20)),
+                ('date', models.DateField()),
+                ('event_count', models.PositiveIntegerField(default=0)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farm.game')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farm.farmsource')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['game', 'date'], name='farm_evroll_game_date')],
+                'unique_together': {('game', 'source', 'farm_type', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
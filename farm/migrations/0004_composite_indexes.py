@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farm', '0003_daily_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='farmdrop',
+            index=models.Index(fields=['event', 'reward', 'quantity'], name='farm_drop_event_reward_qty'),
+        ),
+        migrations.AddIndex(
+            model_name='farmevent',
+            index=models.Index(fields=['user', 'game', 'source', 'date'], name='farm_event_user_game_src_date'),
+        ),
+        migrations.AddIndex(
+            model_name='farmevent',
+            index=models.Index(fields=['user', 'game', 'date', 'id'], name='farm_event_user_game_date_id'),
+        ),
+        migrations.AddIndex(
+            model_name='farmevent',
+            index=models.Index(fields=['game', 'source', 'date'], name='farm_event_game_src_date'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:24
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_totals(apps, schema_editor):
+    FarmEvent = apps.get_model('farm', 'FarmEvent')
+    FarmDrop = apps.get_model('farm', 'FarmDrop')
+
+    drops = FarmDrop.objects.filter(event=OuterRef('pk')).order_by().values('event')
+    FarmEvent.objects.update(
+        total_drops=Coalesce(
+            Subquery(drops.annotate(total=Sum('quantity')).values('total'), output_field=IntegerField()),
+            Value(0),
+        ),
+        drop_count=Coalesce(
+            Subquery(drops.annotate(count=Count('id')).values('count'), output_field=IntegerField()),
+            Value(0),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farm', '0004_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='farmevent',
+            name='drop_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='farmevent',
+            name='total_drops',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:12
+
+from collections import defaultdict
+from itertools import islice
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from farm.intervals import wilson_intervals
+
+LEGENDARY = 'LEGENDARIO'
+
+
+def luck_score(runs, legendary_events):
+    # Mismo cálculo que farm.leaderboards.luck_score en esta migración
+    if not runs:
+        return 0.0
+    return wilson_intervals([legendary_events], runs, 0.95)[0][0]
+
+
+def backfill_leaderboards(apps, schema_editor):
+    FarmEvent = apps.get_model('farm', 'FarmEvent')
+    LeaderboardEntry = apps.get_model('farm', 'LeaderboardEntry')
+    CommunitySourceStats = apps.get_model('farm', 'CommunitySourceStats')
+
+    legendary = Q(drops__reward__rarity=LEGENDARY)
+    per_source = (
+        FarmEvent.objects.order_by()
+        .values('game_id', 'source_id', 'user_id')
+        .annotate(
+            runs=Count('id', distinct=True),
+            legendary_drops=Coalesce(Sum('drops__quantity', filter=legendary), 0),
+            legendary_events=Count('id', distinct=True, filter=legendary),
+        )
+        .iterator()
+    )
+
+    game_totals = defaultdict(lambda: [0, 0, 0])
+    source_totals = defaultdict(lambda: [0, 0])
+
+    def entries():
+        for row in per_source:
+            totals = game_totals[(row['game_id'], row['user_id'])]
+            totals[0] += row['runs']
+            totals[1] += row['legendary_drops']
+            totals[2] += row['legendary_events']
+            community = source_totals[(row['game_id'], row['source_id'])]
+            community[0] += row['runs']
+            community[1] += row['legendary_events']
+            yield LeaderboardEntry(luck_score=luck_score(row['runs'], row['legendary_events']), **row)
+        for (game_id, user_id), (runs, quantity, legendary_events) in game_totals.items():
+            yield LeaderboardEntry(
+                game_id=game_id, source_id=None, user_id=user_id, runs=runs,
+                legendary_drops=quantity, legendary_events=legendary_events,
+                luck_score=luck_score(runs, legendary_events),
+            )
+
+    bulk_insert(LeaderboardEntry, entries())
+    # Los eventos de una fuente son la suma de los de sus usuarios
+    bulk_insert(CommunitySourceStats, (
+        CommunitySourceStats(game_id=game_id, source_id=source_id, event_count=events, legendary_events=legendary_events)
+        for (game_id, source_id), (events, legendary_events) in source_totals.items()
+    ))
+
+
+def bulk_insert(model, rows, batch_size=1000):
+    while batch := list(islice(rows, batch_size)):
+        model.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farm', '0005_event_drop_totals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommunitySourceStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_count', models.PositiveBigIntegerField(default=0)),
+                ('legendary_events', models.PositiveBigIntegerField(default=0)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farm.game')),
+                ('source', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farm.farmsource')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('runs', models.PositiveIntegerField(default=0)),
+                ('legendary_drops', models.PositiveBigIntegerField(default=0)),
+                ('legendary_events', models.PositiveIntegerField(default=0)),
+                ('luck_score', models.FloatField(default=0)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farm.game')),
+                ('source', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farm.farmsource')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['game', 'source', '-runs'], name='leaderboard_runs'), models.Index(fields=['game', 'source', '-legendary_drops'], name='leaderboard_legendary'), models.Index(fields=['game', 'source', '-luck_score'], name='leaderboard_luck')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('source__isnull', False)), fields=('game', 'source', 'user'), name='leaderboard_source_user'), models.UniqueConstraint(condition=models.Q(('source__isnull', True)), fields=('game', 'user'), name='leaderboard_game_user')],
+            },
+        ),
+        migrations.RunPython(backfill_leaderboards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:22
+
+from itertools import islice
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_drop_stats(apps, schema_editor):
+    FarmEvent = apps.get_model('farm', 'FarmEvent')
+    FarmDrop = apps.get_model('farm', 'FarmDrop')
+    CommunitySourceStats = apps.get_model('farm', 'CommunitySourceStats')
+    CommunityDropStats = apps.get_model('farm', 'CommunityDropStats')
+
+    drop_events = (
+        FarmEvent.objects.filter(source=OuterRef('source'))
+        .filter(Exists(FarmDrop.objects.filter(event=OuterRef('pk'))))
+        .order_by().values('source').annotate(total=Count('id')).values('total')
+    )
+    CommunitySourceStats.objects.update(drop_events=Coalesce(Subquery(drop_events), Value(0)))
+
+    rows = (
+        CommunityDropStats(
+            reward_id=row['reward'], game_id=row['event__game'], source_id=row['event__source'],
+            events_with_item=row['events_with_item'], drop_count=row['drop_count'],
+            total_quantity=row['total_quantity'], sum_squares=row['sum_squares'],
+        )
+        for row in FarmDrop.objects.order_by()
+        .values('reward', 'event__game', 'event__source')
+        .annotate(
+            events_with_item=Count('event_id', distinct=True),
+            drop_count=Count('id'),
+            total_quantity=Sum('quantity'),
+            sum_squares=Sum(F('quantity') * F('quantity')),
+        )
+        .iterator()
+    )
+    while batch := list(islice(rows, 1000)):
+        CommunityDropStats.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farm', '0006_leaderboards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='communitysourcestats',
+            name='drop_events',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='CommunityDropStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('events_with_item', models.PositiveBigIntegerField(default=0)),
+                ('drop_count', models.PositiveBigIntegerField(default=0)),
+                ('total_quantity', models.PositiveBigIntegerField(default=0)),
+                ('sum_squares', models.PositiveBigIntegerField(default=0)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farm.game')),
+                ('reward', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farm.farmreward')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farm.farmsource')),
+            ],
+        ),
+        migrations.RunPython(backfill_drop_stats, migrations.RunPython.noop),
+    ]
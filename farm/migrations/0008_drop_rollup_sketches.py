@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:29
+
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import migrations, models
+
+from farm.sketches import QuantileSketch
+
+DROP_KEY = ('game_id', 'source_id', 'reward_id', 'farm_type', 'date')
+
+
+def backfill_sketches(apps, schema_editor):
+    Game = apps.get_model('farm', 'Game')
+    FarmDrop = apps.get_model('farm', 'FarmDrop')
+    FarmDropDailyRollup = apps.get_model('farm', 'FarmDropDailyRollup')
+
+    # Juego a juego: el mapa clave -> id de rollup cabe en memoria
+    for game_id in Game.objects.values_list('id', flat=True):
+        rollup_ids = {
+            tuple(row[:-1]): row[-1]
+            for row in FarmDropDailyRollup.objects.filter(game_id=game_id).values_list(*DROP_KEY, 'id')
+        }
+        drops = (
+            FarmDrop.objects.filter(event__game_id=game_id)
+            .order_by('event__source_id', 'reward_id', 'event__farm_type', 'event__date')
+            .values_list('event__game_id', 'event__source_id', 'reward_id', 'event__farm_type', 'event__date', 'quantity')
+            .iterator(chunk_size=1000)
+        )
+        batch = []
+        for key, group in groupby(drops, key=itemgetter(0, 1, 2, 3, 4)):
+            if key not in rollup_ids:
+                continue
+            sketch = QuantileSketch()
+            sketch.extend(quantity for *_, quantity in group)
+            batch.append(FarmDropDailyRollup(id=rollup_ids[key], quantity_sketch=sketch.to_bytes()))
+            if len(batch) >= 500:
+                FarmDropDailyRollup.objects.bulk_update(batch, ['quantity_sketch'])
+                batch = []
+        if batch:
+            FarmDropDailyRollup.objects.bulk_update(batch, ['quantity_sketch'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farm', '0007_community_drop_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='farmdropdailyrollup',
+            name='quantity_sketch',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.RunPython(backfill_sketches, migrations.RunPython.noop),
+    ]
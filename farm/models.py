@@ -32,19 +32,34 @@ class FarmEvent(models.Model):
     source = models.ForeignKey(FarmSource, on_delete=models.CASCADE)
     date = models.DateField(auto_now_add=True)
     game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='farm_events')
+    # Desnormalizados: se fijan al escribir el evento (ver farm.ingest)
+    total_drops = models.PositiveIntegerField(default=0)
+    drop_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # UserStatsView / DropRateStatsView / historial filtrado por fuente
+            models.Index(fields=['user', 'game', 'source', 'date'], name='farm_event_user_game_src_date'),
+            # Historial paginado por (date, id)
+            models.Index(fields=['user', 'game', 'date', 'id'], name='farm_event_user_game_date_id'),
+            # Estadísticas globales (FarmStatsView) y reconstrucción de rollups
+            models.Index(fields=['game', 'source', 'date'], name='farm_event_game_src_date'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.source.name} ({self.date})"
-    
-    @property
-    def total_drops(self):
-        return sum(drop.quantity for drop in self.drops.all())
-    
+
 class FarmDrop(models.Model):
     event = models.ForeignKey('FarmEvent', on_delete=models.CASCADE, related_name='drops')
     reward = models.ForeignKey('FarmReward', on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        indexes = [
+            # Índice cubriente para agregados de drops por evento
+            models.Index(fields=['event', 'reward', 'quantity'], name='farm_drop_event_reward_qty'),
+        ]
+
     def __str__(self):
         return f"{self.reward.name} x{self.quantity} ({self.event.user.username})"
 
@@ -67,3 +82,112 @@ class FarmReward(models.Model):
     def __str__(self):
         return f"{self.name} ({self.get_rarity_display()}) - {self.source.name}"
 
+
+
+# -------------------------------
+# Rollups diarios (mantenidos por farm.rollups)
+# -------------------------------
+class FarmEventDailyRollup(models.Model):
+    """Número de eventos por juego, fuente, tipo y día."""
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='+')
+    source = models.ForeignKey(FarmSource, on_delete=models.CASCADE, related_name='+')
+    farm_type = models.CharField(max_length=20, choices=FarmSource.SOURCE_TYPES)
+    date = models.DateField()
+    event_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('game', 'source', 'farm_type', 'date')
+        indexes = [models.Index(fields=['game', 'date'], name='farm_evroll_game_date')]
+
+    def __str__(self):
+        return f"{self.source_id} {self.farm_type} ({self.date}): {self.event_count}"
+
+
+class FarmDropDailyRollup(models.Model):
+    """Totales de drops por juego, fuente, recompensa, tipo y día."""
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='+')
+    source = models.ForeignKey(FarmSource, on_delete=models.CASCADE, related_name='+')
+    reward = models.ForeignKey(FarmReward, on_delete=models.CASCADE, related_name='+')
+    farm_type = models.CharField(max_length=20, choices=FarmSource.SOURCE_TYPES)
+    date = models.DateField()
+    drop_count = models.PositiveIntegerField(default=0)
+    total_quantity = models.PositiveBigIntegerField(default=0)
+    sum_squares = models.PositiveBigIntegerField(default=0)
+    min_quantity = models.PositiveIntegerField(null=True)
+    max_quantity = models.PositiveIntegerField(null=True)
+    # Sketch KLL de las cantidades (farm.sketches), para mediana y percentiles
+    quantity_sketch = models.BinaryField(null=True)
+
+    class Meta:
+        unique_together = ('game', 'source', 'reward', 'farm_type', 'date')
+        indexes = [models.Index(fields=['game', 'date'], name='farm_droproll_game_date')]
+
+    def __str__(self):
+        return f"{self.reward_id} {self.farm_type} ({self.date}): {self.total_quantity}"
+
+
+# -------------------------------
+# Agregados de la comunidad (mantenidos por farm.community)
+# -------------------------------
+class CommunitySourceStats(models.Model):
+    """Eventos de todos los usuarios en una fuente."""
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='+')
+    source = models.OneToOneField(FarmSource, on_delete=models.CASCADE, related_name='+')
+    event_count = models.PositiveBigIntegerField(default=0)
+    # Eventos con al menos un drop, y con al menos un drop legendario
+    drop_events = models.PositiveBigIntegerField(default=0)
+    legendary_events = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.source_id}: {self.event_count}"
+
+
+class CommunityDropStats(models.Model):
+    """Drops de todos los usuarios de una recompensa (cada recompensa es de una sola fuente)."""
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='+')
+    source = models.ForeignKey(FarmSource, on_delete=models.CASCADE, related_name='+')
+    reward = models.OneToOneField(FarmReward, on_delete=models.CASCADE, related_name='+')
+    events_with_item = models.PositiveBigIntegerField(default=0)
+    drop_count = models.PositiveBigIntegerField(default=0)
+    total_quantity = models.PositiveBigIntegerField(default=0)
+    sum_squares = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.reward_id}: {self.events_with_item}"
+
+
+# -------------------------------
+# Rankings (mantenidos por farm.leaderboards)
+# -------------------------------
+class LeaderboardEntry(models.Model):
+    """Totales de un usuario en una fuente, o en todo el juego si ``source`` es nulo."""
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='+')
+    source = models.ForeignKey(FarmSource, on_delete=models.CASCADE, null=True, related_name='+')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    runs = models.PositiveIntegerField(default=0)
+    # Cantidad total de legendarios y eventos con al menos uno
+    legendary_drops = models.PositiveBigIntegerField(default=0)
+    legendary_events = models.PositiveIntegerField(default=0)
+    # Límite inferior de Wilson de legendary_events / runs (ver farm.leaderboards)
+    luck_score = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['game', 'source', 'user'], condition=models.Q(source__isnull=False),
+                name='leaderboard_source_user',
+            ),
+            models.UniqueConstraint(
+                fields=['game', 'user'], condition=models.Q(source__isnull=True),
+                name='leaderboard_game_user',
+            ),
+        ]
+        indexes = [
+            # Top-K y posición de un usuario en cada ranking
+            models.Index(fields=['game', 'source', '-runs'], name='leaderboard_runs'),
+            models.Index(fields=['game', 'source', '-legendary_drops'], name='leaderboard_legendary'),
+            models.Index(fields=['game', 'source', '-luck_score'], name='leaderboard_luck'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.source_id} ({self.game_id}): {self.runs}"
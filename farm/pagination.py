@@ -0,0 +1,94 @@
+"""
+Paginación por cursor (keyset) sobre (date, id).
+
+A diferencia de OFFSET, cada página filtra a partir de la última fila de la
+anterior, por lo que pedir la página siguiente cuesta O(tamaño de página)
+sin importar cuántos eventos tenga el usuario.
+"""
+import base64
+import binascii
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class DateIdCursorPagination(BasePagination):
+    """Orden estable (-date, -id); el cursor es opaco para el cliente."""
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Cursor inválido."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by("-date", "-id")
+        if position is not None:
+            last_date, last_id = position
+            queryset = queryset.filter(date__lte=last_date).filter(
+                Q(date__lt=last_date) | Q(date=last_date, id__lt=last_id)
+            )
+
+        # Se pide una fila extra para saber si hay página siguiente
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        self.next_position = (page[-1].date, page[-1].pk) if self.has_next else None
+        return page
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            value = int(raw)
+        except ValueError:
+            return self.page_size
+        if value <= 0:
+            return self.page_size
+        return min(value, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            raw_date, raw_id = raw.split("|")
+            return date.fromisoformat(raw_date), int(raw_id)
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        last_date, last_id = position
+        raw = f"{last_date.isoformat()}|{last_id}"
+        return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,126 @@
+"""
+Motor de percentiles por grupo.
+
+Calcula mediana y percentiles (interpolación lineal, como ``percentile_cont``)
+para todos los grupos de un queryset en una sola consulta:
+
+- PostgreSQL: ``PERCENTILE_CONT(f) WITHIN GROUP (ORDER BY valor)`` por fracción.
+- Otros motores (SQLite): una pasada ordenada por (grupo, valor) sobre el
+  histograma de valores, sin cargar todas las filas en memoria.
+"""
+from math import ceil, floor
+
+from django.db import connections
+from django.db.models import Aggregate, Count, FloatField
+
+
+class PercentileCont(Aggregate):
+    function = "PERCENTILE_CONT"
+    name = "PercentileCont"
+    output_field = FloatField()
+    template = "%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def parse_percentiles(raw):
+    """
+    Convierte "25,75,90" en [25.0, 75.0, 90.0].
+    Lanza ValueError si algún valor no es un número entre 0 y 100.
+    """
+    if not raw:
+        return []
+    values = []
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        value = float(part)
+        if not 0 <= value <= 100:
+            raise ValueError(part)
+        values.append(value)
+    return values
+
+
+def percentile_label(value):
+    """25.0 -> "p25", 99.5 -> "p99.5"."""
+    return f"p{value:g}"
+
+
+def group_percentiles(queryset, group_by, fractions, field="quantity"):
+    """
+    Devuelve {tupla de grupo: {fracción: valor}} para cada grupo de ``queryset``.
+    ``fractions`` son valores entre 0 y 1.
+    """
+    fractions = list(fractions)
+    if not fractions:
+        return {}
+
+    if connections[queryset.db].vendor == "postgresql":
+        annotations = {
+            f"percentile_{i}": PercentileCont(field, fraction)
+            for i, fraction in enumerate(fractions)
+        }
+        rows = queryset.order_by().values(*group_by).annotate(**annotations)
+        return {
+            tuple(row[g] for g in group_by): {
+                fraction: row[f"percentile_{i}"] for i, fraction in enumerate(fractions)
+            }
+            for row in rows
+        }
+
+    histogram_rows = (
+        queryset.order_by()
+        .values(*group_by, field)
+        .annotate(occurrences=Count("*"))
+        .order_by(*group_by, field)
+        .values_list(*group_by, field, "occurrences")
+        .iterator()
+    )
+
+    result = {}
+    current_key = None
+    histogram = []
+    for row in histogram_rows:
+        key = row[:len(group_by)]
+        if key != current_key:
+            if histogram:
+                result[current_key] = _histogram_percentiles(histogram, fractions)
+            current_key = key
+            histogram = []
+        histogram.append((row[-2], row[-1]))
+    if histogram:
+        result[current_key] = _histogram_percentiles(histogram, fractions)
+
+    return result
+
+
+def _histogram_percentiles(histogram, fractions):
+    """
+    Percentiles con interpolación lineal sobre un histograma ordenado
+    [(valor, ocurrencias), ...].
+    """
+    total = sum(count for _, count in histogram)
+    ranks = {}
+    for fraction in fractions:
+        position = fraction * (total - 1)
+        ranks[fraction] = (position, floor(position), ceil(position))
+
+    needed = sorted({r for _, low, high in ranks.values() for r in (low, high)})
+    values_at = {}
+    seen = 0
+    index = 0
+    for value, count in histogram:
+        seen += count
+        while index < len(needed) and needed[index] < seen:
+            values_at[needed[index]] = value
+            index += 1
+        if index == len(needed):
+            break
+
+    result = {}
+    for fraction, (position, low, high) in ranks.items():
+        low_value, high_value = values_at[low], values_at[high]
+        result[fraction] = float(low_value + (high_value - low_value) * (position - low))
+    return result
@@ -0,0 +1,78 @@
+"""
+Caché LRU en proceso para resolver recompensas.
+
+Mapea (source_id, nombre, rareza) -> reward_id para no consultar FarmReward
+en cada drop escrito. Las entradas solo se guardan cuando la transacción que
+las leyó o creó hace commit, y se invalidan al guardar o borrar un FarmReward
+(ver farm.signals).
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class RewardCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._keys_by_id = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            reward_id = self._entries.get(key)
+            if reward_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return reward_id
+
+    def put(self, key, reward_id):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._keys_by_id.pop(previous, None)
+            # El id pudo estar cacheado con otra clave (p. ej. tras renombrar la recompensa)
+            previous_key = self._keys_by_id.pop(reward_id, None)
+            if previous_key is not None:
+                self._entries.pop(previous_key, None)
+            self._entries[key] = reward_id
+            self._keys_by_id[reward_id] = key
+            while len(self._entries) > self.maxsize:
+                _, evicted = self._entries.popitem(last=False)
+                self._keys_by_id.pop(evicted, None)
+
+    def put_many(self, mapping):
+        for key, reward_id in mapping.items():
+            self.put(key, reward_id)
+
+    def invalidate(self, reward_id):
+        with self._lock:
+            key = self._keys_by_id.pop(reward_id, None)
+            if key is not None:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_id.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+            }
+
+
+reward_cache = RewardCache(getattr(settings, "FARM_REWARD_CACHE_SIZE", 4096))
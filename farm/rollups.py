@@ -0,0 +1,316 @@
+"""
+Rollups diarios de farmeo.
+
+Mantienen, por (juego, fuente, recompensa, tipo, día), los totales que
+necesita FarmStatsView para no re-agregar todos los FarmDrop del juego en
+cada petición, incluido un sketch de cuantiles de las cantidades
+(farm.sketches). Se actualizan al escribir eventos y pueden reconstruirse
+desde los datos crudos con ``manage.py rebuild_farm_rollups``.
+"""
+from collections import defaultdict
+from functools import reduce
+from itertools import groupby
+from math import sqrt
+from operator import itemgetter, or_
+
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Greatest, Least
+
+from . import sketches
+from .models import FarmDrop, FarmDropDailyRollup, FarmEvent, FarmEventDailyRollup
+
+DROP_KEY = ("game_id", "source_id", "reward_id", "farm_type", "date")
+
+
+def record_events(entries):
+    """
+    Suma a los rollups los eventos recién creados.
+    ``entries`` es un iterable de pares (evento, lista de drops).
+    """
+    event_counts = defaultdict(int)
+    drop_stats = {}
+    quantities = defaultdict(list)
+
+    for event, drops in entries:
+        key = (event.game_id, event.source_id, event.farm_type, event.date)
+        event_counts[key] += 1
+
+        for drop in drops:
+            drop_key = (event.game_id, event.source_id, drop.reward_id, event.farm_type, event.date)
+            quantities[drop_key].append(drop.quantity)
+            stats = drop_stats.get(drop_key)
+            if stats is None:
+                drop_stats[drop_key] = {
+                    "drop_count": 1,
+                    "total_quantity": drop.quantity,
+                    "sum_squares": drop.quantity * drop.quantity,
+                    "min_quantity": drop.quantity,
+                    "max_quantity": drop.quantity,
+                }
+            else:
+                stats["drop_count"] += 1
+                stats["total_quantity"] += drop.quantity
+                stats["sum_squares"] += drop.quantity * drop.quantity
+                stats["min_quantity"] = min(stats["min_quantity"], drop.quantity)
+                stats["max_quantity"] = max(stats["max_quantity"], drop.quantity)
+
+    # Orden fijo de claves para no bloquear filas en distinto orden entre transacciones
+    with transaction.atomic():
+        bulk_upsert(
+            FarmEventDailyRollup,
+            ("game_id", "source_id", "farm_type", "date"),
+            [
+                {"game_id": game_id, "source_id": source_id, "farm_type": farm_type, "date": date, "event_count": count}
+                for (game_id, source_id, farm_type, date), count in sorted(event_counts.items())
+            ],
+            {"event_count": "add"},
+        )
+        bulk_upsert(
+            FarmDropDailyRollup,
+            DROP_KEY,
+            [dict(zip(DROP_KEY, key), **stats) for key, stats in sorted(drop_stats.items())],
+            {
+                "drop_count": "add",
+                "total_quantity": "add",
+                "sum_squares": "add",
+                "min_quantity": "min",
+                "max_quantity": "max",
+            },
+        )
+        record_sketches(quantities)
+
+
+def record_sketches(quantities):
+    """
+    Añade ``quantities`` ({clave de rollup: [cantidades]}) a los sketches de
+    los rollups de drops, que ya existen. Las filas quedaron bloqueadas por el
+    UPDATE/INSERT anterior de la misma transacción: leer, combinar y escribir
+    no pierde cantidades de otras escrituras. Dos consultas en total.
+    """
+    if not quantities:
+        return
+    keys = reduce(or_, (Q(**dict(zip(DROP_KEY, key))) for key in sorted(quantities)))
+    rows = list(FarmDropDailyRollup.objects.filter(keys).only(*DROP_KEY, "quantity_sketch"))
+    for row in rows:
+        sketch = sketches.load(row.quantity_sketch)
+        sketch.extend(quantities[tuple(getattr(row, field) for field in DROP_KEY)])
+        row.quantity_sketch = sketch.to_bytes()
+    FarmDropDailyRollup.objects.bulk_update(rows, ["quantity_sketch"])
+
+
+_MERGE_EXPRESSIONS = {
+    "add": lambda field, value: F(field) + value,
+    "min": lambda field, value: Least(field, Value(value)),
+    "max": lambda field, value: Greatest(field, Value(value)),
+}
+
+
+def bulk_upsert(model, key_fields, rows, merge):
+    """
+    Inserta las filas ``rows`` (dicts por nombre de columna, p. ej. ``game_id``)
+    o, si ya existe su clave ``key_fields``, combina los campos de ``merge``
+    ({campo: "add" | "min" | "max"}) con los guardados. El resto de campos
+    solo se usan al insertar.
+
+    Una sentencia INSERT ... ON CONFLICT DO UPDATE por lote, con aritmética
+    sobre EXCLUDED; en bases sin esa sintaxis, un ``upsert`` por fila.
+    """
+    if not rows:
+        return
+    connection = connections[router.db_for_write(model)]
+    if connection.vendor not in ("postgresql", "sqlite"):
+        for row in rows:
+            key = {field: row[field] for field in key_fields}
+            increments = {field: _MERGE_EXPRESSIONS[how](field, row[field]) for field, how in merge.items()}
+            upsert(model, key, increments, {field: value for field, value in row.items() if field not in key})
+        return
+
+    by_attname = {field.attname: field for field in model._meta.concrete_fields}
+    fields = [by_attname[name] for name in rows[0]]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    # LEAST/GREATEST en PostgreSQL; en SQLite, MIN/MAX con varios argumentos
+    least, greatest = ("LEAST", "GREATEST") if connection.vendor == "postgresql" else ("MIN", "MAX")
+    templates = {
+        "add": "{table}.{column} + EXCLUDED.{column}",
+        "min": least + "({table}.{column}, EXCLUDED.{column})",
+        "max": greatest + "({table}.{column}, EXCLUDED.{column})",
+    }
+    assignments = ", ".join(
+        f"{quote(by_attname[name].column)} = "
+        + templates[how].format(table=table, column=quote(by_attname[name].column))
+        for name, how in merge.items()
+    )
+    sql = (
+        f"INSERT INTO {table} ({', '.join(quote(field.column) for field in fields)}) VALUES {{values}} "
+        f"ON CONFLICT ({', '.join(quote(by_attname[name].column) for name in key_fields)}) "
+        f"DO UPDATE SET {assignments}"
+    )
+    placeholder = f"({', '.join(['%s'] * len(fields))})"
+    batch_size = max(1, (connection.features.max_query_params or 65535) // len(fields))
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            params = [
+                field.get_db_prep_save(row[field.attname], connection)
+                for row in batch
+                for field in fields
+            ]
+            cursor.execute(sql.format(values=", ".join([placeholder] * len(batch))), params)
+
+
+def upsert(model, key, increments, initial):
+    """UPDATE con expresiones F y, si la fila no existe, INSERT (reintentando si otro la creó)."""
+    if model.objects.filter(**key).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **initial)
+    except IntegrityError:
+        model.objects.filter(**key).update(**increments)
+
+
+def rebuild(game_id=None, start_date=None, end_date=None, batch_size=1000):
+    """
+    Recalcula los rollups desde FarmEvent/FarmDrop para el alcance dado.
+    Devuelve el número de filas (eventos, drops) generadas.
+    """
+    events = FarmEvent.objects.all()
+    event_rollups = FarmEventDailyRollup.objects.all()
+    drop_rollups = FarmDropDailyRollup.objects.all()
+
+    if game_id is not None:
+        events = events.filter(game_id=game_id)
+        event_rollups = event_rollups.filter(game_id=game_id)
+        drop_rollups = drop_rollups.filter(game_id=game_id)
+    if start_date:
+        events = events.filter(date__gte=start_date)
+        event_rollups = event_rollups.filter(date__gte=start_date)
+        drop_rollups = drop_rollups.filter(date__gte=start_date)
+    if end_date:
+        events = events.filter(date__lte=end_date)
+        event_rollups = event_rollups.filter(date__lte=end_date)
+        drop_rollups = drop_rollups.filter(date__lte=end_date)
+
+    event_rows = (
+        FarmEventDailyRollup(event_count=row.pop("event_count"), **row)
+        for row in events.order_by()
+        .values("game_id", "source_id", "farm_type", "date")
+        .annotate(event_count=Count("id"))
+    )
+
+    # Una pasada ordenada por clave: los totales y el sketch salen de las mismas cantidades
+    drop_values = (
+        FarmDrop.objects.filter(event__in=events)
+        .order_by("event__game_id", "event__source_id", "reward_id", "event__farm_type", "event__date")
+        .values_list("event__game_id", "event__source_id", "reward_id", "event__farm_type", "event__date", "quantity")
+        .iterator(chunk_size=batch_size)
+    )
+    drop_rows = (
+        _drop_rollup(key, [quantity for *_, quantity in group])
+        for key, group in groupby(drop_values, key=itemgetter(0, 1, 2, 3, 4))
+    )
+
+    with transaction.atomic():
+        event_rollups.delete()
+        drop_rollups.delete()
+        n_events = bulk_insert(FarmEventDailyRollup, event_rows, batch_size)
+        n_drops = bulk_insert(FarmDropDailyRollup, drop_rows, batch_size)
+
+    return n_events, n_drops
+
+
+def _drop_rollup(key, quantities):
+    sketch = sketches.QuantileSketch()
+    sketch.extend(quantities)
+    return FarmDropDailyRollup(
+        **dict(zip(DROP_KEY, key)),
+        drop_count=len(quantities),
+        total_quantity=sum(quantities),
+        sum_squares=sum(quantity * quantity for quantity in quantities),
+        min_quantity=min(quantities),
+        max_quantity=max(quantities),
+        quantity_sketch=sketch.to_bytes(),
+    )
+
+
+def bulk_insert(model, rows, batch_size):
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        total += len(batch)
+    return total
+
+
+def filtered(game_id, farm_type=None, source_id=None, reward_id=None, start_date=None, end_date=None):
+    """Querysets de rollups de eventos y de drops con los filtros de FarmStatsView."""
+    event_rollups = FarmEventDailyRollup.objects.filter(game_id=game_id)
+    drop_rollups = FarmDropDailyRollup.objects.filter(game_id=game_id)
+
+    if farm_type:
+        event_rollups = event_rollups.filter(farm_type__iexact=farm_type)
+        drop_rollups = drop_rollups.filter(farm_type__iexact=farm_type)
+    if source_id:
+        event_rollups = event_rollups.filter(source_id=source_id)
+        drop_rollups = drop_rollups.filter(source_id=source_id)
+    if start_date:
+        event_rollups = event_rollups.filter(date__gte=start_date)
+        drop_rollups = drop_rollups.filter(date__gte=start_date)
+    if end_date:
+        event_rollups = event_rollups.filter(date__lte=end_date)
+        drop_rollups = drop_rollups.filter(date__lte=end_date)
+    if reward_id:
+        drop_rollups = drop_rollups.filter(reward_id=reward_id)
+    return event_rollups, drop_rollups
+
+
+def farm_stats(game_id, farm_type=None, source_id=None, reward_id=None, start_date=None, end_date=None):
+    """
+    Resumen y estadísticas por ítem (nombre + rareza) leídos de los rollups.
+    El coste depende del número de días del rango, no del número de drops.
+    """
+    event_rollups, drop_rollups = filtered(game_id, farm_type, source_id, reward_id, start_date, end_date)
+
+    total_events = event_rollups.aggregate(total=Sum("event_count"))["total"] or 0
+
+    rows = (
+        drop_rollups.values("reward__name", "reward__rarity")
+        .annotate(
+            total_quantity=Sum("total_quantity"),
+            drop_count=Sum("drop_count"),
+            sum_squares=Sum("sum_squares"),
+            min_quantity=Min("min_quantity"),
+            max_quantity=Max("max_quantity"),
+        )
+        .order_by("-total_quantity")
+    )
+
+    groups = []
+    total_drops = 0
+    drop_count = 0
+    for row in rows:
+        count = row["drop_count"]
+        mean = row["total_quantity"] / count
+        # Desviación estándar poblacional, igual que StdDev("quantity")
+        variance = max(row.pop("sum_squares") / count - mean * mean, 0)
+        row["avg_quantity"] = mean
+        row["stddev_quantity"] = sqrt(variance)
+        groups.append(row)
+        total_drops += row["total_quantity"]
+        drop_count += count
+
+    summary = {
+        "total_events": total_events,
+        "total_drops": total_drops,
+        "avg_drops": round(total_drops / drop_count, 2) if drop_count else 0,
+    }
+    return summary, groups
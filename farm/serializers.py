@@ -1,35 +1,44 @@
 from rest_framework import serializers
 from .models import FarmEvent, FarmDrop, FarmSource, Game, FarmReward
+from . import ingest
 
 
 class FarmDropSerializer(serializers.ModelSerializer):
-    reward_name = serializers.CharField(write_only=True)
-    rarity = serializers.CharField(write_only=True)
+    # Mismos límites que FarmReward: un ítem inválido da un 400 con su error, no un fallo al insertar
+    reward_name = serializers.CharField(write_only=True, max_length=FarmReward._meta.get_field('name').max_length)
+    rarity = serializers.ChoiceField(write_only=True, choices=FarmReward.RARITY_CHOICES)
 
     class Meta:
         model = FarmDrop
         fields = ['reward', 'reward_name', 'rarity', 'quantity']
         extra_kwargs = {'reward': {'read_only': True}}
 
-    def create(self, validated_data):
-        reward_name = validated_data.pop('reward_name')
-        rarity = validated_data.pop('rarity')
-        source = self.context['source']  # pasar source desde FarmEventSerializer
-
-        reward, created = FarmReward.objects.get_or_create(
-            name=reward_name,
-            rarity=rarity,
-            source=source
-        )
-        return FarmDrop.objects.create(reward=reward, **validated_data)
+class FarmSourceField(serializers.PrimaryKeyRelatedField):
+    """
+    PK de FarmSource. Si el contexto trae ``sources`` ({id: fuente}, p. ej. en
+    la carga masiva) se resuelve desde ahí sin consultar la base de datos.
+    """
+    def to_internal_value(self, data):
+        sources = self.context.get('sources')
+        if sources is None:
+            return super().to_internal_value(data)
+        try:
+            return sources[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
 
 class FarmEventSerializer(serializers.ModelSerializer):
+    source = FarmSourceField(queryset=FarmSource.objects.all())
     drops = FarmDropSerializer(many=True, required=False)
     total_drops = serializers.IntegerField(read_only=True)
+    drop_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = FarmEvent
-        fields = ['id', 'farm_type', 'source', 'date', 'drops', 'total_drops']
+        fields = ['id', 'farm_type', 'source', 'date', 'drops', 'total_drops', 'drop_count']
 
     def validate(self, data):
         game_id = (
@@ -43,7 +52,7 @@ class FarmEventSerializer(serializers.ModelSerializer):
         source = data.get('source')
 
         # Validar que la fuente pertenezca al mismo juego
-        if source.game.id != int(game_id):
+        if source.game_id != int(game_id):
             raise serializers.ValidationError(
                 f"La fuente '{source.name}' no pertenece al juego actual."
             )
@@ -51,17 +60,10 @@ class FarmEventSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        drops_data = validated_data.pop('drops', [])
-        event = FarmEvent.objects.create(**validated_data)
-
-        for drop_data in drops_data:
-            drop_serializer = FarmDropSerializer(
-                data=drop_data, context={'source': event.source}
-            )
-            drop_serializer.is_valid(raise_exception=True)
-            drop_serializer.save(event=event)
-
-        return event
+        # Misma ruta que la carga masiva: recompensas desde la caché y drops con bulk_create
+        user = validated_data.pop('user')
+        game = validated_data.pop('game')
+        return ingest.create_events(game, user, [validated_data])[0]
 
 class FarmRewardSerializer(serializers.ModelSerializer):
     rarity_display = serializers.CharField(source='get_rarity_display', read_only=True)
@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import community, ingest, versions
+from .models import FarmDrop, FarmEvent, FarmReward, FarmSource, Game
+from .reward_cache import reward_cache
+
+
+@receiver(post_save, sender=FarmReward)
+@receiver(post_delete, sender=FarmReward)
+def invalidate_reward_cache(sender, instance, **kwargs):
+    reward_cache.invalidate(instance.pk)
+
+
+def _catalog_game_id(instance):
+    """Juego al que pertenece una fuente o recompensa."""
+    if isinstance(instance, FarmSource):
+        return instance.game_id
+    if FarmReward.source.is_cached(instance):
+        return instance.source.game_id
+    return FarmSource.objects.filter(pk=instance.source_id).values_list("game_id", flat=True).first()
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+def bump_game_catalog_version(sender, instance, **kwargs):
+    # La lista de juegos usa el token global; las fuentes del juego, el suyo
+    versions.bump(catalog=True, catalog_game_ids=[instance.pk])
+
+
+@receiver(pre_save, sender=FarmSource)
+@receiver(pre_save, sender=FarmReward)
+def remember_catalog_game(sender, instance, **kwargs):
+    # Si la fuente o recompensa cambia de juego, el catálogo anterior también cambia
+    instance._previous_catalog_game_id = None
+    if not instance._state.adding:
+        field = "game_id" if sender is FarmSource else "source__game_id"
+        stored = sender.objects.filter(pk=instance.pk).values_list(field, flat=True)
+        instance._previous_catalog_game_id = stored.first()
+
+
+@receiver(post_save, sender=FarmSource)
+@receiver(post_delete, sender=FarmSource)
+@receiver(post_save, sender=FarmReward)
+@receiver(post_delete, sender=FarmReward)
+def bump_catalog_version(sender, instance, origin=None, **kwargs):
+    # En un borrado en cascada desde la fuente o el juego ya avisa su propia señal
+    origin_model = getattr(origin, "model", type(origin))
+    if origin is not None and origin_model is not sender:
+        return
+    game_ids = {_catalog_game_id(instance), getattr(instance, "_previous_catalog_game_id", None)}
+    versions.bump(catalog_game_ids=game_ids - {None})
+
+
+# bulk_create no emite señales: farm.ingest.record_written cambia las versiones por su cuenta
+@receiver(post_save, sender=FarmEvent)
+@receiver(post_delete, sender=FarmEvent)
+def bump_event_versions(sender, instance, created=False, **kwargs):
+    # Solo se añaden eventos con created=True; el resto reescribe el juego
+    rewritten = [] if created else [instance.game_id]
+    versions.bump(game_ids=[instance.game_id], user_ids=[instance.user_id], rewritten_game_ids=rewritten)
+
+
+@receiver(post_save, sender=FarmDrop)
+@receiver(post_delete, sender=FarmDrop)
+def bump_drop_versions(sender, instance, origin=None, **kwargs):
+    # En un borrado en cascada desde el evento (o su usuario/juego) ya avisa la señal del evento
+    origin_model = getattr(origin, "model", type(origin))
+    if origin is not None and origin_model not in (FarmDrop, FarmReward):
+        return
+
+    if FarmDrop.event.is_cached(instance):
+        owners = [(instance.event.game_id, instance.event.user_id)]
+    else:
+        owners = FarmEvent.objects.filter(pk=instance.event_id).values_list("game_id", "user_id")
+    for game_id, user_id in owners:
+        versions.bump(game_ids=[game_id], user_ids=[user_id], rewritten_game_ids=[game_id])
+
+
+# Borrar un usuario o una fuente borra sus eventos en cascada sin pasar por
+# FarmEventViewSet: se leen antes y se descuentan de los agregados después
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+@receiver(pre_delete, sender=FarmSource)
+def collect_cascaded_events(sender, instance, origin=None, **kwargs):
+    # Al borrar un juego desaparecen también todos sus agregados
+    if isinstance(origin, Game) or getattr(origin, "model", None) is Game:
+        return
+    owner = "source" if sender is FarmSource else "user"
+    entries = ingest.removed_entries(FarmEvent.objects.filter(**{owner: instance}))
+    # Las recompensas de una fuente ya no existen después del borrado
+    instance._removed_farm_entries = (entries, community.legendary_rewards(entries))
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=FarmSource)
+def record_cascaded_events(sender, instance, **kwargs):
+    entries, legendary = getattr(instance, "_removed_farm_entries", ((), set()))
+    if entries:
+        ingest.record_removed(entries, legendary)
@@ -0,0 +1,131 @@
+"""
+Caché de respuestas para los endpoints de estadísticas.
+
+La clave combina la vista, los parámetros normalizados y los tokens de
+versión (farm.versions) del juego o del usuario. Cuando se escribe un
+evento cambian los tokens y las entradas anteriores dejan de usarse solas,
+por lo que nunca se sirve una respuesta obsoleta.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from . import versions
+
+KEY_PREFIX = "farm:stats"
+_views = set()
+
+
+def normalize_params(query_params):
+    """Parámetros ordenados, sin espacios sobrantes y sin valores vacíos."""
+    normalized = []
+    for name in sorted(query_params.keys()):
+        values = sorted(value.strip() for value in query_params.getlist(name) if value.strip())
+        if values:
+            normalized.append([name, values])
+    return normalized
+
+
+def is_global(query_params):
+    return (query_params.get("scope") or "").strip().lower() == "global"
+
+
+def scope_pairs(scopes, user_id, query_params, kwargs):
+    """(ámbito, id) de los contadores de versión de los que depende la respuesta."""
+    pairs = []
+    for scope in scopes:
+        if scope == "game":
+            pairs.append(("game", kwargs.get("game_id") or query_params.get("game_id")))
+        elif scope == "user":
+            pairs.append(("user", user_id))
+        elif scope == "catalog":
+            # Fuentes y recompensas dependen del catálogo de su juego; la lista de juegos, del global
+            pairs.append(("catalog", kwargs.get("game_id") or kwargs.get("game_pk") or versions.CATALOG))
+        elif scope == "audience":
+            # Datos del usuario o, con ?scope=global, de toda la comunidad del juego
+            game_id = kwargs.get("game_id") or query_params.get("game_id")
+            if is_global(query_params):
+                pairs.append(("game", game_id))
+            else:
+                pairs.append(("user", user_id))
+            # ?itemID=all lista además las recompensas de la fuente, que puede crear cualquiera
+            if (query_params.get("itemID") or "").strip().lower() == "all":
+                pairs.append(("catalog", game_id))
+        else:
+            raise ValueError(f"Ámbito de versión desconocido: {scope}")
+    return pairs
+
+
+def cached_stats(*scopes):
+    """Decora el ``get`` de una APIView de estadísticas."""
+    def decorator(handler):
+        view_name = handler.__qualname__.split(".")[0]
+        _views.add(view_name)
+
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            if not getattr(settings, "FARM_STATS_CACHE_ENABLED", True):
+                return handler(view, request, *args, **kwargs)
+
+            pairs = scope_pairs(scopes, request.user.pk, request.query_params, kwargs)
+            key = cache_key(view_name, pairs, kwargs, request.query_params)
+
+            data = lookup(view_name, key)
+            if data is not None:
+                return Response(data)
+
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                store(key, response.data)
+            return response
+
+        return wrapper
+    return decorator
+
+
+def cache_key(view_name, pairs, kwargs, query_params):
+    payload = json.dumps(
+        [pairs, versions.get_versions(pairs), kwargs, normalize_params(query_params)],
+        sort_keys=True, default=str,
+    )
+    return f"{KEY_PREFIX}:{view_name}:{hashlib.sha1(payload.encode()).hexdigest()}"
+
+
+def lookup(view_name, key):
+    """Datos cacheados bajo ``key`` (o None), contando el acierto o fallo."""
+    data = cache.get(key)
+    _count(view_name, "hits" if data is not None else "misses")
+    return data
+
+
+def store(key, data):
+    cache.set(key, data, getattr(settings, "FARM_STATS_CACHE_TIMEOUT", 300))
+
+
+def _count(view_name, kind):
+    key = f"{KEY_PREFIX}:{kind}:{view_name}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def hit_ratios():
+    """{vista: {"hits", "misses", "hit_ratio"}} de todas las vistas cacheadas."""
+    report = {}
+    for view_name in sorted(_views):
+        counts = cache.get_many([f"{KEY_PREFIX}:hits:{view_name}", f"{KEY_PREFIX}:misses:{view_name}"])
+        hits = counts.get(f"{KEY_PREFIX}:hits:{view_name}", 0)
+        misses = counts.get(f"{KEY_PREFIX}:misses:{view_name}", 0)
+        total = hits + misses
+        report[view_name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else 0,
+        }
+    return report
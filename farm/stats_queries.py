@@ -0,0 +1,639 @@
+"""
+Consultas de los endpoints de estadísticas.
+
+Cada clase valida los parámetros de la petición y separa el cálculo en
+partes independientes (``parts``: nombre -> función sin argumentos que hace
+una consulta). Las vistas síncronas las ejecutan en orden con ``run``; las
+asíncronas (farm.async_views) las lanzan a la vez. ``payload`` arma la
+respuesta con los resultados, igual en ambos casos.
+"""
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Avg, Count, Max, Min, Q, Sum
+
+from . import cube, intervals, percentiles, rollups, sketches, stats_cache, timeseries
+from .models import CommunityDropStats, CommunitySourceStats, FarmDrop, FarmEvent, FarmReward
+
+RARITIES = [rarity for rarity, _ in FarmReward.RARITY_CHOICES]
+
+NO_EVENTS = {
+    "message": "No hay eventos registrados para esta fuente.",
+    "drop_rate": 0
+}
+
+
+def run(parts):
+    """Ejecuta las partes una tras otra."""
+    return {name: part() for name, part in parts.items()}
+
+
+def parse_date(raw):
+    """Fecha YYYY-MM-DD opcional; ValueError si no es válida."""
+    return datetime.date.fromisoformat(raw.strip()) if raw and raw.strip() else None
+
+
+class SeriesParams:
+    """Parámetros comunes de las series: bucket, max_points y rango de fechas."""
+
+    fields = ("events", "total_drops", "drops")
+
+    def parse_series(self, query_params, start_param, end_param):
+        try:
+            self.bucket = timeseries.parse_bucket(query_params.get("bucket"))
+            self.max_points = timeseries.parse_max_points(query_params.get("max_points"))
+            self.start = parse_date(query_params.get(start_param))
+            self.end = parse_date(query_params.get(end_param))
+        except ValueError:
+            return (
+                "bucket debe ser day, week o month; max_points un entero entre 2 y "
+                f"{timeseries.MAX_POINTS_LIMIT}; y las fechas YYYY-MM-DD."
+            )
+        # Si el rango es conocido, la base de datos agrupa ya al tamaño final
+        self.query_bucket = timeseries.choose_bucket(self.start, self.end, self.bucket, self.max_points)
+        return None
+
+    def series_payload(self, rows):
+        bucket, step, points = timeseries.build_series(
+            rows, self.query_bucket, self.max_points, self.start, self.end, fields=self.fields
+        )
+        return {
+            "bucket": bucket,
+            "step": step,
+            "points": [
+                {
+                    "start": point["start"],
+                    "events": point["events"],
+                    "total_drops": point["total_drops"],
+                    "avg_drops": round(point["total_drops"] / point["drops"], 2) if point["drops"] else 0,
+                }
+                for point in points
+            ],
+        }
+
+
+def summary_aggregates(drop_filter=None, rarities=()):
+    """
+    Agregados de resumen para un queryset de FarmEvent, calculados en una sola
+    sentencia (``aggregate(**...)`` o ``values(...).annotate(**...)``):
+
+    - events_total / quantity_total / drops_total: eventos, cantidad total y
+      número de drops
+    - events_matched / quantity_matched / drops_matched: lo mismo, solo para
+      los drops que cumplen ``drop_filter`` (un Q sobre ``drops__...``)
+    - events_<rareza>: eventos con algún drop de esa rareza (y del filtro)
+
+    Sin filtro de drops ni rarezas se usan las columnas desnormalizadas
+    total_drops / drop_count y no hace falta el JOIN con FarmDrop.
+    """
+    if drop_filter is None and not rarities:
+        return {
+            "events_total": Count("id"),
+            "quantity_total": Sum("total_drops"),
+            "drops_total": Sum("drop_count"),
+            "events_matched": Count("id", filter=Q(drop_count__gt=0)),
+            "quantity_matched": Sum("total_drops"),
+            "drops_matched": Sum("drop_count"),
+        }
+
+    # Con JOIN cada evento aparece una vez por drop: los conteos de eventos son DISTINCT
+    matched = drop_filter if drop_filter is not None else Q(drops__isnull=False)
+    aggregates = {
+        "events_total": Count("id", distinct=True),
+        "quantity_total": Sum("drops__quantity"),
+        "drops_total": Count("drops"),
+        "events_matched": Count("id", distinct=True, filter=matched),
+        "quantity_matched": Sum("drops__quantity", filter=matched),
+        "drops_matched": Count("drops", filter=matched),
+    }
+    for rarity in rarities:
+        aggregates[f"events_{rarity}"] = Count(
+            "id", distinct=True, filter=matched & Q(drops__reward__rarity=rarity)
+        )
+    return aggregates
+
+
+# -----------------------------
+# Estadísticas personales por juego
+# -----------------------------
+class UserStats:
+    view_name = "UserStatsView"
+    scope = "user"
+
+    def __init__(self, user, query_params, kwargs):
+        self.user = user
+        self.game_id = query_params.get("game_id")
+        self.source_name = query_params.get("source")  # nombre del jefe/dominio
+        self.item_name = query_params.get("item")       # nombre del ítem
+        self.start_date = query_params.get("start_date")
+        self.end_date = query_params.get("end_date")
+        self.error = None if self.game_id else "Debe especificar un game_id."
+
+    def parts(self):
+        # --- Filtrar eventos base ---
+        events = FarmEvent.objects.filter(user=self.user, game__id=self.game_id)
+
+        if self.source_name:
+            events = events.filter(source__name__iexact=self.source_name)  # búsqueda por nombre
+
+        # --- Filtro por fecha (rango inclusivo) ---
+        if self.start_date:
+            events = events.filter(date__gte=self.start_date)
+        if self.end_date:
+            events = events.filter(date__lte=self.end_date)
+
+        # --- Drops relacionados (solo de los eventos filtrados) ---
+        drops = FarmDrop.objects.filter(event__in=events)
+        drop_filter = None
+
+        if self.item_name:
+            drops = drops.filter(reward__name__iexact=self.item_name)
+            drop_filter = Q(drops__reward__name__iexact=self.item_name)
+
+        # --- Agrupar por ítem ---
+        drops_grouped = (
+            drops.values("reward__name", "reward__rarity")
+            .annotate(
+                total_quantity=Sum("quantity"),
+                avg_quantity=Avg("quantity"),
+                min_quantity=Min("quantity"),
+                max_quantity=Max("quantity"),
+                drop_count=Count("id"),
+            )
+            .order_by("-total_quantity")
+        )
+
+        # --- Resumen, distribución por tipo y por día en una sola consulta ---
+        summary = (
+            events.values("date", "source__name", "farm_type")
+            .annotate(**summary_aggregates(drop_filter))
+            .order_by()
+        )
+
+        return {
+            "summary": lambda: list(summary),
+            "drops": lambda: list(drops_grouped),
+        }
+
+    def payload(self, results):
+        total_events = total_drops = drop_rows = 0
+        by_type = defaultdict(int)
+        by_day = defaultdict(lambda: [0, 0])
+
+        for row in results["summary"]:
+            total_events += row["events_total"]
+            total_drops += row["quantity_matched"] or 0
+            drop_rows += row["drops_matched"] or 0
+            by_type[(row["source__name"], row["farm_type"])] += row["events_total"]
+            day = by_day[row["date"]]
+            day[0] += row["quantity_total"] or 0
+            day[1] += row["drops_total"] or 0
+
+        return {
+            "user": self.user.username,
+            "game_id": self.game_id,
+            "filters": {
+                "source": self.source_name,
+                "item": self.item_name,
+                "start_date": self.start_date,
+                "end_date": self.end_date,
+            },
+            "summary": {
+                "total_events": total_events,
+                "total_drops": total_drops,
+                "avg_drops": round(total_drops / drop_rows, 2) if drop_rows else 0,
+            },
+            "drops": results["drops"],
+            # --- Distribución por tipo (JEFE, DOMINIO, etc.) ---
+            "by_type": [
+                {"source__name": source_name, "farm_type": farm_type, "count": count}
+                for (source_name, farm_type), count in sorted(by_type.items())
+            ],
+            # --- Promedio de drops por día ---
+            "by_day": [
+                {"date": date, "avg_drops": quantity / drops if drops else None}
+                for date, (quantity, drops) in sorted(by_day.items())
+            ],
+        }
+
+
+class UserSeries(SeriesParams):
+    """Serie temporal de eventos y drops del usuario (FarmEvent.total_drops)."""
+    view_name = "UserStatsSeriesView"
+    scope = "user"
+
+    def __init__(self, user, query_params, kwargs):
+        self.user = user
+        self.game_id = query_params.get("game_id")
+        self.source_name = query_params.get("source")
+        self.item_name = query_params.get("item")
+        self.error = (
+            self.parse_series(query_params, "start_date", "end_date")
+            or (None if self.game_id else "Debe especificar un game_id.")
+        )
+
+    def parts(self):
+        events = FarmEvent.objects.filter(user=self.user, game__id=self.game_id)
+        if self.source_name:
+            events = events.filter(source__name__iexact=self.source_name)
+        if self.start:
+            events = events.filter(date__gte=self.start)
+        if self.end:
+            events = events.filter(date__lte=self.end)
+        drop_filter = Q(drops__reward__name__iexact=self.item_name) if self.item_name else None
+
+        rows = (
+            events.annotate(bucket=timeseries.trunc(self.query_bucket))
+            .values("bucket")
+            .annotate(**summary_aggregates(drop_filter))
+            .order_by()
+        )
+        return {
+            "rows": lambda: [
+                {
+                    "bucket": row["bucket"],
+                    "events": row["events_total"],
+                    "total_drops": row["quantity_matched"],
+                    "drops": row["drops_matched"],
+                }
+                for row in rows
+            ],
+        }
+
+    def payload(self, results):
+        return dict(
+            {
+                "user": self.user.username,
+                "game_id": self.game_id,
+                "filters": {
+                    "source": self.source_name,
+                    "item": self.item_name,
+                    "start_date": self.start,
+                    "end_date": self.end,
+                },
+            },
+            **self.series_payload(results["rows"]),
+        )
+
+
+# --------------------
+# Probabilidad de drop
+# --------------------
+class DropRateStats:
+    view_name = "DropRateStatsView"
+    # Versión del usuario o, con ?scope=global, del juego (farm.stats_cache)
+    scope = "audience"
+
+    def __init__(self, user, query_params, kwargs):
+        self.user = user
+        self.game_id = kwargs["game_id"]
+        self.source_id = query_params.get("sourceID")
+        self.item_id = query_params.get("itemID")
+        # ?itemID=all: tabla con todas las recompensas de la fuente
+        self.batch = (self.item_id or "").strip().lower() == "all"
+        # ?scope=global: toda la comunidad, desde los agregados de farm.community
+        self.community = stats_cache.is_global(query_params)
+        self.error = None if self.source_id else "Se requiere el parámetro sourceID."
+        if (query_params.get("scope") or "user").strip().lower() not in ("user", "global"):
+            self.error = self.error or "scope debe ser user o global."
+        elif self.community and not self.source_id.isdigit():
+            self.error = self.error or "sourceID debe ser un entero."
+        elif self.community and self.item_id and not self.batch and not self.item_id.isdigit():
+            self.error = self.error or "itemID debe ser un entero o all."
+        try:
+            self.confidence = intervals.parse_confidence(query_params.get("confidence"))
+        except ValueError:
+            self.error = self.error or "confidence debe ser un número entre 0 y 1."
+
+    def parts(self):
+        if self.community:
+            return self.community_parts()
+
+        # Eventos del usuario para esa fuente
+        events = FarmEvent.objects.filter(
+            user=self.user, game__id=self.game_id, source__id=self.source_id
+        )
+
+        if self.batch:
+            # Una sola consulta agrupada por recompensa para toda la tabla
+            by_reward = (
+                FarmDrop.objects.filter(
+                    event__user=self.user, event__game__id=self.game_id, event__source__id=self.source_id
+                )
+                .values("reward_id")
+                .annotate(
+                    events_with_item=Count("event", distinct=True),
+                    total_quantity=Sum("quantity"),
+                    drop_count=Count("id"),
+                )
+                .order_by()
+            )
+            rewards = FarmReward.objects.filter(source__id=self.source_id).order_by("id")
+            return {
+                "total_events": events.count,
+                "by_reward": lambda: list(by_reward),
+                "rewards": lambda: list(rewards.values("id", "name", "rarity")),
+            }
+
+        # Drops que cuentan: los del ítem (si se especifica) o cualquiera
+        drop_filter = Q(drops__reward__id=self.item_id) if self.item_id else None
+
+        # Total de eventos, eventos con el ítem y eventos por rareza en una consulta
+        return {
+            "summary": lambda: events.aggregate(**summary_aggregates(drop_filter, rarities=RARITIES)),
+        }
+
+    def community_parts(self):
+        """Una fila por fuente y por recompensa: no depende del número de eventos."""
+        source = CommunitySourceStats.objects.filter(game_id=self.game_id, source_id=self.source_id)
+        parts = {"source": lambda: source.values("event_count", "drop_events").first()}
+        fields = ("events_with_item", "drop_count", "total_quantity", "sum_squares")
+        if self.batch:
+            rewards = FarmReward.objects.filter(source__id=self.source_id).order_by("id")
+            drop_stats = CommunityDropStats.objects.filter(source_id=self.source_id)
+            parts["by_reward"] = lambda: list(drop_stats.values("reward_id", *fields))
+            parts["rewards"] = lambda: list(rewards.values("id", "name", "rarity"))
+        elif self.item_id:
+            item = CommunityDropStats.objects.filter(source_id=self.source_id, reward_id=self.item_id)
+            parts["item"] = lambda: item.values(*fields).first()
+        return parts
+
+    def payload(self, results):
+        if self.community:
+            return self.community_payload(results)
+        if self.batch:
+            return self.batch_payload(results)
+
+        summary = results["summary"]
+        total_events = summary["events_total"]
+        if total_events == 0:
+            return dict(NO_EVENTS)
+
+        # Número de eventos únicos donde cayó ese ítem
+        events_with_item = summary["events_matched"]
+
+        # Drop rate base
+        drop_rate = events_with_item / total_events if total_events else 0
+
+        # --- Drop rate por rareza ---
+        drop_rate_by_rarity = [
+            {
+                "rarity": rarity,
+                "drop_rate": round(summary[f"events_{rarity}"] / total_events, 3)
+            }
+            for rarity in RARITIES
+            if summary[f"events_{rarity}"]
+        ]
+
+        return {
+            "game_id": self.game_id,
+            "source_id": self.source_id,
+            "item_id": self.item_id,
+            "total_events": total_events,
+            "events_with_item": events_with_item,
+            "drop_rate": round(drop_rate, 3),
+            "drop_rate_by_rarity": drop_rate_by_rarity
+        }
+
+    def batch_payload(self, results):
+        total_events = results["total_events"]
+        if total_events == 0:
+            return dict(NO_EVENTS)
+
+        by_reward = {row["reward_id"]: row for row in results["by_reward"]}
+        empty = {"events_with_item": 0, "total_quantity": 0, "drop_count": 0}
+        rows = [by_reward.get(reward["id"], empty) for reward in results["rewards"]]
+        bounds = intervals.wilson_intervals(
+            [row["events_with_item"] for row in rows], total_events, self.confidence
+        )
+
+        data = {
+            "game_id": self.game_id,
+            "source_id": self.source_id,
+            "item_id": "all",
+            "total_events": total_events,
+            "confidence": self.confidence,
+            "rewards": [
+                {
+                    "reward_id": reward["id"],
+                    "name": reward["name"],
+                    "rarity": reward["rarity"],
+                    "events_with_item": row["events_with_item"],
+                    "drop_rate": round(row["events_with_item"] / total_events, 3),
+                    "mean_quantity": round(row["total_quantity"] / row["drop_count"], 3) if row["drop_count"] else 0,
+                    "ci_low": round(low, 3),
+                    "ci_high": round(high, 3),
+                }
+                for reward, row, (low, high) in zip(results["rewards"], rows, bounds)
+            ],
+        }
+        if self.community:
+            data["scope"] = "global"
+            for reward, row in zip(data["rewards"], rows):
+                reward["stddev_quantity"] = quantity_stddev(row)
+        return data
+
+    def community_payload(self, results):
+        source = results["source"]
+        total_events = source["event_count"] if source else 0
+        if self.batch:
+            return self.batch_payload(dict(results, total_events=total_events))
+        if total_events == 0:
+            return dict(NO_EVENTS)
+
+        data = {
+            "game_id": self.game_id,
+            "source_id": self.source_id,
+            "item_id": self.item_id,
+            "scope": "global",
+            "total_events": total_events,
+        }
+        if not self.item_id:
+            # Sin itemID: eventos con algún drop (no hay desglose por rareza)
+            data["events_with_item"] = source["drop_events"]
+            data["drop_rate"] = round(source["drop_events"] / total_events, 3)
+            return data
+
+        row = results["item"] or {"events_with_item": 0, "drop_count": 0, "total_quantity": 0, "sum_squares": 0}
+        data.update({
+            "events_with_item": row["events_with_item"],
+            "drop_rate": round(row["events_with_item"] / total_events, 3),
+            "drop_count": row["drop_count"],
+            "mean_quantity": round(row["total_quantity"] / row["drop_count"], 3) if row["drop_count"] else 0,
+            "stddev_quantity": quantity_stddev(row),
+        })
+        return data
+
+
+def quantity_stddev(row):
+    """Desviación típica poblacional de la cantidad a partir de las sumas de CommunityDropStats."""
+    count = row["drop_count"]
+    if not count:
+        return 0
+    mean = row["total_quantity"] / count
+    return round(max(row["sum_squares"] / count - mean * mean, 0) ** 0.5, 3)
+
+
+# -------------------------------
+# Estadísticas generales de farmeo
+# -------------------------------
+class FarmStats:
+    view_name = "FarmStatsView"
+    scope = "game"
+
+    def __init__(self, user, query_params, kwargs):
+        self.game_id = kwargs["game_id"]
+        self.type_filter = query_params.get("type")          # tipo de farmevent
+        self.source_id = query_params.get("sourceID")        # ID de jefe/fuente
+        self.item_id = query_params.get("itemID")            # ID de ítem
+        self.error = None
+        try:
+            self.start_date = parse_date(query_params.get("startDate"))  # YYYY-MM-DD
+            self.end_date = parse_date(query_params.get("endDate"))      # YYYY-MM-DD
+        except ValueError:
+            self.start_date = self.end_date = None
+            self.error = "startDate y endDate deben ser fechas YYYY-MM-DD."
+        try:
+            self.requested = percentiles.parse_percentiles(query_params.get("percentiles"))
+        except ValueError:
+            self.requested = []
+            self.error = self.error or "percentiles debe ser una lista de números entre 0 y 100."
+
+    def parts(self):
+        # Drops crudos (solo para mediana y percentiles)
+        events = FarmEvent.objects.filter(game__id=self.game_id)
+        if self.type_filter:
+            events = events.filter(farm_type__iexact=self.type_filter)
+        if self.source_id:
+            events = events.filter(source__id=self.source_id)
+        if self.start_date:
+            events = events.filter(date__gte=self.start_date)
+        if self.end_date:
+            events = events.filter(date__lte=self.end_date)
+
+        drops = FarmDrop.objects.filter(event__in=events)
+        if self.item_id:
+            drops = drops.filter(reward__id=self.item_id)
+
+        # Mediana y percentiles de todos los ítems en una sola consulta
+        fractions = [0.5] + [value / 100 for value in self.requested]
+
+        if cube.enabled():
+            # Todo desde el cubo en memoria del proceso, sin consultas de agregación
+            return {"cube": lambda: cube.farm_stats(
+                self.game_id,
+                fractions,
+                farm_type=self.type_filter,
+                source_id=self.source_id,
+                reward_id=self.item_id,
+                start_date=self.start_date,
+                end_date=self.end_date,
+            )}
+
+        filters = dict(
+            farm_type=self.type_filter,
+            source_id=self.source_id,
+            reward_id=self.item_id,
+            start_date=self.start_date,
+            end_date=self.end_date,
+        )
+        exact = lambda: percentiles.group_percentiles(drops, ("reward__name", "reward__rarity"), fractions)
+        if getattr(settings, "FARM_PERCENTILES_ENGINE", "sketch") == "exact":
+            by_group = exact
+        else:
+            # Sketches diarios combinados: no lee FarmDrop, error de rango acotado
+            _, drop_rollups = rollups.filtered(self.game_id, **filters)
+
+            def by_group():
+                quantiles = sketches.group_quantiles(
+                    drop_rollups.values_list("reward__name", "reward__rarity", "quantity_sketch").iterator(),
+                    fractions,
+                )
+                # Algún rollup sin sketch (p. ej. escrito antes de tenerlos): motor exacto
+                return exact() if quantiles is None else quantiles
+
+        return {
+            # Estadísticas generales y por ítem desde los rollups diarios
+            "rollups": lambda: rollups.farm_stats(self.game_id, **filters),
+            "percentiles": by_group,
+        }
+
+    def payload(self, results):
+        if "cube" in results:
+            summary, drops_grouped, by_group = results["cube"]
+        else:
+            summary, drops_grouped = results["rollups"]
+            by_group = results["percentiles"]
+
+        for g in drops_grouped:
+            values = by_group.get((g["reward__name"], g["reward__rarity"]), {})
+            g["median_quantity"] = values.get(0.5, 0)
+            if self.requested:
+                g["percentiles"] = {
+                    percentiles.percentile_label(value): values.get(value / 100, 0)
+                    for value in self.requested
+                }
+
+        return {
+            "game_id": self.game_id,
+            "filters": {
+                "type": self.type_filter,
+                "sourceID": self.source_id,
+                "itemID": self.item_id,
+                "date_range": [self.start_date, self.end_date],
+                "percentiles": self.requested,
+            },
+            "summary": summary,
+            "drops": drops_grouped
+        }
+
+
+class FarmSeries(SeriesParams):
+    """Serie temporal global del juego, leída de los rollups diarios."""
+    view_name = "FarmStatsSeriesView"
+    scope = "game"
+
+    def __init__(self, user, query_params, kwargs):
+        self.game_id = kwargs["game_id"]
+        self.type_filter = query_params.get("type")
+        self.source_id = query_params.get("sourceID")
+        self.item_id = query_params.get("itemID")
+        self.error = self.parse_series(query_params, "startDate", "endDate")
+
+    def parts(self):
+        event_rollups, drop_rollups = rollups.filtered(
+            self.game_id,
+            farm_type=self.type_filter,
+            source_id=self.source_id,
+            reward_id=self.item_id,
+            start_date=self.start,
+            end_date=self.end,
+        )
+        bucket = timeseries.trunc(self.query_bucket)
+        events = (
+            event_rollups.annotate(bucket=bucket).values("bucket")
+            .annotate(events=Sum("event_count")).order_by()
+        )
+        drops = (
+            drop_rollups.annotate(bucket=bucket).values("bucket")
+            .annotate(total_drops=Sum("total_quantity"), drops=Sum("drop_count")).order_by()
+        )
+        return {
+            "events": lambda: list(events),
+            "drops": lambda: list(drops),
+        }
+
+    def payload(self, results):
+        return dict(
+            {
+                "game_id": self.game_id,
+                "filters": {
+                    "type": self.type_filter,
+                    "sourceID": self.source_id,
+                    "itemID": self.item_id,
+                    "date_range": [self.start, self.end],
+                },
+            },
+            **self.series_payload(results["events"] + results["drops"]),
+        )
@@ -0,0 +1,181 @@
+"""
+Generador de datos sintéticos para pruebas de carga y benchmarks.
+
+Todo sale de un ``random.Random(seed)``: con la misma semilla y los mismos
+parámetros se obtiene exactamente el mismo conjunto de datos. Los eventos y
+drops se insertan con ``bulk_create`` por lotes y con ``total_drops`` /
+``drop_count`` ya calculados; al terminar se reconstruyen los agregados
+derivados (rollups) de los juegos afectados.
+"""
+import datetime
+import random
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from . import leaderboards, rollups, versions
+from .models import FarmDrop, FarmEvent, FarmReward, FarmSource, Game
+
+PREFIX = "synth"
+
+# Probabilidad de cada rareza por drop y rango de cantidades
+RARITY_WEIGHTS = {"COMUN": 0.60, "RARO": 0.28, "EPICO": 0.10, "LEGENDARIO": 0.02}
+QUANTITY_RANGES = {"COMUN": (1, 5), "RARO": (1, 3), "EPICO": (1, 2), "LEGENDARIO": (1, 1)}
+SOURCE_TYPES = [choice for choice, _ in FarmSource.SOURCE_TYPES]
+# Último día de los eventos: fijo para que el conjunto no dependa de cuándo se genera
+DEFAULT_END_DATE = datetime.date(2025, 6, 30)
+
+
+class Dataset:
+    """Catálogo y usuarios sobre los que se generan eventos."""
+
+    def __init__(self, seed, user_ids, sources, start_date, days):
+        self.rng = random.Random(seed)
+        self.user_ids = user_ids
+        # [(source, {rareza: [reward_id]})]
+        self.sources = sources
+        self.start_date = start_date
+        self.days = days
+        # Actividad sesgada: pocos usuarios y fuentes concentran muchos eventos
+        self.user_weights = [1 / (rank + 1) for rank in range(len(user_ids))]
+        self.source_weights = [1 / (rank + 1) ** 0.5 for rank in range(len(sources))]
+
+    @property
+    def game_ids(self):
+        return sorted({source.game_id for source, _ in self.sources})
+
+
+def create_catalog(users=50, games=2, sources_per_game=10, rewards_per_source=12,
+                   seed=42, days=365, end_date=DEFAULT_END_DATE):
+    """Crea (o reutiliza) usuarios, juegos, fuentes y recompensas sintéticos."""
+    rng = random.Random(seed)
+    User = get_user_model()
+    password = make_password(f"{PREFIX}-password")
+
+    User.objects.bulk_create([
+        User(username=f"{PREFIX}_user_{i:05d}", email=f"{PREFIX}_user_{i:05d}@example.com", password=password)
+        for i in range(users)
+    ], ignore_conflicts=True)
+    user_ids = list(
+        User.objects.filter(username__startswith=f"{PREFIX}_user_")
+        .order_by("username").values_list("id", flat=True)[:users]
+    )
+
+    Game.objects.bulk_create(
+        [Game(name=f"{PREFIX} game {g}") for g in range(games)], ignore_conflicts=True
+    )
+    game_list = list(Game.objects.filter(name__startswith=f"{PREFIX} game ").order_by("name")[:games])
+
+    FarmSource.objects.bulk_create([
+        FarmSource(
+            name=f"{PREFIX} source {s}",
+            location=f"Zona {s % 5}",
+            source_type=SOURCE_TYPES[s % len(SOURCE_TYPES)],
+            game=game,
+        )
+        for game in game_list
+        for s in range(sources_per_game)
+    ], ignore_conflicts=True)
+    source_list = list(
+        FarmSource.objects.filter(game__in=game_list, name__startswith=f"{PREFIX} source ")
+        .order_by("game_id", "id")
+    )
+
+    rarities = list(RARITY_WEIGHTS)
+    FarmReward.objects.bulk_create([
+        FarmReward(name=f"{PREFIX} reward {r}", rarity=rarities[r % len(rarities)], source=source)
+        for source in source_list
+        for r in range(rewards_per_source)
+    ], ignore_conflicts=True)
+
+    rewards = {}
+    for reward_id, source_id, rarity in FarmReward.objects.filter(
+        source__in=source_list, name__startswith=f"{PREFIX} reward "
+    ).order_by("id").values_list("id", "source_id", "rarity"):
+        rewards.setdefault(source_id, {}).setdefault(rarity, []).append(reward_id)
+
+    rng.shuffle(user_ids)
+    return Dataset(
+        seed=rng.random(),
+        user_ids=user_ids,
+        sources=[(source, rewards.get(source.id, {})) for source in source_list],
+        start_date=end_date - datetime.timedelta(days=days - 1),
+        days=days,
+    )
+
+
+@contextmanager
+def _explicit_event_dates():
+    """Desactiva temporalmente ``auto_now_add`` de FarmEvent.date."""
+    field = FarmEvent._meta.get_field("date")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def _random_drops(rng, rewards):
+    drops = []
+    rarities = [rarity for rarity in RARITY_WEIGHTS if rewards.get(rarity)]
+    if not rarities:
+        return drops
+    weights = [RARITY_WEIGHTS[rarity] for rarity in rarities]
+    for rarity in rng.choices(rarities, weights, k=rng.randint(1, 4)):
+        low, high = QUANTITY_RANGES[rarity]
+        drops.append((rng.choice(rewards[rarity]), rng.randint(low, high)))
+    return drops
+
+
+def generate_events(dataset, count, batch_size=5000, progress=None):
+    """Inserta ``count`` eventos (y sus drops) por lotes. Devuelve (eventos, drops)."""
+    rng = dataset.rng
+    n_events = n_drops = 0
+    with _explicit_event_dates():
+        while n_events < count:
+            size = min(batch_size, count - n_events)
+            users = rng.choices(dataset.user_ids, dataset.user_weights, k=size)
+            picked = rng.choices(dataset.sources, dataset.source_weights, k=size)
+
+            events, drops_per_event = [], []
+            for user_id, (source, rewards) in zip(users, picked):
+                drops = _random_drops(rng, rewards)
+                events.append(FarmEvent(
+                    user_id=user_id,
+                    game_id=source.game_id,
+                    source_id=source.id,
+                    farm_type=source.source_type,
+                    date=dataset.start_date + datetime.timedelta(days=rng.randrange(dataset.days)),
+                    total_drops=sum(quantity for _, quantity in drops),
+                    drop_count=len(drops),
+                ))
+                drops_per_event.append(drops)
+
+            with transaction.atomic():
+                FarmEvent.objects.bulk_create(events, batch_size=batch_size)
+                drops = [
+                    FarmDrop(event_id=event.id, reward_id=reward_id, quantity=quantity)
+                    for event, event_drops in zip(events, drops_per_event)
+                    for reward_id, quantity in event_drops
+                ]
+                FarmDrop.objects.bulk_create(drops, batch_size=batch_size)
+
+            n_events += size
+            n_drops += len(drops)
+            if progress:
+                progress(n_events, n_drops)
+    return n_events, n_drops
+
+
+def rebuild_derived(game_ids):
+    """Recalcula los agregados derivados tras una carga con bulk_create."""
+    for game_id in game_ids:
+        rollups.rebuild(game_id=game_id)
+        leaderboards.rebuild(game_id=game_id)
+    versions.bump(game_ids=game_ids, catalog=True, catalog_game_ids=game_ids)
+    User = get_user_model()
+    versions.bump(user_ids=User.objects.filter(
+        username__startswith=f"{PREFIX}_user_"
+    ).values_list("id", flat=True))
@@ -42,8 +42,8 @@ class FarmEventViewSetIntegrationTest(APITestCase):
 
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["farm_type"], "DOMINIO")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["farm_type"], "DOMINIO")
 
     def test_cannot_create_event_without_auth(self):
         self.client.logout()
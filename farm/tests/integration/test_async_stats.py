@@ -0,0 +1,99 @@
+from asgiref.sync import SyncToAsync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from farm import ingest
+from farm.models import FarmSource, Game
+
+User = get_user_model()
+
+
+class AsyncStatsTestMixin:
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.client = APIClient()
+        self.token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.source = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        ingest.create_events(self.game, self.user, [
+            {"farm_type": "JEFE", "source": self.source, "drops": [
+                {"reward_name": "Gema", "rarity": "EPICO", "quantity": quantity},
+                {"reward_name": "Pieza", "rarity": "RARO", "quantity": 1},
+            ]}
+            for quantity in (1, 2, 5)
+        ])
+
+    def endpoints(self):
+        game_id = self.game.id
+        return [
+            ("user-stats", {}, {"game_id": game_id, "source": "jefe"}),
+            ("farm-stats", {"game_id": game_id}, {"percentiles": "25,75"}),
+            ("drop-rate-stats", {"game_id": game_id}, {"sourceID": self.source.id}),
+            ("user-stats-series", {}, {"game_id": game_id, "bucket": "week"}),
+            ("farm-stats-series", {"game_id": game_id}, {"max_points": 10}),
+        ]
+
+    def test_same_payload_as_sync_views(self):
+        # Usuario autenticado ya en caché para ambas vistas (users.authentication)
+        self.client.get(reverse("user-stats"))
+        for name, kwargs, params in self.endpoints():
+            with self.subTest(name), override_settings(FARM_STATS_CACHE_ENABLED=False):
+                expected = self.client.get(reverse(name, kwargs=kwargs), params)
+                response = self.client.get(reverse(f"{name}-async", kwargs=kwargs), params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.json(), expected.json())
+                self.assertEqual(response["ETag"], expected["ETag"])
+                # Las consultas de los hilos también se cuentan
+                self.assertEqual(response.query_stats.count, expected.query_stats.count)
+
+    @override_settings(FARM_STATS_CACHE_ENABLED=False)
+    async def test_instrumented_under_asgi(self):
+        # Bajo ASGI el middleware de instrumentación corre en modo asíncrono
+        kwargs = {"game_id": self.game.id}
+        await sync_to_async(self.client.get)(reverse("user-stats"))
+        expected = await sync_to_async(self.client.get)(reverse("farm-stats", kwargs=kwargs))
+        response = await AsyncClient().get(
+            reverse("farm-stats-async", kwargs=kwargs), headers={"Authorization": f"Bearer {self.token}"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.query_stats.count, expected.query_stats.count)
+        self.assertIn(f'desc="{expected.query_stats.count} queries"', response["Server-Timing"])
+        # Cadena ASGI sin pasar a un hilo: ningún middleware la fuerza a síncrona
+        self.assertNotIsInstance(ASGIHandler()._middleware_chain, SyncToAsync)
+
+    def test_errors(self):
+        url = reverse("drop-rate-stats-async", kwargs={"game_id": self.game.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {"error": "Se requiere el parámetro sourceID."})
+        self.assertFalse(response.has_header("ETag"))
+
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+        self.client.credentials()
+        self.assertEqual(self.client.get(url, {"sourceID": self.source.id}).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer invalido")
+        self.assertEqual(self.client.get(url, {"sourceID": self.source.id}).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cache_and_etag_shared_with_sync_views(self):
+        kwargs = {"game_id": self.game.id}
+        etag = self.client.get(reverse("farm-stats", kwargs=kwargs))["ETag"]
+        response = self.client.get(reverse("farm-stats-async", kwargs=kwargs), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class ConcurrentAsyncStatsTest(AsyncStatsTestMixin, TransactionTestCase):
+    """Las partes corren en otros hilos (otras conexiones): los datos deben estar confirmados."""
+
+
+@override_settings(FARM_ASYNC_STATS_CONCURRENT=False)
+class SequentialAsyncStatsTest(AsyncStatsTestMixin, TestCase):
+    pass
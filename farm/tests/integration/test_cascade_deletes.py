@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from farm import ingest, leaderboards, rollups
+from farm.models import FarmDropDailyRollup, FarmEventDailyRollup, FarmSource, Game, LeaderboardEntry
+
+User = get_user_model()
+
+
+def snapshot(model, *fields):
+    return sorted(tuple(value or 0 for value in row) for row in model.objects.values_list(*fields))
+
+
+class CascadeDeleteTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.other = User.objects.create_user(username="player2", email="p2@correo.com", password="secret123")
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.boss = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        self.chest = FarmSource.objects.create(name="Cofre", location="Liyue", source_type="COFRE", game=self.game)
+        self.stats_url = reverse("farm-stats", kwargs={"game_id": self.game.id})
+
+    def farm(self, user, source, drops, times=1):
+        ingest.create_events(self.game, user, [
+            {"farm_type": source.source_type, "source": source, "drops": list(drops)} for _ in range(times)
+        ])
+
+    def delete_account(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.delete(reverse("users:profile"), {"password": "secret123"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_deleted_user_leaves_the_stats(self):
+        self.farm(self.user, self.boss, [{"reward_name": "Gema", "rarity": "EPICO", "quantity": 4}], times=3)
+        self.farm(self.user, self.chest, [{"reward_name": "Espada", "rarity": "LEGENDARIO", "quantity": 1}])
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(self.stats_url).data["summary"]["total_events"], 4)
+
+        self.delete_account(self.user)
+        self.assertFalse(FarmEventDailyRollup.objects.exists())
+        self.assertFalse(FarmDropDailyRollup.objects.exists())
+        self.assertFalse(LeaderboardEntry.objects.exists())
+
+        self.client.force_authenticate(self.other)
+        data = self.client.get(self.stats_url).data
+        self.assertEqual(data["summary"]["total_events"], 0)
+        self.assertEqual(data["drops"], [])
+
+    def test_totals_match_rebuild_after_deletes(self):
+        self.farm(self.user, self.boss, [{"reward_name": "Gema", "rarity": "EPICO", "quantity": 4}], times=3)
+        self.farm(self.other, self.boss, [{"reward_name": "Espada", "rarity": "LEGENDARIO", "quantity": 1}])
+        self.farm(self.other, self.chest, [{"reward_name": "Espada", "rarity": "LEGENDARIO", "quantity": 2}], times=2)
+
+        self.delete_account(self.user)
+        self.chest.delete()
+
+        fields = ("source_id", "user_id", "runs", "legendary_drops", "legendary_events")
+        entries = snapshot(LeaderboardEntry, *fields)
+        # Solo queda el evento de player2 en el jefe: 1 partida con legendario (también en el total del juego)
+        self.assertEqual(entries, [(0, self.other.id, 1, 1, 1), (self.boss.id, self.other.id, 1, 1, 1)])
+        leaderboards.rebuild(game_id=self.game.id)
+        self.assertEqual(snapshot(LeaderboardEntry, *fields), entries)
+
+        self.assertEqual(rollups.farm_stats(self.game.id)[0]["total_events"], 1)
@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from farm import catalog
+from farm.models import FarmReward, FarmSource, Game
+from farm.serializers import FarmSourceSerializer
+
+User = get_user_model()
+
+
+class CatalogSnapshotTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        catalog.clear()
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.client.force_authenticate(self.user)
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.boss = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        self.domain = FarmSource.objects.create(
+            name="Dominio", location="Liyue", source_type="DOMINIO_TALENTOS", game=self.game
+        )
+        FarmReward.objects.create(name="Gema", rarity="EPICO", source=self.boss)
+        FarmReward.objects.create(name="Libro", rarity="RARO", source=self.domain)
+        self.url = reverse("farm-source-list", kwargs={"game_pk": self.game.id})
+
+    def get(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_list_matches_serializer_and_skips_database(self):
+        expected = FarmSourceSerializer(FarmSource.objects.filter(game=self.game), many=True).data
+        first, queries = self.get(self.url)
+        self.assertGreater(queries, 0)
+        self.assertEqual(first, expected)
+
+        second, queries = self.get(self.url)
+        self.assertEqual(queries, 0)
+        self.assertEqual(second, expected)
+
+    def test_source_type_filter_in_memory(self):
+        self.get(self.url)
+        for source_type, names in [("jefe", ["Jefe"]), ("dominio", ["Dominio"]), ("otro", [])]:
+            data, queries = self.get(self.url, {"source_type": source_type})
+            self.assertEqual(queries, 0)
+            self.assertEqual([source["name"] for source in data], names)
+
+    def test_retrieve(self):
+        url = reverse("farm-source-detail", kwargs={"game_pk": self.game.id, "pk": self.domain.id})
+        self.get(self.url)
+        data, queries = self.get(url)
+        self.assertEqual(queries, 0)
+        self.assertEqual(data["name"], "Dominio")
+
+        other_game = Game.objects.create(name="Honkai")
+        url = reverse("farm-source-detail", kwargs={"game_pk": other_game.id, "pk": self.domain.id})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rebuilt_after_catalog_change(self):
+        self.get(self.url)
+        FarmReward.objects.create(name="Corona", rarity="LEGENDARIO", source=self.boss)
+        data, queries = self.get(self.url, {"source_type": "jefe"})
+        self.assertGreater(queries, 0)
+        self.assertEqual(len(data[0]["rewards"]), 2)
+
+        self.domain.delete()
+        data, _ = self.get(self.url)
+        self.assertEqual([source["name"] for source in data], ["Jefe"])
+
+    def test_other_games_keep_their_snapshot(self):
+        first, _ = self.get(self.url)
+        other_game = Game.objects.create(name="Honkai")
+        FarmSource.objects.create(name="Jefe", location="Belobog", source_type="JEFE", game=other_game)
+        data, queries = self.get(self.url)
+        self.assertEqual(queries, 0)
+        self.assertEqual(data, first)
+
+        # Mover una fuente de juego cambia el catálogo de los dos
+        self.domain.game = other_game
+        self.domain.save()
+        data, _ = self.get(self.url)
+        self.assertEqual([source["name"] for source in data], ["Jefe"])
+
+    @override_settings(FARM_CATALOG_MAX_GAMES=1)
+    def test_snapshots_are_bounded(self):
+        other_game = Game.objects.create(name="Honkai")
+        self.get(self.url)
+        self.get(reverse("farm-source-list", kwargs={"game_pk": other_game.id}))
+        self.assertEqual(list(catalog._snapshots), [other_game.id])
+        _, queries = self.get(self.url)
+        self.assertGreater(queries, 0)
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from farm.models import FarmReward, FarmSource, Game
+
+User = get_user_model()
+
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.client.force_authenticate(self.user)
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.source = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        FarmReward.objects.create(name="Gema", rarity="EPICO", source=self.source)
+
+    def revalidate(self, url, etag, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {}, HTTP_IF_NONE_MATCH=etag)
+        return response, len(ctx.captured_queries)
+
+    def test_catalog_endpoints(self):
+        urls = [
+            reverse("games-list"),
+            reverse("games-detail", kwargs={"pk": self.game.id}),
+            reverse("farm-source-list", kwargs={"game_pk": self.game.id}),
+            reverse("farm-source-rewards", kwargs={"game_id": self.game.id, "source_id": self.source.id}),
+        ]
+        for url in urls:
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, status.HTTP_200_OK)
+            etag = first["ETag"]
+
+            response, queries = self.revalidate(url, etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, url)
+            self.assertEqual(queries, 0)
+            self.assertEqual(response["ETag"], etag)
+
+    def test_catalog_change_and_params_change_etag(self):
+        url = reverse("farm-source-list", kwargs={"game_pk": self.game.id})
+        etag = self.client.get(url)["ETag"]
+
+        self.assertEqual(self.revalidate(url, etag, {"source_type": "jefe"})[0].status_code, status.HTTP_200_OK)
+
+        FarmReward.objects.create(name="Corona", rarity="LEGENDARIO", source=self.source)
+        response, _ = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()[0]["rewards"]), 2)
+
+    def test_stats_etag_follows_writes(self):
+        url = reverse("farm-stats", kwargs={"game_id": self.game.id})
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.revalidate(url, etag)[0].status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.post(reverse("farm-event-list", kwargs={"game_pk": self.game.id}), {
+            "farm_type": "JEFE",
+            "source": self.source.id,
+            "drops": [{"reward_name": "Gema", "rarity": "EPICO", "quantity": 1}],
+        }, format="json")
+        response, _ = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["summary"]["total_events"], 1)
+
+    def test_user_stats_etag_is_per_user(self):
+        url = reverse("drop-rate-stats", kwargs={"game_id": self.game.id})
+        etag = self.client.get(url, {"sourceID": self.source.id})["ETag"]
+
+        other = User.objects.create_user(username="player2", email="p2@correo.com", password="secret123")
+        self.client.force_authenticate(other)
+        response, _ = self.revalidate(url, etag, {"sourceID": self.source.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Authorization", response["Vary"])
+
+    def test_errors_have_no_etag(self):
+        response = self.client.get(reverse("drop-rate-stats", kwargs={"game_id": self.game.id}))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(response.has_header("ETag"))
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from farm import ingest
+from farm.models import FarmReward, FarmSource, Game
+
+User = get_user_model()
+
+
+class DropRateBatchTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.client.force_authenticate(self.user)
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.source = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        self.never = FarmReward.objects.create(name="Corona", rarity="LEGENDARIO", source=self.source)
+        ingest.create_events(self.game, self.user, [
+            {"farm_type": "JEFE", "source": self.source, "drops": drops}
+            for drops in [
+                [{"reward_name": "Gema", "rarity": "EPICO", "quantity": 1},
+                 {"reward_name": "Gema", "rarity": "EPICO", "quantity": 3}],
+                [{"reward_name": "Gema", "rarity": "EPICO", "quantity": 2}],
+                [{"reward_name": "Pieza", "rarity": "RARO", "quantity": 1}],
+                [],
+            ]
+        ])
+        self.url = reverse("drop-rate-stats", kwargs={"game_id": self.game.id})
+
+    def test_table_for_every_reward(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {"sourceID": self.source.id, "itemID": "all"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_events"], 4)
+        rewards = {row["name"]: row for row in response.data["rewards"]}
+        self.assertEqual(set(rewards), {"Corona", "Gema", "Pieza"})
+
+        gema = rewards["Gema"]
+        self.assertEqual(gema["events_with_item"], 2)
+        self.assertEqual(gema["drop_rate"], 0.5)
+        self.assertEqual(gema["mean_quantity"], 2)
+        self.assertLess(gema["ci_low"], 0.5)
+        self.assertGreater(gema["ci_high"], 0.5)
+
+        corona = rewards["Corona"]
+        self.assertEqual((corona["events_with_item"], corona["drop_rate"], corona["ci_low"]), (0, 0, 0))
+        self.assertGreater(corona["ci_high"], 0)
+
+        # Igual que la consulta de un solo ítem
+        single = self.client.get(self.url, {"sourceID": self.source.id, "itemID": self.never.id})
+        self.assertEqual(single.data["drop_rate"], corona["drop_rate"])
+
+    def test_confidence(self):
+        narrow = self.client.get(self.url, {"sourceID": self.source.id, "itemID": "all", "confidence": "0.5"})
+        wide = self.client.get(self.url, {"sourceID": self.source.id, "itemID": "all"})
+        self.assertEqual(narrow.data["confidence"], 0.5)
+        self.assertGreater(narrow.data["rewards"][1]["ci_low"], wide.data["rewards"][1]["ci_low"])
+
+        response = self.client.get(self.url, {"sourceID": self.source.id, "itemID": "all", "confidence": "2"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_no_events(self):
+        other = User.objects.create_user(username="player2", email="p2@correo.com", password="secret123")
+        self.client.force_authenticate(other)
+        response = self.client.get(self.url, {"sourceID": self.source.id, "itemID": "all"})
+        self.assertEqual(response.data, {"message": "No hay eventos registrados para esta fuente.", "drop_rate": 0})
+
+    def test_new_reward_from_another_user_changes_etag(self):
+        params = {"sourceID": self.source.id, "itemID": "all"}
+        first = self.client.get(self.url, params)
+        self.assertEqual(self.client.get(self.url, params, HTTP_IF_NONE_MATCH=first["ETag"]).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+        other = User.objects.create_user(username="player2", email="p2@correo.com", password="secret123")
+        ingest.create_events(self.game, other, [
+            {"farm_type": "JEFE", "source": self.source, "drops": [{"reward_name": "Tiara", "rarity": "RARO"}]},
+        ])
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Tiara", {row["name"] for row in response.data["rewards"]})
@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from farm import community, ingest
+from farm.models import CommunityDropStats, CommunitySourceStats, FarmEvent, FarmReward, FarmSource, Game
+
+User = get_user_model()
+
+
+class DropRateGlobalTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.other = User.objects.create_user(username="player2", email="p2@correo.com", password="secret123")
+        self.client.force_authenticate(self.user)
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.source = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        self.never = FarmReward.objects.create(name="Corona", rarity="LEGENDARIO", source=self.source)
+        self.farm(self.user, [
+            [{"reward_name": "Gema", "rarity": "EPICO", "quantity": 1},
+             {"reward_name": "Gema", "rarity": "EPICO", "quantity": 3}],
+            [{"reward_name": "Pieza", "rarity": "RARO", "quantity": 1}],
+        ])
+        self.farm(self.other, [
+            [{"reward_name": "Gema", "rarity": "EPICO", "quantity": 2}],
+            [],
+        ])
+        self.gema = FarmReward.objects.get(name="Gema")
+        self.url = reverse("drop-rate-stats", kwargs={"game_id": self.game.id})
+
+    def farm(self, user, drop_lists):
+        ingest.create_events(self.game, user, [
+            {"farm_type": "JEFE", "source": self.source, "drops": drops} for drops in drop_lists
+        ])
+
+    def get(self, **params):
+        return self.client.get(self.url, dict(params, sourceID=self.source.id, scope="global"))
+
+    def test_single_item(self):
+        with self.assertNumQueries(2):
+            response = self.get(itemID=self.gema.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data
+        self.assertEqual((data["total_events"], data["events_with_item"], data["drop_count"]), (4, 2, 3))
+        self.assertEqual(data["drop_rate"], 0.5)
+        self.assertEqual(data["mean_quantity"], 2)
+        self.assertEqual(data["stddev_quantity"], round((2 / 3) ** 0.5, 3))
+
+        # Sin itemID: eventos con algún drop
+        self.assertEqual(self.get().data["events_with_item"], 3)
+        # El modo personal sigue viendo solo los eventos del usuario
+        personal = self.client.get(self.url, {"sourceID": self.source.id, "itemID": self.gema.id})
+        self.assertEqual((personal.data["total_events"], personal.data["drop_rate"]), (2, 0.5))
+
+    def test_table_matches_personal_shape(self):
+        response = self.get(itemID="all")
+        rewards = {row["name"]: row for row in response.data["rewards"]}
+        self.assertEqual(response.data["total_events"], 4)
+        self.assertEqual(rewards["Gema"]["events_with_item"], 2)
+        self.assertEqual(rewards["Corona"]["drop_rate"], 0)
+        self.assertEqual(rewards["Pieza"]["stddev_quantity"], 0)
+
+    def test_other_users_writes_invalidate_cache(self):
+        first = self.get(itemID=self.gema.id)
+        self.farm(self.other, [[{"reward_name": "Gema", "rarity": "EPICO", "quantity": 6}]])
+        second = self.get(itemID=self.gema.id)
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        self.assertEqual(second.data["events_with_item"], 3)
+
+    def test_delete_and_rebuild(self):
+        event = FarmEvent.objects.filter(user=self.user, drop_count=2).get()
+        url = reverse("farm-event-detail", kwargs={"game_pk": self.game.id, "pk": event.id})
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_204_NO_CONTENT)
+        row = CommunityDropStats.objects.get(reward=self.gema)
+        self.assertEqual((row.events_with_item, row.drop_count, row.total_quantity, row.sum_squares), (1, 1, 2, 4))
+
+        fields = ("reward_id", "events_with_item", "drop_count", "total_quantity", "sum_squares")
+        incremental = sorted(CommunityDropStats.objects.values_list(*fields))
+        community.rebuild(game_id=self.game.id)
+        self.assertEqual(sorted(CommunityDropStats.objects.values_list(*fields)), incremental)
+
+    def test_deleted_user_leaves_global_counters(self):
+        self.client.force_authenticate(self.other)
+        response = self.client.delete(reverse("users:profile"), {"password": "secret123"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.client.force_authenticate(self.user)
+        data = self.get(itemID=self.gema.id).data
+        self.assertEqual((data["total_events"], data["events_with_item"], data["drop_count"]), (2, 1, 2))
+        self.assertEqual(data["mean_quantity"], 2)
+
+        fields = ("reward_id", "events_with_item", "drop_count", "total_quantity", "sum_squares")
+        incremental = sorted(CommunityDropStats.objects.values_list(*fields))
+        sources = sorted(CommunitySourceStats.objects.values_list("source_id", "event_count", "drop_events"))
+        community.rebuild(game_id=self.game.id)
+        self.assertEqual(sorted(CommunityDropStats.objects.values_list(*fields)), incremental)
+        self.assertEqual(sorted(CommunitySourceStats.objects.values_list("source_id", "event_count", "drop_events")), sources)
+
+    def test_errors(self):
+        self.assertEqual(self.get(itemID="gema").status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {"sourceID": self.source.id, "scope": "todos"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
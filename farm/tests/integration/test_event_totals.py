@@ -0,0 +1,73 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from farm.models import FarmDrop, FarmEvent, FarmReward, FarmSource, Game
+
+User = get_user_model()
+
+
+class FarmEventTotalsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.client.force_authenticate(self.user)
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.source = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        self.events_url = reverse("farm-event-list", kwargs={"game_pk": self.game.id})
+        self.history_url = reverse("farm-history", kwargs={"game_id": self.game.id})
+
+    def post_events(self, n):
+        for _ in range(n):
+            response = self.client.post(self.events_url, {
+                "farm_type": "JEFE",
+                "source": self.source.id,
+                "drops": [
+                    {"reward_name": "Gema", "rarity": "EPICO", "quantity": 2},
+                    {"reward_name": "Núcleo", "rarity": "RARO", "quantity": 3},
+                ],
+            }, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_totals_are_stored_on_write(self):
+        self.post_events(1)
+        event = FarmEvent.objects.get()
+        self.assertEqual((event.total_drops, event.drop_count), (5, 2))
+
+        response = self.client.get(self.events_url)
+        self.assertEqual(response.data["results"][0]["total_drops"], 5)
+        self.assertEqual(response.data["results"][0]["drop_count"], 2)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), len(response.data["results"])
+
+    def test_listing_queries_do_not_grow_with_page_size(self):
+        self.post_events(1)
+        single = self.count_queries(self.events_url)
+        single_history = self.count_queries(self.history_url)
+
+        self.post_events(9)
+        self.assertEqual(self.count_queries(self.events_url), (single[0], 10))
+        self.assertEqual(self.count_queries(self.history_url), (single_history[0], 10))
+
+    def test_backfill_command(self):
+        event = FarmEvent.objects.create(user=self.user, farm_type="JEFE", source=self.source, game=self.game)
+        reward = FarmReward.objects.create(name="Gema", rarity="EPICO", source=self.source)
+        FarmDrop.objects.create(event=event, reward=reward, quantity=4)
+        FarmDrop.objects.create(event=event, reward=reward, quantity=1)
+        empty = FarmEvent.objects.create(user=self.user, farm_type="JEFE", source=self.source, game=self.game)
+
+        call_command("backfill_event_totals", batch_size=1, stdout=StringIO())
+
+        event.refresh_from_db()
+        empty.refresh_from_db()
+        self.assertEqual((event.total_drops, event.drop_count), (5, 2))
+        self.assertEqual((empty.total_drops, empty.drop_count), (0, 0))
@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from farm.models import FarmDrop, FarmDropDailyRollup, FarmEvent, FarmEventDailyRollup, FarmReward, FarmSource, Game
+
+User = get_user_model()
+
+
+class FarmBulkIngestTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.client.force_authenticate(self.user)
+
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.source = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        other_game = Game.objects.create(name="Honkai")
+        self.foreign_source = FarmSource.objects.create(
+            name="Jefe", location="Otro", source_type="JEFE", game=other_game
+        )
+        FarmReward.objects.create(name="Gema", rarity="EPICO", source=self.source)
+
+        self.url = reverse("farm-event-bulk", kwargs={"game_pk": self.game.id})
+
+    def event(self, *drops, source=None):
+        return {
+            "farm_type": "JEFE",
+            "source": (source or self.source).id,
+            "drops": [{"reward_name": name, "rarity": rarity, "quantity": qty} for name, rarity, qty in drops],
+        }
+
+    def test_creates_events_and_drops(self):
+        payload = [self.event(("Gema", "EPICO", 2), ("Núcleo", "RARO", 3)) for _ in range(5)]
+        response = self.client.post(self.url, {"events": payload}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data["created"], 5)
+        self.assertEqual([r["status"] for r in response.data["results"]], ["created"] * 5)
+        self.assertEqual(FarmEvent.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(FarmDrop.objects.count(), 10)
+        self.assertEqual(FarmReward.objects.filter(source=self.source).count(), 2)
+
+        self.assertEqual(FarmEventDailyRollup.objects.get().event_count, 5)
+        gema = FarmDropDailyRollup.objects.get(reward__name="Gema")
+        self.assertEqual((gema.drop_count, gema.total_quantity), (5, 10))
+
+    def test_reports_per_item_errors(self):
+        payload = [
+            self.event(("Gema", "EPICO", 1)),
+            self.event(("Gema", "EPICO", 1), source=self.foreign_source),
+            {"farm_type": "JEFE"},
+            self.event(),
+        ]
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual((response.data["created"], response.data["failed"]), (2, 2))
+        statuses = [(r["index"], r["status"]) for r in response.data["results"]]
+        self.assertEqual(statuses, [(0, "created"), (1, "error"), (2, "error"), (3, "created")])
+        self.assertIn("source", response.data["results"][2]["errors"])
+        self.assertEqual(FarmEvent.objects.count(), 2)
+
+    def test_invalid_drops_are_per_item_errors(self):
+        payload = [
+            self.event(("Gema", "EPICO", 1)),
+            self.event(("Gema", "MITICO", 1)),
+            self.event(("G" * 151, "RARO", 1)),
+        ]
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        results = response.data["results"]
+        self.assertEqual([r["status"] for r in results], ["created", "error", "error"])
+        self.assertIn("rarity", results[1]["errors"]["drops"][0])
+        self.assertIn("reward_name", results[2]["errors"]["drops"][0])
+        self.assertFalse(FarmReward.objects.filter(rarity="MITICO").exists())
+
+    def test_all_invalid(self):
+        response = self.client.post(self.url, [{"farm_type": "JEFE"}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(FarmEvent.objects.count(), 0)
+
+    @override_settings(FARM_BULK_MAX_EVENTS=3)
+    def test_batch_limit(self):
+        response = self.client.post(self.url, [self.event()] * 4, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def queries_for(n):
+            payload = [self.event(("Gema", "EPICO", 1), ("Núcleo", "RARO", 2)) for _ in range(n)]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(self.url, payload, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(ctx.captured_queries)
+
+        queries_for(1)  # crea las recompensas y los rollups del día
+        self.assertEqual(queries_for(5), queries_for(100))
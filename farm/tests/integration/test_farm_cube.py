@@ -0,0 +1,133 @@
+import datetime
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from farm import cube, ingest, synthetic, versions
+from farm.models import FarmEvent, FarmSource, Game
+
+User = get_user_model()
+
+
+@skipUnless(cube.available(), "NumPy no está instalado")
+@override_settings(FARM_STATS_CACHE_ENABLED=False)
+class FarmCubeTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = synthetic.create_catalog(
+            users=6, games=1, sources_per_game=3, rewards_per_source=6, seed=11, days=20,
+            end_date=datetime.date(2025, 6, 30),
+        )
+        synthetic.generate_events(cls.dataset, 400, batch_size=100)
+        synthetic.rebuild_derived(cls.dataset.game_ids)
+
+    def setUp(self):
+        cache.clear()
+        cube.clear()
+        self.game_id = self.dataset.game_ids[0]
+        self.source = FarmSource.objects.filter(game_id=self.game_id).order_by("id").first()
+        self.client.force_authenticate(User.objects.order_by("id").first())
+        self.url = reverse("farm-stats", kwargs={"game_id": self.game_id})
+
+    def both(self, params):
+        exact = self.client.get(self.url, params).json()
+        with override_settings(FARM_CUBE_ENABLED=True):
+            fast = self.client.get(self.url, params).json()
+        return exact, fast
+
+    def assertSameStats(self, exact, fast):
+        self.assertEqual(fast["summary"], exact["summary"])
+        key = lambda row: (row["reward__name"], row["reward__rarity"])
+        exact_rows = {key(row): row for row in exact["drops"]}
+        self.assertEqual({key(row) for row in fast["drops"]}, set(exact_rows))
+        for row in fast["drops"]:
+            expected = exact_rows[key(row)]
+            for field, value in row.items():
+                if isinstance(value, float):
+                    self.assertAlmostEqual(value, expected[field], places=6, msg=field)
+                elif field == "percentiles":
+                    for label, percentile in value.items():
+                        self.assertAlmostEqual(percentile, expected[field][label], places=6)
+                else:
+                    self.assertEqual(value, expected[field], msg=field)
+
+    def test_matches_exact_engine(self):
+        reward = self.source.rewards.order_by("id").first()
+        for params in [
+            {},
+            {"percentiles": "10,90,99"},
+            {"sourceID": self.source.id, "type": self.source.source_type.lower()},
+            {"itemID": reward.id, "startDate": "2025-06-15", "endDate": "2025-06-25"},
+        ]:
+            with self.subTest(params=params):
+                self.assertSameStats(*self.both(params))
+
+    def test_no_aggregate_queries_once_loaded(self):
+        with override_settings(FARM_CUBE_ENABLED=True):
+            self.client.get(self.url)
+            # Solo la lectura de tokens de versión (caché), ninguna consulta SQL
+            with self.assertNumQueries(0):
+                self.client.get(self.url, {"percentiles": "50,90"})
+
+    def test_incremental_refresh(self):
+        game_cube = cube.get_cube(self.game_id)
+        before = game_cube.memory()
+        user = User.objects.order_by("id").first()
+        ingest.create_events(self.source.game, user, [
+            {"farm_type": self.source.source_type, "source": self.source,
+             "drops": [{"reward_name": "Nueva", "rarity": "LEGENDARIO", "quantity": 70000}]},
+        ])
+
+        with self.assertNumQueries(3):  # eventos nuevos, sus drops y la recompensa nueva
+            cube.get_cube(self.game_id)
+        after = game_cube.memory()
+        self.assertEqual((after["events"], after["drops"]), (before["events"] + 1, before["drops"] + 1))
+        self.assertGreater(after["last_event_id"], before["last_event_id"])
+        # 70000 no cabe en uint16: la columna sube de tipo sin perder valores
+        self.assertSameStats(*self.both({"sourceID": self.source.id}))
+
+    @override_settings(FARM_CUBE_RESCAN_IDS=5)
+    def test_events_committed_out_of_id_order(self):
+        user = User.objects.order_by("id").first()
+        ingest.create_events(self.source.game, user, [
+            {"farm_type": self.source.source_type, "source": self.source,
+             "drops": [{"reward_name": "Tardía", "rarity": "EPICO", "quantity": quantity}]}
+            for quantity in (3, 4)
+        ])
+        slow, fast = FarmEvent.objects.filter(game_id=self.game_id).order_by("-id")[:2][::-1]
+        self.assertLess(slow.id, fast.id)
+        # El evento de id menor aún no es visible (su transacción no ha terminado)
+        hidden = Game.objects.create(name="Oculto")
+        FarmEvent.objects.filter(pk=slow.pk).update(game=hidden)
+        cube.get_cube(self.game_id)
+        self.assertEqual(cube.get_cube(self.game_id).memory()["last_event_id"], fast.id)
+
+        # Se confirma después, con un id por debajo del último cargado
+        FarmEvent.objects.filter(pk=slow.pk).update(game_id=self.game_id)
+        versions.bump(game_ids=[self.game_id])
+        self.assertEqual(cube.get_cube(self.game_id).memory()["events"], FarmEvent.objects.filter(game_id=self.game_id).count())
+        self.assertSameStats(*self.both({}))
+
+        # Releer la ventana no duplica eventos ya cargados
+        versions.bump(game_ids=[self.game_id])
+        self.assertEqual(cube.get_cube(self.game_id).memory()["events"], FarmEvent.objects.filter(game_id=self.game_id).count())
+
+    def test_delete_forces_reload(self):
+        cube.get_cube(self.game_id)
+        event = FarmEvent.objects.filter(game_id=self.game_id).order_by("id").first()
+        self.client.delete(reverse("farm-event-detail", kwargs={"game_pk": self.game_id, "pk": event.pk}))
+        self.assertEqual(cube.get_cube(self.game_id).memory()["events"], FarmEvent.objects.filter(game_id=self.game_id).count())
+        self.assertSameStats(*self.both({}))
+
+    def test_memory_usage(self):
+        cube.get_cube(self.game_id)
+        usage = cube.memory_usage()[self.game_id]
+        self.assertEqual(usage["events"], 400)
+        # 4 columnas int32, una uint8 y una uint16 por drop
+        self.assertEqual(usage["bytes"], usage["events"] * 9 + usage["drops"] * 19)
+        self.assertGreaterEqual(usage["allocated_bytes"], usage["bytes"])
+
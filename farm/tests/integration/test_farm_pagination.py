@@ -0,0 +1,70 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from farm.models import FarmEvent, FarmSource, Game
+
+User = get_user_model()
+
+
+class FarmCursorPaginationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.client.force_authenticate(self.user)
+
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.boss = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        self.domain = FarmSource.objects.create(name="Dominio", location="Liyue", source_type="DOMINIO", game=self.game)
+
+        # Varios eventos por día para comprobar el desempate por id
+        today = date.today()
+        for i in range(7):
+            source = self.boss if i % 2 else self.domain
+            event = FarmEvent.objects.create(
+                user=self.user, farm_type=source.source_type, source=source, game=self.game
+            )
+            FarmEvent.objects.filter(pk=event.pk).update(date=today - timedelta(days=i // 3))
+
+        self.history_url = reverse("farm-history", kwargs={"game_id": self.game.id})
+        self.events_url = reverse("farm-event-list", kwargs={"game_pk": self.game.id})
+
+    def collect(self, url, params):
+        ids, pages = [], 0
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(row["id"] for row in response.data["results"])
+            pages += 1
+            if not response.data["next"]:
+                return ids, pages
+            response = self.client.get(response.data["next"])
+
+    def expected_ids(self, **filters):
+        return list(
+            FarmEvent.objects.filter(user=self.user, **filters)
+            .order_by("-date", "-id").values_list("id", flat=True)
+        )
+
+    def test_history_walks_all_pages_in_stable_order(self):
+        ids, pages = self.collect(self.history_url, {"gameID": self.game.id, "page_size": 3})
+        self.assertEqual(ids, self.expected_ids())
+        self.assertEqual(pages, 3)
+
+    def test_history_filters_apply_to_every_page(self):
+        ids, _ = self.collect(self.history_url, {"sourceID": self.boss.id, "page_size": 2})
+        self.assertEqual(ids, self.expected_ids(source=self.boss))
+
+        ids, _ = self.collect(self.history_url, {"type": "dominio", "page_size": 2})
+        self.assertEqual(ids, self.expected_ids(farm_type="DOMINIO"))
+
+    def test_event_list_is_paginated(self):
+        ids, pages = self.collect(self.events_url, {"page_size": 4})
+        self.assertEqual(ids, self.expected_ids())
+        self.assertEqual(pages, 2)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.history_url, {"cursor": "no-es-un-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from farm import catalog
+from farm.models import FarmReward, FarmSource, Game
+from statsprime import instrumentation
+from statsprime.testing import QueryBudgetMixin
+
+User = get_user_model()
+
+
+class FarmQueryBudgetTest(QueryBudgetMixin, APITestCase):
+    """Consultas máximas por endpoint; no deben crecer con el número de filas."""
+
+    def setUp(self):
+        cache.clear()
+        catalog.clear()
+        instrumentation.reset()
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.client.force_authenticate(self.user)
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.source = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        self.events_url = reverse("farm-event-list", kwargs={"game_pk": self.game.id})
+        for quantity in range(1, 6):
+            response = self.client.post(self.events_url, {
+                "farm_type": "JEFE",
+                "source": self.source.id,
+                "drops": [
+                    {"reward_name": "Gema", "rarity": "EPICO", "quantity": quantity},
+                    {"reward_name": f"Pieza {quantity}", "rarity": "RARO", "quantity": 1},
+                ],
+            }, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_read_endpoints(self):
+        game_id = self.game.id
+        gema_id = FarmReward.objects.get(name="Gema").id
+        budgets = [
+            (2, "farm-event-list", reverse("farm-event-list", kwargs={"game_pk": game_id}), {}),
+            (2, "farm-history", reverse("farm-history", kwargs={"game_id": game_id}), {}),
+            (2, "farm-source-list", reverse("farm-source-list", kwargs={"game_pk": game_id}), {}),
+            (1, "farm-source-rewards", reverse("farm-source-rewards", kwargs={"game_id": game_id, "source_id": self.source.id}), {}),
+            (1, "games-list", reverse("games-list"), {}),
+            (3, "farm-stats", reverse("farm-stats", kwargs={"game_id": game_id}), {"percentiles": "50,90"}),
+            (1, "drop-rate-stats", reverse("drop-rate-stats", kwargs={"game_id": game_id}), {"sourceID": self.source.id}),
+            (2, "drop-rate-stats", reverse("drop-rate-stats", kwargs={"game_id": game_id}),
+             {"sourceID": self.source.id, "itemID": gema_id, "scope": "global"}),
+            (2, "user-stats", reverse("user-stats"), {"game_id": game_id}),
+        ]
+        for budget, view_name, url, params in budgets:
+            with self.subTest(view_name):
+                response = self.assertQueryBudget(budget, "get", url, params, view_name=view_name)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_write_endpoints(self):
+        payload = {
+            "farm_type": "JEFE",
+            "source": self.source.id,
+            "drops": [{"reward_name": "Gema", "rarity": "EPICO", "quantity": 1}],
+        }
+        # +4 por los totales de la comunidad (fuentes y recompensas) y del ranking
+        # (fuente y juego completo); +2 por los sketches de cuantiles
+        self.assertQueryBudget(18, "post", self.events_url, payload, format="json")
+        self.assertQueryBudget(
+            17, "post", reverse("farm-event-bulk", kwargs={"game_pk": self.game.id}),
+            [payload] * 10, format="json",
+        )
+        # Diez drops de cinco recompensas: una sentencia por tabla, no por recompensa
+        many_drops = dict(payload, drops=[
+            {"reward_name": f"Pieza {quantity}", "rarity": "RARO", "quantity": quantity} for quantity in range(1, 6)
+        ] * 2)
+        self.assertQueryBudget(18, "post", self.events_url, many_drops, format="json")
+
+    def test_server_timing_and_aggregates(self):
+        url = reverse("farm-stats", kwargs={"game_id": self.game.id})
+        response = self.client.get(url)
+        self.assertIn('db;dur=', response["Server-Timing"])
+        self.assertIn(f'desc="{response.query_stats.count} queries"', response["Server-Timing"])
+
+        self.client.get(url)
+        stats = instrumentation.endpoint_stats()["farm-stats"]
+        self.assertEqual(stats["requests"], 2)
+        self.assertGreater(stats["queries"], 0)
+        self.assertIsNotNone(stats["slowest_sql"])
@@ -0,0 +1,133 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Avg, Count, Max, Min, StdDev, Sum
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from farm import cube
+from farm.models import FarmDrop, FarmDropDailyRollup, FarmEventDailyRollup, FarmSource, Game
+
+User = get_user_model()
+
+
+class FarmRollupsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.client.force_authenticate(self.user)
+
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.source = FarmSource.objects.create(
+            name="Dominio de Artefactos", location="Liyue", source_type="DOMINIO", game=self.game
+        )
+        self.events_url = reverse("farm-event-list", kwargs={"game_pk": self.game.id})
+        self.stats_url = reverse("farm-stats", kwargs={"game_id": self.game.id})
+
+    def post_event(self, drops):
+        payload = {"farm_type": "DOMINIO", "source": self.source.id, "drops": drops}
+        response = self.client.post(self.events_url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response
+
+    def seed(self):
+        self.post_event([
+            {"reward_name": "Flor", "rarity": "EPICO", "quantity": 2},
+            {"reward_name": "Pluma", "rarity": "RARO", "quantity": 1},
+        ])
+        self.post_event([{"reward_name": "Flor", "rarity": "EPICO", "quantity": 5}])
+        self.post_event([{"reward_name": "Flor", "rarity": "EPICO", "quantity": 3}])
+        self.post_event([])
+
+    def test_event_creation_updates_rollups(self):
+        self.seed()
+
+        self.assertEqual(FarmEventDailyRollup.objects.get().event_count, 4)
+        flor = FarmDropDailyRollup.objects.get(reward__name="Flor")
+        self.assertEqual(flor.drop_count, 3)
+        self.assertEqual(flor.total_quantity, 10)
+        self.assertEqual(flor.sum_squares, 4 + 25 + 9)
+        self.assertEqual((flor.min_quantity, flor.max_quantity), (2, 5))
+
+    def test_stats_match_raw_aggregation(self):
+        self.seed()
+
+        response = self.client.get(self.stats_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        expected = {
+            (row["reward__name"], row["reward__rarity"]): row
+            for row in FarmDrop.objects.values("reward__name", "reward__rarity").annotate(
+                total_quantity=Sum("quantity"),
+                avg_quantity=Avg("quantity"),
+                min_quantity=Min("quantity"),
+                max_quantity=Max("quantity"),
+                drop_count=Count("id"),
+                stddev_quantity=StdDev("quantity"),
+            )
+        }
+
+        self.assertEqual(response.data["summary"], {"total_events": 4, "total_drops": 11, "avg_drops": 2.75})
+        self.assertEqual(len(response.data["drops"]), len(expected))
+        for group in response.data["drops"]:
+            raw = expected[(group["reward__name"], group["reward__rarity"])]
+            for field in ("total_quantity", "min_quantity", "max_quantity", "drop_count"):
+                self.assertEqual(group[field], raw[field])
+            self.assertAlmostEqual(group["avg_quantity"], raw["avg_quantity"])
+            self.assertAlmostEqual(group["stddev_quantity"], raw["stddev_quantity"])
+
+        flor = response.data["drops"][0]
+        self.assertEqual(flor["reward__name"], "Flor")
+        self.assertEqual(flor["median_quantity"], 3.0)
+
+    def test_item_filter_does_not_change_event_count(self):
+        self.seed()
+        pluma = FarmDropDailyRollup.objects.get(reward__name="Pluma").reward_id
+
+        response = self.client.get(self.stats_url, {"itemID": pluma})
+        self.assertEqual(response.data["summary"]["total_events"], 4)
+        self.assertEqual(response.data["summary"]["total_drops"], 1)
+        self.assertEqual([g["reward__name"] for g in response.data["drops"]], ["Pluma"])
+
+    def test_rebuild_command_reproduces_rollups(self):
+        self.seed()
+        before = list(FarmDropDailyRollup.objects.order_by("reward_id").values(
+            "reward_id", "drop_count", "total_quantity", "sum_squares", "min_quantity", "max_quantity"
+        ))
+        FarmDropDailyRollup.objects.all().delete()
+        FarmEventDailyRollup.objects.all().delete()
+
+        call_command("rebuild_farm_rollups", game=self.game.id, stdout=StringIO())
+
+        after = list(FarmDropDailyRollup.objects.order_by("reward_id").values(
+            "reward_id", "drop_count", "total_quantity", "sum_squares", "min_quantity", "max_quantity"
+        ))
+        self.assertEqual(before, after)
+        self.assertEqual(FarmEventDailyRollup.objects.get().event_count, 4)
+
+    def test_delete_event_refreshes_rollups(self):
+        self.seed()
+        event_id = self.post_event([{"reward_name": "Flor", "rarity": "EPICO", "quantity": 9}]).data["id"]
+
+        response = self.client.delete(
+            reverse("farm-event-detail", kwargs={"game_pk": self.game.id, "pk": event_id})
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        flor = FarmDropDailyRollup.objects.get(reward__name="Flor")
+        self.assertEqual((flor.total_quantity, flor.max_quantity), (10, 5))
+        self.assertEqual(FarmEventDailyRollup.objects.get().event_count, 4)
+
+    def test_malformed_dates(self):
+        self.seed()
+        self.addCleanup(cube.clear)
+        for cube_enabled in (False, True):
+            with self.subTest(cube=cube_enabled), self.settings(FARM_CUBE_ENABLED=cube_enabled):
+                for params in [{"startDate": "2024-13-01"}, {"endDate": "ayer"}]:
+                    response = self.client.get(self.stats_url, params)
+                    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                    self.assertIn("YYYY-MM-DD", response.data["error"])
+                today = FarmEventDailyRollup.objects.get().date.isoformat()
+                response = self.client.get(self.stats_url, {"startDate": today, "endDate": today})
+                self.assertEqual(response.data["summary"]["total_events"], 4)
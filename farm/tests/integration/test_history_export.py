@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from farm import ingest
+from farm.models import FarmSource, Game
+
+User = get_user_model()
+
+
+class FarmHistoryExportTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        other = User.objects.create_user(username="player2", email="p2@correo.com", password="secret123")
+        self.client.force_authenticate(self.user)
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.boss = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        self.chest = FarmSource.objects.create(name="Cofre", location="Liyue", source_type="COFRE", game=self.game)
+        ingest.create_events(self.game, self.user, [
+            {"farm_type": "JEFE", "source": self.boss, "drops": [
+                {"reward_name": "Gema", "rarity": "EPICO", "quantity": 1},
+                {"reward_name": "Pieza", "rarity": "RARO", "quantity": 3},
+            ]},
+            {"farm_type": "COFRE", "source": self.chest, "drops": []},
+        ])
+        ingest.create_events(self.game, other, [
+            {"farm_type": "JEFE", "source": self.boss, "drops": [{"reward_name": "Gema", "rarity": "EPICO", "quantity": 9}]},
+        ])
+        self.url = reverse("farm-history-export", kwargs={"game_id": self.game.id})
+
+    def read(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_one_row_per_drop(self):
+        response = self.client.get(self.url, {"gameID": self.game.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn("farm-history.csv", response["Content-Disposition"])
+
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual(len(rows), 3)
+        # Del más reciente al más antiguo; el evento sin drops sale con celdas vacías
+        self.assertEqual((rows[0]["source_name"], rows[0]["reward_name"]), ("Cofre", ""))
+        self.assertEqual([row["reward_name"] for row in rows[1:]], ["Gema", "Pieza"])
+        self.assertEqual(rows[2]["quantity"], "3")
+
+    def test_ndjson_one_line_per_event(self):
+        response = self.client.get(self.url, {"output": "ndjson", "sourceID": self.boss.id})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+
+        events = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["total_drops"], 4)
+        self.assertEqual([drop["quantity"] for drop in events[0]["drops"]], [1, 3])
+
+    def test_same_filters_as_history(self):
+        history = self.client.get(reverse("farm-history", kwargs={"game_id": self.game.id}), {"type": "cofre"})
+        response = self.client.get(self.url, {"output": "ndjson", "type": "cofre"})
+        events = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([event["event_id"] for event in events], [event["id"] for event in history.data["results"]])
+
+    def test_other_users_history_only_for_staff(self):
+        response = self.client.get(self.url, {"output": "ndjson", "user": "player2"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        own = self.client.get(self.url, {"output": "ndjson", "user": "player1"})
+        self.assertEqual(len(self.read(own).splitlines()), 2)
+
+        self.user.is_staff = True
+        self.user.save()
+        other = self.client.get(self.url, {"output": "ndjson", "user": "player2"})
+        self.assertEqual([event["drops"][0]["quantity"] for event in map(json.loads, self.read(other).splitlines())], [9])
+
+    def test_only_the_url_game(self):
+        game = Game.objects.create(name="Honkai")
+        source = FarmSource.objects.create(name="Jefe", location="Belobog", source_type="JEFE", game=game)
+        ingest.create_events(game, self.user, [{"farm_type": "JEFE", "source": source, "drops": []}])
+
+        events = [json.loads(line) for line in self.read(self.client.get(self.url, {"output": "ndjson"})).splitlines()]
+        self.assertEqual({event["game_id"] for event in events}, {self.game.id})
+        # ?gameID= de otro juego no saca eventos de fuera de la URL
+        response = self.client.get(self.url, {"output": "ndjson", "gameID": game.id})
+        self.assertEqual(self.read(response), "")
+
+    async def test_async_iterator_under_asgi(self):
+        token = RefreshToken.for_user(self.user).access_token
+        response = await AsyncClient().get(self.url, headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Bajo ASGI el cuerpo es asíncrono: se envía por bloques, no se carga entero
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(len(list(csv.DictReader(io.StringIO(body)))), 3)
+
+    def test_invalid_output(self):
+        response = self.client.get(self.url, {"output": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("error", response.data)
@@ -0,0 +1,153 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from farm import community, ingest, leaderboards
+from farm.models import CommunitySourceStats, FarmEvent, FarmSource, Game, LeaderboardEntry
+
+User = get_user_model()
+
+LEGENDARY = {"reward_name": "Espada", "rarity": "LEGENDARIO", "quantity": 1}
+COMMON = {"reward_name": "Mineral", "rarity": "COMUN", "quantity": 5}
+
+
+def snapshot(model, *fields):
+    # source_id nulo (juego completo) como 0 para poder ordenar
+    return sorted(tuple(value or 0 for value in row) for row in model.objects.values_list(*fields))
+
+
+class LeaderboardTest(APITestCase):
+    def setUp(self):
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.boss = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        self.chest = FarmSource.objects.create(name="Cofre", location="Liyue", source_type="COFRE", game=self.game)
+        self.users = {
+            name: User.objects.create_user(username=name, email=f"{name}@correo.com", password="secret123")
+            for name in ("ana", "beto", "carla")
+        }
+        self.client.force_authenticate(self.users["ana"])
+
+    def farm(self, name, source, drops, times=1):
+        ingest.create_events(self.game, self.users[name], [
+            {"farm_type": source.source_type, "source": source, "drops": list(drops)} for _ in range(times)
+        ])
+
+    def seed(self):
+        self.farm("ana", self.boss, [LEGENDARY], times=5)
+        self.farm("ana", self.boss, [COMMON], times=5)
+        self.farm("beto", self.boss, [LEGENDARY, dict(LEGENDARY, reward_name="Arco", quantity=2)], times=1)
+        self.farm("beto", self.chest, [COMMON], times=9)
+        self.farm("carla", self.boss, [COMMON], times=10)
+
+    def top(self, board, **params):
+        url = reverse("leaderboard", kwargs={"game_id": self.game.id, "board": board})
+        return self.client.get(url, params)
+
+    def test_incremental_matches_rebuild(self):
+        self.seed()
+        fields = ("game_id", "source_id", "user_id", "runs", "legendary_drops", "legendary_events")
+        incremental = snapshot(LeaderboardEntry, *fields)
+        scores = {
+            (source_id, user_id): score
+            for source_id, user_id, score in LeaderboardEntry.objects.values_list("source_id", "user_id", "luck_score")
+        }
+        community_rows = snapshot(CommunitySourceStats, "source_id", "event_count", "legendary_events")
+
+        leaderboards.rebuild(game_id=self.game.id)
+        self.assertEqual(snapshot(LeaderboardEntry, *fields), incremental)
+        self.assertEqual(snapshot(CommunitySourceStats, "source_id", "event_count", "legendary_events"), community_rows)
+        # El luck_score calculado en SQL coincide con el de Python
+        for entry in LeaderboardEntry.objects.all():
+            self.assertAlmostEqual(scores[(entry.source_id, entry.user_id)], entry.luck_score, places=9)
+
+    def test_top_with_ties(self):
+        self.seed()
+        response = self.top("runs")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        entries = response.data["entries"]
+        # Los tres tienen 10 partidas en el juego: empate en la posición 1
+        self.assertEqual([entry["rank"] for entry in entries], [1, 1, 1])
+        # Sin fuente, la referencia es el juego: 6 de 30 eventos con legendario
+        self.assertAlmostEqual(response.data["community_legendary_rate"], 6 / 30)
+        luck = {entry["user"]: entry["luck"] for entry in self.top("luck").data["entries"]}
+        self.assertAlmostEqual(luck["ana"], 0.5 / (6 / 30))
+        self.assertEqual(luck["carla"], 0)
+
+        entries = self.top("legendary", limit=2).data["entries"]
+        self.assertEqual([(entry["user"], entry["legendary_drops"]) for entry in entries], [("ana", 5), ("beto", 3)])
+
+    def test_luck_by_source(self):
+        self.seed()
+        response = self.top("luck", sourceID=self.boss.id)
+        data = response.data
+        # 6 de 21 eventos del jefe traen algún legendario
+        self.assertAlmostEqual(data["community_legendary_rate"], 6 / 21)
+        ana, beto, carla = data["entries"]
+        # 5 de 10 ordena por encima de 1 de 1: el límite inferior de Wilson premia la muestra
+        self.assertEqual((ana["user"], beto["user"], carla["user"]), ("ana", "beto", "carla"))
+        self.assertGreater(beto["legendary_rate"], ana["legendary_rate"])
+        self.assertGreater(ana["luck_score"], beto["luck_score"])
+        self.assertAlmostEqual(ana["luck"], 0.5 / (6 / 21))
+        self.assertAlmostEqual(beto["luck"], 1 / (6 / 21))
+        self.assertEqual(carla["luck_score"], 0)
+
+    def test_rank_endpoint(self):
+        self.seed()
+        url = reverse("leaderboard-rank", kwargs={"game_id": self.game.id, "board": "legendary"})
+        self.assertEqual(self.client.get(url).data["entry"]["rank"], 1)
+        self.assertEqual(self.client.get(url, {"user": "carla"}).data["entry"]["rank"], 3)
+        self.assertEqual(self.client.get(url, {"user": "carla", "sourceID": self.chest.id}).data["entry"],
+                         {"rank": None, "user": "carla"})
+
+        # Un legendario nuevo cambia la posición (caché invalidada por versión)
+        self.farm("carla", self.boss, [dict(LEGENDARY, quantity=6)])
+        self.assertEqual(self.client.get(url, {"user": "carla"}).data["entry"]["rank"], 1)
+
+    def test_rank_table_shared_between_users(self):
+        self.seed()
+        cache.clear()
+        url = reverse("leaderboard-rank", kwargs={"game_id": self.game.id, "board": "luck"})
+        with CaptureQueriesContext(connection) as first:
+            self.assertEqual(self.client.get(url, {"sourceID": self.boss.id}).data["entry"]["rank"], 1)
+        # Otro usuario, misma versión: la tabla ya está en la caché y no se recorre el ranking
+        with CaptureQueriesContext(connection) as second:
+            entry = self.client.get(url, {"sourceID": self.boss.id, "user": "carla"}).data["entry"]
+        self.assertEqual(entry["rank"], 3)
+        self.assertEqual(len(second.captured_queries), len(first.captured_queries) - 1)
+
+        # Empates: los tres tienen 10 partidas en el juego
+        url = reverse("leaderboard-rank", kwargs={"game_id": self.game.id, "board": "runs"})
+        self.assertEqual(self.client.get(url, {"user": "carla"}).data["entry"]["rank"], 1)
+
+    def test_update_and_delete_adjust_totals(self):
+        self.seed()
+        event = FarmEvent.objects.filter(user=self.users["beto"], source=self.boss).get()
+        url = reverse("farm-event-detail", kwargs={"game_pk": self.game.id, "pk": event.id})
+        self.client.force_authenticate(self.users["beto"])
+
+        response = self.client.patch(url, {"source": self.chest.id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        chest = LeaderboardEntry.objects.get(source=self.chest, user=self.users["beto"])
+        self.assertEqual((chest.runs, chest.legendary_drops), (10, 3))
+        self.assertFalse(LeaderboardEntry.objects.filter(source=self.boss, user=self.users["beto"]).exists())
+        self.assertAlmostEqual(community.source_rate(self.boss.id), 5 / 20)
+
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        total = LeaderboardEntry.objects.get(source=None, user=self.users["beto"])
+        self.assertEqual((total.runs, total.legendary_drops, total.legendary_events), (9, 0, 0))
+        self.assertEqual(community.source_rate(self.chest.id), 0)
+
+        rows = snapshot(LeaderboardEntry, "source_id", "user_id", "runs", "legendary_drops", "legendary_events")
+        leaderboards.rebuild(game_id=self.game.id)
+        self.assertEqual(snapshot(LeaderboardEntry, "source_id", "user_id", "runs", "legendary_drops", "legendary_events"), rows)
+
+    def test_errors(self):
+        self.assertEqual(self.top("kills").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.top("runs", limit=0).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.top("runs", limit="mucho").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.top("runs", sourceID="x").status_code, status.HTTP_400_BAD_REQUEST)
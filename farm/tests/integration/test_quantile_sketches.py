@@ -0,0 +1,104 @@
+import datetime
+from bisect import bisect_left, bisect_right
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from farm import ingest, rollups, sketches, synthetic
+from farm.models import FarmDrop, FarmDropDailyRollup, FarmEvent, FarmSource
+
+User = get_user_model()
+
+PARAMS = {"percentiles": "10,25,75,90,99"}
+
+
+@override_settings(FARM_STATS_CACHE_ENABLED=False, FARM_SKETCH_K=16)
+class QuantileSketchStatsTest(APITestCase):
+    """
+    Sketches con k pequeño para que se compacten con pocos datos: el error
+    de rango debe seguir acotado frente al motor exacto.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = synthetic.create_catalog(
+            users=6, games=1, sources_per_game=2, rewards_per_source=4, seed=5, days=15,
+            end_date=datetime.date(2025, 6, 30),
+        )
+        synthetic.generate_events(cls.dataset, 1500, batch_size=500)
+        with override_settings(FARM_SKETCH_K=16):
+            synthetic.rebuild_derived(cls.dataset.game_ids)
+
+    def setUp(self):
+        cache.clear()
+        self.game_id = self.dataset.game_ids[0]
+        self.client.force_authenticate(User.objects.order_by("id").first())
+        self.url = reverse("farm-stats", kwargs={"game_id": self.game_id})
+
+    def stats(self, engine, params):
+        with override_settings(FARM_PERCENTILES_ENGINE=engine):
+            return self.client.get(self.url, dict(PARAMS, **params)).json()
+
+    def quantities(self, name, rarity, start_date=None):
+        drops = FarmDrop.objects.filter(event__game_id=self.game_id, reward__name=name, reward__rarity=rarity)
+        if start_date:
+            drops = drops.filter(event__date__gte=start_date)
+        return sorted(drops.values_list("quantity", flat=True))
+
+    def assertRankError(self, ordered, value, fraction, bound):
+        low = bisect_left(ordered, value) / len(ordered)
+        high = bisect_right(ordered, value) / len(ordered)
+        self.assertLessEqual(max(0, low - fraction, fraction - high), bound, (fraction, value))
+
+    def test_close_to_exact_for_any_range(self):
+        compacted = 0
+        for start_date in (None, "2025-06-25"):
+            params = {"startDate": start_date} if start_date else {}
+            sketch = self.stats("sketch", params)
+            exact = self.stats("exact", params)
+            self.assertEqual(sketch["summary"], exact["summary"])
+
+            for row in sketch["drops"]:
+                ordered = self.quantities(row["reward__name"], row["reward__rarity"], start_date)
+                compacted += len(ordered) > 16
+                labels = {"median_quantity": 0.5, **{f"p{p}": p / 100 for p in (10, 25, 75, 90, 99)}}
+                values = {"median_quantity": row["median_quantity"], **row["percentiles"]}
+                for label, fraction in labels.items():
+                    # Error teórico ~1.7/k; margen amplio para que no dependa del azar
+                    self.assertRankError(ordered, values[label], fraction, 0.2)
+        self.assertGreater(compacted, 0)
+
+    def test_does_not_read_drops(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.stats("sketch", {})
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "farm_farmdrop"' in q["sql"]])
+
+    def test_missing_sketches_fall_back_to_exact(self):
+        # Rollups sin sketch (como los anteriores a la migración 0008)
+        FarmDropDailyRollup.objects.filter(game_id=self.game_id, date__gte="2025-06-25").update(quantity_sketch=None)
+        self.assertEqual(self.stats("sketch", {}), self.stats("exact", {}))
+
+    def test_write_path_matches_rebuild(self):
+        source = FarmSource.objects.filter(game_id=self.game_id).order_by("id").first()
+        user = User.objects.order_by("id").first()
+        reward = source.rewards.order_by("id").first()
+        ingest.create_events(source.game, user, [
+            {"farm_type": source.source_type, "source": source,
+             "drops": [{"reward_name": reward.name, "rarity": reward.rarity, "quantity": quantity}]}
+            for quantity in (1, 7, 7, 40)
+        ])
+        today = FarmEvent.objects.filter(source=source).latest("id").date
+        with override_settings(FARM_PERCENTILES_ENGINE="sketch"):
+            data = self.client.get(self.url, {"itemID": reward.id, "startDate": today.isoformat()}).json()
+        self.assertEqual(data["drops"][0]["median_quantity"], 7)
+
+        written = sketches.load(FarmDropDailyRollup.objects.get(reward=reward, date=today).quantity_sketch)
+        rollups.rebuild(game_id=self.game_id, start_date=today, end_date=today)
+        rebuilt = sketches.load(FarmDropDailyRollup.objects.get(reward=reward, date=today).quantity_sketch)
+        self.assertEqual(sorted(written.levels[0]), sorted(rebuilt.levels[0]))
+        self.assertEqual(written.quantiles([0.25, 0.5, 0.9]), rebuilt.quantiles([0.25, 0.5, 0.9]))
@@ -0,0 +1,118 @@
+"""
+Regresión de planes de consulta: ejecuta EXPLAIN QUERY PLAN (SQLite) sobre
+cada consulta de los endpoints de farmeo y falla si alguna recorre completa
+una tabla de eventos, drops o rollups.
+"""
+import re
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from farm.models import (
+    FarmDrop,
+    FarmDropDailyRollup,
+    FarmEvent,
+    FarmEventDailyRollup,
+    FarmReward,
+    FarmSource,
+    Game,
+)
+
+User = get_user_model()
+
+WATCHED_TABLES = {
+    model._meta.db_table
+    for model in (FarmEvent, FarmDrop, FarmEventDailyRollup, FarmDropDailyRollup)
+}
+ALIAS_RE = re.compile(r'"(\w+)" (\w+)\b')
+SCAN_RE = re.compile(r"^SCAN (\w+)(.*)$")
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN es específico de SQLite")
+class FarmQueryPlanTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.source = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        self.reward = FarmReward.objects.create(name="Gema", rarity="EPICO", source=self.source)
+
+        events_url = reverse("farm-event-list", kwargs={"game_pk": self.game.id})
+        for quantity in (1, 2, 3):
+            self.client.post(events_url, {
+                "farm_type": "JEFE",
+                "source": self.source.id,
+                "drops": [{"reward_name": "Gema", "rarity": "EPICO", "quantity": quantity}],
+            }, format="json")
+
+    def capture_selects(self, url, params):
+        statements = []
+
+        def recorder(execute, sql, sql_params, many, context):
+            if sql.lstrip().upper().startswith("SELECT"):
+                statements.append((sql, sql_params))
+            return execute(sql, sql_params, many, context)
+
+        with connection.execute_wrapper(recorder):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return statements
+
+    def full_scans(self, sql, params):
+        aliases = {alias: table for table, alias in ALIAS_RE.findall(sql)}
+        scans = []
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            for row in cursor.fetchall():
+                match = SCAN_RE.match(row[-1])
+                if not match:
+                    continue
+                table = aliases.get(match.group(1), match.group(1))
+                if table in WATCHED_TABLES and "USING" not in match.group(2):
+                    scans.append(row[-1])
+        return scans
+
+    def assertNoFullScans(self, url, params):
+        statements = self.capture_selects(url, params)
+        self.assertTrue(statements)
+        for sql, sql_params in statements:
+            scans = self.full_scans(sql, sql_params)
+            self.assertFalse(scans, f"Recorrido completo {scans} en:\n{sql}")
+
+    def test_user_stats(self):
+        url = reverse("user-stats")
+        self.assertNoFullScans(url, {"game_id": self.game.id})
+        self.assertNoFullScans(url, {
+            "game_id": self.game.id, "source": "jefe", "item": "gema",
+            "start_date": "2000-01-01", "end_date": "2100-01-01",
+        })
+
+    def test_drop_rate(self):
+        url = reverse("drop-rate-stats", kwargs={"game_id": self.game.id})
+        self.assertNoFullScans(url, {"sourceID": self.source.id})
+        self.assertNoFullScans(url, {"sourceID": self.source.id, "itemID": self.reward.id})
+
+    def test_history(self):
+        url = reverse("farm-history", kwargs={"game_id": self.game.id})
+        self.assertNoFullScans(url, {})
+        self.assertNoFullScans(url, {"gameID": self.game.id, "sourceID": self.source.id, "type": "jefe"})
+
+        first_page = self.client.get(url, {"gameID": self.game.id, "page_size": 1})
+        self.assertNoFullScans(first_page.data["next"], {})
+
+    def test_event_list(self):
+        self.assertNoFullScans(reverse("farm-event-list", kwargs={"game_pk": self.game.id}), {})
+
+    def test_farm_stats(self):
+        url = reverse("farm-stats", kwargs={"game_id": self.game.id})
+        self.assertNoFullScans(url, {})
+        self.assertNoFullScans(url, {
+            "type": "jefe", "sourceID": self.source.id, "itemID": self.reward.id,
+            "startDate": "2000-01-01", "endDate": "2100-01-01", "percentiles": "25,75",
+        })
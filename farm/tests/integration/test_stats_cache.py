@@ -0,0 +1,121 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from farm import stats_cache, versions
+from farm.models import FarmEvent, FarmSource, Game
+
+User = get_user_model()
+
+
+class StatsCacheTestMixin:
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.client.force_authenticate(self.user)
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.source = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        self.events_url = reverse("farm-event-list", kwargs={"game_pk": self.game.id})
+        self.post_event(2)
+
+    def post_event(self, quantity):
+        response = self.client.post(self.events_url, {
+            "farm_type": "JEFE",
+            "source": self.source.id,
+            "drops": [{"reward_name": "Gema", "rarity": "EPICO", "quantity": quantity}],
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def get(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(ctx.captured_queries)
+
+    def test_farm_stats_served_from_cache_until_write(self):
+        url = reverse("farm-stats", kwargs={"game_id": self.game.id})
+        first, queries = self.get(url, {"sourceID": self.source.id})
+        self.assertGreater(queries, 0)
+
+        # Mismos filtros en otro orden / con espacios: misma entrada
+        second, queries = self.get(url, {"sourceID": f" {self.source.id} ", "type": ""})
+        self.assertEqual(queries, 0)
+        self.assertEqual(second.data, first.data)
+
+        self.post_event(5)
+        third, queries = self.get(url, {"sourceID": self.source.id})
+        self.assertGreater(queries, 0)
+        self.assertEqual(third.data["summary"]["total_drops"], 7)
+
+    def test_user_views_are_scoped_per_user(self):
+        url = reverse("drop-rate-stats", kwargs={"game_id": self.game.id})
+        mine, _ = self.get(url, {"sourceID": self.source.id})
+        self.assertEqual(mine.data["total_events"], 1)
+
+        other = User.objects.create_user(username="player2", email="p2@correo.com", password="secret123")
+        self.client.force_authenticate(other)
+        theirs, queries = self.get(url, {"sourceID": self.source.id})
+        self.assertGreater(queries, 0)
+        self.assertEqual(theirs.data, {"message": "No hay eventos registrados para esta fuente.", "drop_rate": 0})
+
+        self.client.force_authenticate(self.user)
+        _, queries = self.get(url, {"sourceID": self.source.id})
+        self.assertEqual(queries, 0)
+
+    def test_delete_invalidates(self):
+        url = reverse("user-stats")
+        before, _ = self.get(url, {"game_id": self.game.id})
+        self.assertEqual(before.data["summary"]["total_events"], 1)
+
+        FarmEvent.objects.get().delete()
+        after, _ = self.get(url, {"game_id": self.game.id})
+        self.assertEqual(after.data["summary"]["total_events"], 0)
+
+    def test_hit_ratios(self):
+        url = reverse("farm-stats", kwargs={"game_id": self.game.id})
+        self.get(url)
+        self.get(url)
+        self.get(url)
+        self.assertEqual(
+            stats_cache.hit_ratios()["FarmStatsView"],
+            {"hits": 2, "misses": 1, "hit_ratio": 0.6667},
+        )
+
+    def test_report_command(self):
+        url = reverse("farm-stats", kwargs={"game_id": self.game.id})
+        self.get(url)
+        self.get(url)
+        out, err = StringIO(), StringIO()
+        call_command("stats_cache_report", stdout=out, stderr=err)
+        self.assertEqual(json.loads(out.getvalue())["FarmStatsView"]["hits"], 1)
+        # Aviso solo si la caché no la comparten los workers (memoria local)
+        self.assertEqual(bool(err.getvalue()), not versions.shared_cache())
+
+
+class LocMemStatsCacheTest(StatsCacheTestMixin, APITestCase):
+    pass
+
+
+class FileBasedStatsCacheTest(StatsCacheTestMixin, APITestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": directory.name,
+            }
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        super().setUp()
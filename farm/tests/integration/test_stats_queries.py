@@ -0,0 +1,92 @@
+import datetime
+
+from django.db.models import Avg, Count, Sum
+from django.http import QueryDict
+from django.test import TestCase
+
+from farm import stats_queries, synthetic
+from farm.models import FarmDrop, FarmEvent, FarmReward
+
+
+class FusedSummaryTest(TestCase):
+    """Los agregados fusionados dan lo mismo que las consultas por separado."""
+
+    @classmethod
+    def setUpTestData(cls):
+        dataset = synthetic.create_catalog(
+            users=3, games=1, sources_per_game=3, rewards_per_source=8, seed=3, days=10,
+            end_date=datetime.date(2025, 6, 30),
+        )
+        synthetic.generate_events(dataset, 200)
+        cls.game_id = dataset.game_ids[0]
+        cls.user = FarmEvent.objects.values("user").annotate(n=Count("id")).order_by("-n")[0]["user"]
+        cls.user = FarmEvent.objects.filter(user_id=cls.user).first().user
+        cls.source = FarmEvent.objects.filter(user=cls.user).first().source
+        # Un evento sin drops
+        FarmEvent.objects.create(user=cls.user, game_id=cls.game_id, source=cls.source, farm_type="JEFE")
+
+    def compute(self, stats_class, params, kwargs=None):
+        stats = stats_class(self.user, QueryDict(params), kwargs or {})
+        self.assertIsNone(stats.error)
+        with self.assertNumQueries(len(stats.parts())):
+            results = stats_queries.run(stats.parts())
+        return stats.payload(results)
+
+    def test_user_stats(self):
+        item = FarmReward.objects.filter(source=self.source).first().name
+        for params in [
+            f"game_id={self.game_id}",
+            f"game_id={self.game_id}&item={item}",
+            f"game_id={self.game_id}&source={self.source.name}&start_date=2025-06-25",
+        ]:
+            with self.subTest(params):
+                data = self.compute(stats_queries.UserStats, params)
+                query = QueryDict(params)
+
+                events = FarmEvent.objects.filter(user=self.user, game__id=self.game_id)
+                if query.get("source"):
+                    events = events.filter(source__name__iexact=query["source"])
+                if query.get("start_date"):
+                    events = events.filter(date__gte=query["start_date"])
+                drops = FarmDrop.objects.filter(event__in=events)
+                if query.get("item"):
+                    drops = drops.filter(reward__name__iexact=query["item"])
+
+                self.assertEqual(data["summary"], {
+                    "total_events": events.count(),
+                    "total_drops": drops.aggregate(total=Sum("quantity"))["total"] or 0,
+                    "avg_drops": round(drops.aggregate(avg=Avg("quantity"))["avg"] or 0, 2),
+                })
+                self.assertEqual(
+                    sorted(data["by_type"], key=lambda row: (row["source__name"], row["farm_type"])),
+                    sorted(events.values("source__name", "farm_type").annotate(count=Count("id")),
+                           key=lambda row: (row["source__name"], row["farm_type"])),
+                )
+                expected_by_day = list(events.values("date").annotate(avg_drops=Avg("drops__quantity")).order_by("date"))
+                self.assertEqual(len(data["by_day"]), len(expected_by_day))
+                for row, expected in zip(data["by_day"], expected_by_day):
+                    self.assertEqual(row["date"], expected["date"])
+                    if expected["avg_drops"] is None:
+                        self.assertIsNone(row["avg_drops"])
+                    else:
+                        self.assertAlmostEqual(row["avg_drops"], expected["avg_drops"])
+
+    def test_drop_rate(self):
+        reward = FarmReward.objects.filter(source=self.source).first()
+        for params in ["", f"itemID={reward.id}"]:
+            with self.subTest(params):
+                data = self.compute(
+                    stats_queries.DropRateStats, f"sourceID={self.source.id}&{params}", {"game_id": self.game_id}
+                )
+                events = FarmEvent.objects.filter(user=self.user, game__id=self.game_id, source=self.source)
+                drops = FarmDrop.objects.filter(event__in=events)
+                if params:
+                    drops = drops.filter(reward=reward)
+                total = events.count()
+                self.assertEqual(data["total_events"], total)
+                self.assertEqual(data["events_with_item"], drops.values("event").distinct().count())
+                expected = {
+                    row["reward__rarity"]: round(row["n"] / total, 3)
+                    for row in drops.values("reward__rarity").annotate(n=Count("event", distinct=True))
+                }
+                self.assertEqual({row["rarity"]: row["drop_rate"] for row in data["drop_rate_by_rarity"]}, expected)
@@ -0,0 +1,78 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from farm import rollups
+from farm.models import FarmDrop, FarmEvent, FarmReward, FarmSource, Game
+
+User = get_user_model()
+
+
+class StatsSeriesTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.client.force_authenticate(self.user)
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.source = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        gema = FarmReward.objects.create(name="Gema", rarity="EPICO", source=self.source)
+        pieza = FarmReward.objects.create(name="Pieza", rarity="RARO", source=self.source)
+        # Tres años de historial con huecos
+        for date, quantities in [
+            (datetime.date(2022, 1, 3), [(gema, 2)]),
+            (datetime.date(2022, 1, 5), [(gema, 1), (pieza, 3)]),
+            (datetime.date(2023, 6, 1), [(pieza, 1)]),
+            (datetime.date(2024, 12, 31), []),
+        ]:
+            event = FarmEvent.objects.create(
+                user=self.user, game=self.game, source=self.source, farm_type="JEFE",
+                total_drops=sum(q for _, q in quantities), drop_count=len(quantities),
+            )
+            FarmEvent.objects.filter(pk=event.pk).update(date=date)
+            FarmDrop.objects.bulk_create([FarmDrop(event=event, reward=r, quantity=q) for r, q in quantities])
+        rollups.rebuild(game_id=self.game.id)
+
+    def get(self, name, params, kwargs=None):
+        response = self.client.get(reverse(name, kwargs=kwargs), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return response.data
+
+    def test_user_series_daily_range(self):
+        data = self.get("user-stats-series", {
+            "game_id": self.game.id, "start_date": "2022-01-01", "end_date": "2022-01-07",
+        })
+        self.assertEqual(data["bucket"], "day")
+        self.assertEqual([p["events"] for p in data["points"]], [0, 0, 1, 0, 1, 0, 0])
+        self.assertEqual(data["points"][4], {
+            "start": datetime.date(2022, 1, 5), "events": 1, "total_drops": 4, "avg_drops": 2.0,
+        })
+
+    def test_bounded_whole_history(self):
+        for name, kwargs, params in [
+            ("user-stats-series", None, {"game_id": self.game.id}),
+            ("farm-stats-series", {"game_id": self.game.id}, {}),
+        ]:
+            with self.subTest(name):
+                data = self.get(name, dict(params, max_points=20), kwargs)
+                self.assertEqual(data["bucket"], "month")
+                self.assertLessEqual(len(data["points"]), 20)
+                self.assertEqual(sum(p["events"] for p in data["points"]), 4)
+                self.assertEqual(sum(p["total_drops"] for p in data["points"]), 7)
+
+    def test_item_filter_and_global_matches_user(self):
+        data = self.get("user-stats-series", {"game_id": self.game.id, "bucket": "month", "item": "pieza"})
+        self.assertEqual(sum(p["total_drops"] for p in data["points"]), 4)
+
+        user = self.get("user-stats-series", {"game_id": self.game.id, "bucket": "week"})
+        farm = self.get("farm-stats-series", {"bucket": "week"}, {"game_id": self.game.id})
+        self.assertEqual(user["points"], farm["points"])
+
+    def test_invalid_params(self):
+        url = reverse("farm-stats-series", kwargs={"game_id": self.game.id})
+        for params in [{"bucket": "year"}, {"max_points": "0"}, {"startDate": "ayer"}]:
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(reverse("user-stats-series")).status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,74 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+
+from farm import rollups, synthetic
+from farm.models import FarmDrop, FarmEvent, FarmReward
+
+
+class SyntheticDatasetTest(TestCase):
+    def generate(self, seed=7, events=300):
+        dataset = synthetic.create_catalog(
+            users=8, games=2, sources_per_game=3, rewards_per_source=8, seed=seed, days=30,
+            end_date=datetime.date(2025, 6, 30),
+        )
+        synthetic.generate_events(dataset, events, batch_size=64)
+        synthetic.rebuild_derived(dataset.game_ids)
+        return dataset
+
+    def snapshot(self):
+        return [
+            (e.user.username, e.source.name, e.date, e.total_drops, e.drop_count,
+             sorted((d.reward.name, d.quantity) for d in e.drops.all()))
+            for e in FarmEvent.objects.select_related("user", "source")
+            .prefetch_related("drops__reward").order_by("id")
+        ]
+
+    def test_same_seed_same_data(self):
+        self.generate()
+        first = self.snapshot()
+        FarmEvent.objects.all().delete()
+        self.generate()
+        self.assertEqual(self.snapshot(), first)
+
+        FarmEvent.objects.all().delete()
+        self.generate(seed=8)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_consistent_totals_and_rollups(self):
+        dataset = self.generate()
+        self.assertEqual(FarmEvent.objects.count(), 300)
+        self.assertEqual(
+            FarmEvent.objects.aggregate(total=Sum("total_drops"))["total"],
+            FarmDrop.objects.aggregate(total=Sum("quantity"))["total"],
+        )
+        dates = FarmEvent.objects.values_list("date", flat=True)
+        self.assertGreaterEqual(min(dates), datetime.date(2025, 6, 1))
+        self.assertLessEqual(max(dates), datetime.date(2025, 6, 30))
+
+        # Las rarezas comunes dominan
+        common = FarmDrop.objects.filter(reward__rarity="COMUN").count()
+        legendary = FarmDrop.objects.filter(reward__rarity="LEGENDARIO").count()
+        self.assertGreater(common, legendary)
+
+        for game_id in dataset.game_ids:
+            summary, _ = rollups.farm_stats(game_id=game_id)
+            self.assertEqual(summary["total_events"], FarmEvent.objects.filter(game_id=game_id).count())
+
+    def test_command(self):
+        out = StringIO()
+        call_command("generate_farm_dataset", events=50, users=3, games=1, sources=2, rewards=4, stdout=out)
+        self.assertIn("Generados 50 eventos", out.getvalue())
+        self.assertEqual(FarmReward.objects.count(), 8)
+        self.assertLessEqual(FarmEvent.objects.latest("date").date, synthetic.DEFAULT_END_DATE)
+
+    def test_command_end_date(self):
+        call_command("generate_farm_dataset", "--end-date", "2024-01-31", "--days", "7",
+                     events=20, users=2, games=1, sources=1, rewards=2, stdout=StringIO())
+        dates = set(FarmEvent.objects.values_list("date", flat=True))
+        self.assertTrue(dates)
+        self.assertLessEqual(max(dates), datetime.date(2024, 1, 31))
+        self.assertGreaterEqual(min(dates), datetime.date(2024, 1, 25))
@@ -0,0 +1,21 @@
+from django.test import SimpleTestCase, override_settings
+
+from farm import checks
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+REDIS = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://cache:6379/0"}}
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    @override_settings(DEBUG=False, CACHES=LOCMEM)
+    def test_local_cache_is_an_error(self):
+        errors = checks.check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ["farm.E001"])
+
+    @override_settings(DEBUG=True, CACHES=LOCMEM)
+    def test_local_cache_allowed_in_debug(self):
+        self.assertEqual(checks.check_shared_cache(None), [])
+
+    @override_settings(DEBUG=False, CACHES=REDIS)
+    def test_shared_cache(self):
+        self.assertEqual(checks.check_shared_cache(None), [])
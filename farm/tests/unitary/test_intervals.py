@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from farm.intervals import parse_confidence, wilson_intervals
+
+
+class WilsonIntervalTest(TestCase):
+    def test_known_values(self):
+        # 10 éxitos de 100 con 95 %: [0.0552, 0.1744]
+        (low, high), = wilson_intervals([10], 100)
+        self.assertAlmostEqual(low, 0.0552, places=4)
+        self.assertAlmostEqual(high, 0.1744, places=4)
+
+    def test_bounds(self):
+        intervals = wilson_intervals([0, 5, 5], 5)
+        self.assertEqual(intervals[0][0], 0)
+        self.assertGreater(intervals[0][1], 0)
+        self.assertEqual(intervals[1][1], 1)
+        self.assertEqual(wilson_intervals([0], 0), [(0.0, 0.0)])
+
+    def test_higher_confidence_is_wider(self):
+        (low90, high90), = wilson_intervals([30], 200, 0.90)
+        (low99, high99), = wilson_intervals([30], 200, 0.99)
+        self.assertLess(low99, low90)
+        self.assertGreater(high99, high90)
+
+    def test_batch_matches_single_values(self):
+        successes = list(range(0, 201, 7)) + [200]
+        batch = wilson_intervals(successes, 200)
+        self.assertEqual(len(batch), len(successes))
+        for count, bounds in zip(successes, batch):
+            self.assertEqual(wilson_intervals([count], 200), [bounds])
+            self.assertIsInstance(bounds[0], float)
+        self.assertEqual(wilson_intervals([], 10), [])
+
+    def test_parse_confidence(self):
+        self.assertEqual(parse_confidence(None), 0.95)
+        self.assertEqual(parse_confidence("0.9"), 0.9)
+        for raw in ["0", "1", "abc"]:
+            with self.assertRaises(ValueError):
+                parse_confidence(raw)
@@ -0,0 +1,79 @@
+import random
+import statistics
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from farm.models import FarmDrop, FarmEvent, FarmReward, FarmSource, Game
+from farm.percentiles import group_percentiles, parse_percentiles
+from farm import rollups
+
+User = get_user_model()
+
+
+def exact_percentile(values, fraction):
+    values = sorted(values)
+    position = fraction * (len(values) - 1)
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+class PercentileEngineTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.source = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+
+        rng = random.Random(7)
+        self.expected = {}
+        for name, rarity, spread in [("Gema", "EPICO", 3), ("Núcleo", "RARO", 9), ("Corona", "LEGENDARIO", 1)]:
+            reward = FarmReward.objects.create(name=name, rarity=rarity, source=self.source)
+            quantities = [rng.randint(1, spread) for _ in range(rng.randint(1, 40))]
+            self.expected[(name, rarity)] = quantities
+            for quantity in quantities:
+                event = FarmEvent.objects.create(user=self.user, farm_type="JEFE", source=self.source, game=self.game)
+                FarmDrop.objects.create(event=event, reward=reward, quantity=quantity)
+
+    def test_matches_exact_percentiles(self):
+        fractions = [0, 0.25, 0.5, 0.75, 0.9, 1]
+        result = group_percentiles(FarmDrop.objects.all(), ("reward__name", "reward__rarity"), fractions)
+
+        self.assertEqual(set(result), set(self.expected))
+        for key, quantities in self.expected.items():
+            self.assertEqual(result[key][0.5], float(statistics.median(quantities)))
+            for fraction in fractions:
+                self.assertAlmostEqual(result[key][fraction], exact_percentile(quantities, fraction))
+
+    def test_single_query_for_all_groups(self):
+        with CaptureQueriesContext(connection) as ctx:
+            group_percentiles(FarmDrop.objects.all(), ("reward__name", "reward__rarity"), [0.25, 0.5])
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_parse_percentiles(self):
+        self.assertEqual(parse_percentiles("25, 75,90"), [25.0, 75.0, 90.0])
+        self.assertEqual(parse_percentiles(None), [])
+        with self.assertRaises(ValueError):
+            parse_percentiles("150")
+        with self.assertRaises(ValueError):
+            parse_percentiles("abc")
+
+    def test_stats_view_percentiles_param(self):
+        rollups.rebuild(game_id=self.game.id)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse("farm-stats", kwargs={"game_id": self.game.id})
+
+        response = client.get(url, {"percentiles": "25,90"})
+        self.assertEqual(response.status_code, 200)
+        for group in response.data["drops"]:
+            quantities = self.expected[(group["reward__name"], group["reward__rarity"])]
+            self.assertEqual(group["median_quantity"], float(statistics.median(quantities)))
+            self.assertAlmostEqual(group["percentiles"]["p25"], exact_percentile(quantities, 0.25))
+            self.assertAlmostEqual(group["percentiles"]["p90"], exact_percentile(quantities, 0.9))
+
+        self.assertEqual(client.get(url, {"percentiles": "x"}).status_code, 400)
@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from farm import ingest
+from farm.models import FarmReward, FarmSource, Game
+from farm.reward_cache import RewardCache, reward_cache
+
+User = get_user_model()
+
+
+class RewardCacheUnitTest(TestCase):
+    def test_lru_eviction_and_counters(self):
+        cache = RewardCache(maxsize=2)
+        cache.put((1, "a", "RARO"), 10)
+        cache.put((1, "b", "RARO"), 11)
+        self.assertEqual(cache.get((1, "a", "RARO")), 10)  # "a" pasa a ser el más reciente
+        cache.put((1, "c", "RARO"), 12)
+
+        self.assertIsNone(cache.get((1, "b", "RARO")))
+        self.assertEqual(cache.get((1, "c", "RARO")), 12)
+        self.assertEqual(cache.stats()["size"], 2)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_invalidate_by_reward_id(self):
+        cache = RewardCache(maxsize=10)
+        cache.put((1, "a", "RARO"), 10)
+        cache.invalidate(10)
+        self.assertIsNone(cache.get((1, "a", "RARO")))
+
+    def test_put_replaces_previous_key_of_the_same_id(self):
+        cache = RewardCache(maxsize=10)
+        cache.put((1, "a", "RARO"), 10)
+        cache.put((1, "b", "RARO"), 10)
+        self.assertIsNone(cache.get((1, "a", "RARO")))
+        cache.invalidate(10)
+        self.assertEqual(cache.stats()["size"], 0)
+
+
+class RewardCacheIntegrationTest(TestCase):
+    def setUp(self):
+        reward_cache.clear()
+        self.addCleanup(reward_cache.clear)
+
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.source = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+        self.url = reverse("farm-event-list", kwargs={"game_pk": self.game.id})
+        self.payload = {
+            "farm_type": "JEFE",
+            "source": self.source.id,
+            "drops": [{"reward_name": f"Ítem {i}", "rarity": "RARO", "quantity": 1} for i in range(10)],
+        }
+
+    def post(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, self.payload, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_warm_cache_skips_reward_queries(self):
+        self.post()
+        self.assertEqual(reward_cache.stats()["size"], 10)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.post()
+        reward_queries = [q for q in ctx.captured_queries if 'FROM "farm_farmreward"' in q["sql"]]
+        self.assertEqual(reward_queries, [])
+        self.assertEqual(reward_cache.hits, 10)
+
+    def test_saving_or_deleting_reward_invalidates(self):
+        self.post()
+        reward = FarmReward.objects.get(name="Ítem 0")
+
+        reward.name = "Renombrado"
+        reward.save()
+        self.assertIsNone(reward_cache.get((self.source.id, "Ítem 0", "RARO")))
+
+        other = FarmReward.objects.get(name="Ítem 1")
+        other.delete()
+        self.assertIsNone(reward_cache.get((self.source.id, "Ítem 1", "RARO")))
+
+        self.post()
+        self.assertTrue(FarmReward.objects.filter(name="Ítem 1").exists())
+
+
+class StaleRewardIdTest(TransactionTestCase):
+    """Otro proceso borró una recompensa que la caché de este proceso aún tiene."""
+
+    def setUp(self):
+        reward_cache.clear()
+        self.addCleanup(reward_cache.clear)
+        self.user = User.objects.create_user(username="player1", email="p1@correo.com", password="secret123")
+        self.game = Game.objects.create(name="Genshin Impact")
+        self.source = FarmSource.objects.create(name="Jefe", location="Mondstadt", source_type="JEFE", game=self.game)
+
+    def test_retries_without_the_cache(self):
+        reward = FarmReward.objects.create(name="Gema", rarity="EPICO", source=self.source)
+        key = (self.source.id, "Gema", "EPICO")
+        FarmReward.objects.filter(pk=reward.pk).delete()  # sin señales, como en otro worker
+        reward_cache.put(key, reward.pk)
+
+        [event] = ingest.create_events(self.game, self.user, [
+            {"farm_type": "JEFE", "source": self.source, "drops": [{"reward_name": "Gema", "rarity": "EPICO"}]},
+        ])
+        drop = event.drops.get()
+        self.assertNotEqual(drop.reward_id, reward.pk)
+        self.assertEqual(reward_cache.get(key), drop.reward_id)
@@ -0,0 +1,58 @@
+import random
+from bisect import bisect_left, bisect_right
+
+from django.test import SimpleTestCase
+
+from farm import percentiles, sketches
+
+FRACTIONS = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+
+def rank_error(ordered, value, fraction):
+    """Distancia entre ``fraction`` y el rango (con empates) de ``value`` en ``ordered``."""
+    low = bisect_left(ordered, value) / len(ordered)
+    high = bisect_right(ordered, value) / len(ordered)
+    return max(0, low - fraction, fraction - high)
+
+
+class QuantileSketchTest(SimpleTestCase):
+    def test_exact_while_small(self):
+        values = [3, 1, 4, 1, 5, 9, 2, 6]
+        sketch = sketches.QuantileSketch(k=50)
+        sketch.extend(values)
+        histogram = [(value, values.count(value)) for value in sorted(set(values))]
+        self.assertEqual(sketch.quantiles(FRACTIONS), percentiles._histogram_percentiles(histogram, FRACTIONS))
+
+    def test_bounded_rank_error_after_merging(self):
+        rng = random.Random(7)
+        values = [int(rng.lognormvariate(3, 1.2)) for _ in range(50000)]
+        # Un sketch por "día", combinados después
+        days = [sketches.QuantileSketch(k=200) for _ in range(50)]
+        for index, value in enumerate(values):
+            days[index % 50].update(value)
+        merged = sketches.QuantileSketch(k=200)
+        for day in days:
+            merged.merge(day)
+
+        self.assertEqual(len(merged), len(values))
+        self.assertLess(merged.retained(), 3 * 200)
+        ordered = sorted(values)
+        for fraction, value in merged.quantiles(FRACTIONS).items():
+            self.assertLess(rank_error(ordered, value, fraction), 0.02, fraction)
+        self.assertEqual((merged.min, merged.max), (ordered[0], ordered[-1]))
+
+    def test_serialization_round_trip(self):
+        sketch = sketches.QuantileSketch(k=20)
+        sketch.extend(range(1000))
+        loaded = sketches.QuantileSketch.from_bytes(sketch.to_bytes())
+        self.assertEqual((loaded.k, loaded.n, loaded.levels), (sketch.k, sketch.n, sketch.levels))
+        self.assertEqual(loaded.quantiles(FRACTIONS), sketch.quantiles(FRACTIONS))
+        self.assertEqual(sketches.load(None).quantiles([0.5]), {})
+
+    def test_group_quantiles_requires_every_sketch(self):
+        day = sketches.QuantileSketch()
+        day.extend([1, 2, 3])
+        rows = [("Gema", "EPICO", day.to_bytes()), ("Gema", "EPICO", day.to_bytes())]
+        self.assertEqual(sketches.group_quantiles(rows, [0.5]), {("Gema", "EPICO"): {0.5: 2.0}})
+        # Una fila sin sketch invalida el resultado: quien llama usa el motor exacto
+        self.assertIsNone(sketches.group_quantiles(rows + [("Pieza", "RARO", None)], [0.5]))
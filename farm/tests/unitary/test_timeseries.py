@@ -0,0 +1,54 @@
+import datetime
+from unittest import TestCase
+
+from farm.timeseries import build_series, choose_bucket, count_buckets, parse_bucket, parse_max_points
+
+D = datetime.date
+FIELDS = ("events",)
+
+
+class BuildSeriesTest(TestCase):
+    def test_fills_gaps_with_zeros(self):
+        rows = [{"bucket": D(2025, 1, 1), "events": 2}, {"bucket": D(2025, 1, 4), "events": 1}]
+        bucket, step, points = build_series(rows, "day", 100, fields=FIELDS)
+        self.assertEqual((bucket, step), ("day", 1))
+        self.assertEqual([p["events"] for p in points], [2, 0, 0, 1])
+        self.assertEqual(points[1]["start"], D(2025, 1, 2))
+
+    def test_explicit_range(self):
+        rows = [{"bucket": D(2025, 1, 6), "events": 3}]
+        _, _, points = build_series(rows, "week", 100, D(2025, 1, 1), D(2025, 1, 31), fields=FIELDS)
+        self.assertEqual([p["start"] for p in points][:2], [D(2024, 12, 30), D(2025, 1, 6)])
+        self.assertEqual([p["events"] for p in points], [0, 3, 0, 0, 0])
+
+    def test_downsampling_keeps_totals(self):
+        start = D(2020, 1, 1)
+        rows = [{"bucket": start + datetime.timedelta(days=i), "events": 1} for i in range(0, 2000, 3)]
+        for max_points, expected_bucket in [(400, "week"), (80, "month"), (10, "month")]:
+            bucket, step, points = build_series(rows, "day", max_points, fields=FIELDS)
+            self.assertEqual(bucket, expected_bucket)
+            self.assertLessEqual(len(points), max_points)
+            self.assertEqual(sum(p["events"] for p in points), len(rows))
+        self.assertGreater(step, 1)
+
+    def test_weeks_are_merged_not_converted_to_months(self):
+        start = datetime.date(2020, 1, 1)
+        rows = [{"bucket": start + datetime.timedelta(weeks=i), "events": 1} for i in range(300)]
+        bucket, step, points = build_series(rows, "week", 100, fields=FIELDS)
+        self.assertEqual((bucket, step), ("week", 3))
+        self.assertEqual(sum(p["events"] for p in points), 300)
+
+    def test_empty(self):
+        self.assertEqual(build_series([], "day", 10, fields=FIELDS), ("day", 1, []))
+        _, _, points = build_series([], "month", 10, D(2025, 1, 15), D(2025, 3, 1), fields=FIELDS)
+        self.assertEqual([p["events"] for p in points], [0, 0, 0])
+
+    def test_helpers(self):
+        self.assertEqual(count_buckets(D(2024, 11, 30), D(2025, 2, 1), "month"), 4)
+        self.assertEqual(choose_bucket(D(2020, 1, 1), D(2024, 1, 1), "day", 100), "month")
+        self.assertEqual(choose_bucket(None, None, "day", 300), "day")
+        self.assertEqual(parse_bucket(" Week "), "week")
+        self.assertEqual(parse_max_points(None), 200)
+        for parse, raw in [(parse_bucket, "year"), (parse_max_points, "1"), (parse_max_points, "x")]:
+            with self.assertRaises(ValueError):
+                parse(raw)
@@ -0,0 +1,133 @@
+"""
+Series temporales de estadísticas por día, semana o mes.
+
+La base de datos agrupa con Trunc* al tamaño pedido; aquí se rellenan con
+ceros los periodos sin datos y, si la serie tiene más de ``max_points``
+puntos, se pasa a un tamaño mayor (día -> semana -> mes) y después se unen
+periodos consecutivos. Como todos los valores son sumas, reagrupar es
+exacto y el tamaño de la respuesta queda acotado sea cual sea el historial.
+"""
+import datetime
+from math import ceil
+
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+BUCKETS = ["day", "week", "month"]
+TRUNC = {"day": TruncDay, "week": TruncWeek, "month": TruncMonth}
+DEFAULT_MAX_POINTS = 200
+MAX_POINTS_LIMIT = 1000
+
+
+def parse_bucket(raw):
+    bucket = (raw or "day").strip().lower()
+    if bucket not in BUCKETS:
+        raise ValueError(raw)
+    return bucket
+
+
+def parse_max_points(raw):
+    if raw is None or not raw.strip():
+        return DEFAULT_MAX_POINTS
+    value = int(raw)
+    if not 2 <= value <= MAX_POINTS_LIMIT:
+        raise ValueError(raw)
+    return value
+
+
+def trunc(bucket, field="date"):
+    """Expresión Trunc* de la base de datos para agrupar por ``bucket``."""
+    return TRUNC[bucket](field)
+
+
+def bucket_start(date, bucket):
+    if isinstance(date, datetime.datetime):
+        date = date.date()
+    if bucket == "week":
+        return date - datetime.timedelta(days=date.weekday())
+    if bucket == "month":
+        return date.replace(day=1)
+    return date
+
+
+def next_bucket(date, bucket):
+    if bucket == "day":
+        return date + datetime.timedelta(days=1)
+    if bucket == "week":
+        return date + datetime.timedelta(days=7)
+    return (date.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+
+def bucket_range(start, end, bucket):
+    """Inicio de cada periodo entre ``start`` y ``end`` (inclusive)."""
+    current = bucket_start(start, bucket)
+    while current <= end:
+        yield current
+        current = next_bucket(current, bucket)
+
+
+def count_buckets(start, end, bucket):
+    start = bucket_start(start, bucket)
+    end = bucket_start(end, bucket)
+    if bucket == "day":
+        return (end - start).days + 1
+    if bucket == "week":
+        return (end - start).days // 7 + 1
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def choose_bucket(start, end, bucket, max_points):
+    """Tamaño con el que agrupar en la base de datos si ya se conoce el rango."""
+    while start and end and bucket != "month" and count_buckets(start, end, bucket) > max_points:
+        bucket = BUCKETS[BUCKETS.index(bucket) + 1]
+    return bucket
+
+
+def build_series(rows, bucket, max_points, start=None, end=None, fields=()):
+    """
+    Serie rellenada y acotada a partir de ``rows`` ({"bucket": fecha, campo: suma}),
+    ya agrupadas por ``bucket`` en la base de datos. Devuelve
+    (tamaño efectivo, periodos por punto, [{"start": fecha, campo: suma}]).
+    """
+    totals = {}
+    for row in rows:
+        key = bucket_start(row["bucket"], bucket)
+        point = totals.setdefault(key, dict.fromkeys(fields, 0))
+        for field in fields:
+            point[field] += row.get(field) or 0
+
+    if not totals and start is None:
+        return bucket, 1, []
+    start = start or min(totals)
+    end = end or max(max(totals, default=start), start)
+
+    # Subir de tamaño hasta que quepa. Solo desde días: una semana puede caer
+    # en dos meses, así que semanas no se pueden reagrupar en meses exactos.
+    if bucket == "day":
+        daily = totals
+        for coarser in ("week", "month"):
+            if count_buckets(start, end, bucket) <= max_points:
+                break
+            bucket = coarser
+            totals = {}
+            for key, point in daily.items():
+                target = totals.setdefault(bucket_start(key, bucket), dict.fromkeys(fields, 0))
+                for field in fields:
+                    target[field] += point[field]
+
+    points = [
+        dict(totals.get(key) or dict.fromkeys(fields, 0), start=key)
+        for key in bucket_range(start, end, bucket)
+    ]
+
+    # Aún no cabe: unir ``step`` periodos consecutivos por punto
+    step = ceil(len(points) / max_points) if len(points) > max_points else 1
+    if step > 1:
+        merged = []
+        for i in range(0, len(points), step):
+            chunk = points[i:i + step]
+            merged.append(dict(
+                {field: sum(point[field] for point in chunk) for field in fields},
+                start=chunk[0]["start"],
+            ))
+        points = merged
+    return bucket, step, points
@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework_nested import routers
+from . import async_views
 from .views import (
     GameViewSet,
     FarmEventViewSet,
@@ -8,7 +9,12 @@ from .views import (
     FarmStatsView,
     DropRateStatsView,
     FarmHistoryView,
+    FarmHistoryExportView,
     UserStatsView,
+    UserStatsSeriesView,
+    FarmStatsSeriesView,
+    LeaderboardView,
+    LeaderboardRankView,
 )
 
 # Router principal
@@ -20,12 +26,12 @@ games_router = routers.NestedSimpleRouter(router, r'games', lookup='game')
 games_router.register(r'farm-events', FarmEventViewSet, basename='farm-event')
 games_router.register(r'farm-sources', FarmSourceViewSet, basename='farm-source')
 
+# Las rutas explícitas van antes que los routers: si no, "farm-events/history/"
+# coincidiría con el detalle "farm-events/<pk>/".
 urlpatterns = [
-    path('', include(router.urls)),          # /api/games/
-    path('', include(games_router.urls)),    # /api/games/<id>/...
-    
     # 🔹 Estadísticas personales
     path('user-stats/', UserStatsView.as_view(), name='user-stats'),
+    path('user-stats/series/', UserStatsSeriesView.as_view(), name='user-stats-series'),
     
     # 🔹 Endpoints con ID de juego
     path('games/<int:game_id>/farm-sources/<int:source_id>/rewards/', 
@@ -34,9 +40,37 @@ urlpatterns = [
     path('games/<int:game_id>/farm-stats/', 
          FarmStatsView.as_view(), name='farm-stats'),
 
+    path('games/<int:game_id>/farm-stats/series/',
+         FarmStatsSeriesView.as_view(), name='farm-stats-series'),
+
     path('games/<int:game_id>/stats/drop-rate/', 
          DropRateStatsView.as_view(), name='drop-rate-stats'),
          
     path('games/<int:game_id>/farm-events/history/', 
          FarmHistoryView.as_view(), name='farm-history'),
+
+    path('games/<int:game_id>/farm-events/export/',
+         FarmHistoryExportView.as_view(), name='farm-history-export'),
+
+    path('games/<int:game_id>/leaderboards/<str:board>/',
+         LeaderboardView.as_view(), name='leaderboard'),
+
+    path('games/<int:game_id>/leaderboards/<str:board>/rank/',
+         LeaderboardRankView.as_view(), name='leaderboard-rank'),
+
+    # 🔹 Versiones asíncronas de las estadísticas (servidor ASGI)
+    path('async/user-stats/', async_views.user_stats, name='user-stats-async'),
+    path('async/user-stats/series/', async_views.user_stats_series, name='user-stats-series-async'),
+
+    path('async/games/<int:game_id>/farm-stats/',
+         async_views.farm_stats, name='farm-stats-async'),
+
+    path('async/games/<int:game_id>/farm-stats/series/',
+         async_views.farm_stats_series, name='farm-stats-series-async'),
+
+    path('async/games/<int:game_id>/stats/drop-rate/',
+         async_views.drop_rate_stats, name='drop-rate-stats-async'),
+
+    path('', include(router.urls)),          # /api/games/
+    path('', include(games_router.urls)),    # /api/games/<id>/...
 ]
\ No newline at end of file
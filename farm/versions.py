@@ -0,0 +1,88 @@
+"""
+Versiones de datos guardadas en la caché de Django.
+
+Cada ámbito (juego, usuario, catálogo de cada juego) tiene un token que cambia cada vez
+que se escriben sus datos. Las respuestas cacheadas y los ETag incluyen los
+tokens, así que invalidar es solo cambiar un token: nunca hay que recorrer
+ni borrar entradas.
+
+Los tokens solo sirven si todos los procesos ven la misma caché: con una en
+memoria local, cada worker tiene los suyos y no se entera de las escrituras
+de los demás. Fuera de DEBUG, farm.checks exige un backend compartido.
+"""
+import itertools
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+KEY_PREFIX = "farm:version"
+# Token de la lista de juegos; las fuentes y recompensas de cada juego usan ("catalog", game_id)
+CATALOG = "all"
+# Ámbito de los juegos con eventos modificados o borrados (ver bump)
+REWRITE = "game-rewrite"
+_counter = itertools.count()
+# Backends cuyo contenido no ven otros procesos
+PROCESS_LOCAL_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def shared_cache():
+    """True si la caché por defecto es visible desde todos los procesos."""
+    return settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_BACKENDS
+
+
+def _key(scope, ident):
+    return f"{KEY_PREFIX}:{scope}:{ident}"
+
+
+def _new_token():
+    # Único entre procesos y llamadas: no depende de incr(), que no es atómico en todos los backends
+    return f"{time.time_ns():x}.{os.getpid():x}.{next(_counter):x}"
+
+
+def get_versions(pairs):
+    """Devuelve los tokens de una lista de (ámbito, id), creándolos si faltan."""
+    keys = [_key(scope, ident) for scope, ident in pairs]
+    found = cache.get_many(keys)
+    tokens = []
+    for key in keys:
+        token = found.get(key)
+        if token is None:
+            cache.add(key, _new_token(), timeout=None)
+            token = cache.get(key)
+        tokens.append(token)
+    return tokens
+
+
+def bump(game_ids=(), user_ids=(), catalog=False, rewritten_game_ids=(), catalog_game_ids=()):
+    """
+    Cambia los tokens ahora y otra vez tras el commit: una lectura hecha entre
+    ambos momentos (con datos aún sin confirmar) queda guardada bajo un token
+    que ya no se usará.
+
+    ``rewritten_game_ids`` son juegos en los que se han modificado o borrado
+    eventos ya existentes (no solo añadido): quien lee de forma incremental
+    por id (farm.cube) tiene que recargarlos enteros.
+
+    ``catalog`` cambia el token de la lista de juegos y ``catalog_game_ids``
+    el catálogo (fuentes y recompensas) de esos juegos.
+    """
+    keys = [_key("game", ident) for ident in set(game_ids)]
+    keys += [_key("user", ident) for ident in set(user_ids)]
+    keys += [_key(REWRITE, ident) for ident in set(rewritten_game_ids)]
+    keys += [_key("catalog", ident) for ident in set(catalog_game_ids)]
+    if catalog:
+        keys.append(_key("catalog", CATALOG))
+    if not keys:
+        return
+
+    def apply():
+        cache.set_many({key: _new_token() for key in keys}, timeout=None)
+
+    apply()
+    transaction.on_commit(apply)
@@ -1,12 +1,21 @@
-from rest_framework import viewsets, permissions, generics
+import copy
+
+from rest_framework import viewsets, permissions, generics, serializers, status
+from rest_framework.decorators import action
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db.models import Sum, Avg, Count, Min, Max, F, StdDev, Prefetch
-from statistics import median
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.db import transaction
+from django.db.models import Prefetch
 from .models import FarmEvent, FarmReward, FarmSource, FarmDrop, Game
+from . import catalog, export, ingest, leaderboards, rollups, stats_queries
+from .conditional import conditional_get
+from .stats_cache import cached_stats
+from .pagination import DateIdCursorPagination
 from .serializers import (
     FarmEventSerializer,
-    FarmDropSerializer,
     FarmSourceSerializer,
     FarmRewardSerializer,
     GameSerializer,
@@ -49,6 +58,30 @@ class FarmSourceViewSet(viewsets.ReadOnlyModelViewSet):
     
         return queryset
 
+    # Con renderer JSON se responde desde el snapshot en memoria (farm.catalog);
+    # el API navegable y otros formatos siguen el camino normal.
+    def _json_snapshot(self, request):
+        game_id = self.kwargs["game_pk"]
+        if request.accepted_renderer.format != "json" or not game_id.isdigit():
+            return None
+        return catalog.get_snapshot(game_id)
+
+    @conditional_get("catalog")
+    def list(self, request, *args, **kwargs):
+        snapshot = self._json_snapshot(request)
+        if snapshot is None:
+            return super().list(request, *args, **kwargs)
+        body = snapshot.render(request.query_params.get("source_type"))
+        return HttpResponse(body, content_type="application/json")
+
+    @conditional_get("catalog")
+    def retrieve(self, request, *args, **kwargs):
+        snapshot = self._json_snapshot(request)
+        body = snapshot.get(int(kwargs["pk"])) if snapshot and kwargs["pk"].isdigit() else None
+        if body is None:
+            return super().retrieve(request, *args, **kwargs)
+        return HttpResponse(body, content_type="application/json")
+
 
 # -------------------------------
 # Eventos de farmeo
@@ -56,10 +89,12 @@ class FarmSourceViewSet(viewsets.ReadOnlyModelViewSet):
 class FarmEventViewSet(viewsets.ModelViewSet):
     serializer_class = FarmEventSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = DateIdCursorPagination
 
     def get_queryset(self):
         game_id = self.kwargs.get("game_pk")
-        return FarmEvent.objects.filter(game_id=game_id)
+        # total_drops es una columna; solo los drops anidados necesitan prefetch
+        return FarmEvent.objects.filter(game_id=game_id).prefetch_related("drops")
 
     def perform_create(self, serializer):
         game_id = self.kwargs.get("game_pk")
@@ -73,6 +108,72 @@ class FarmEventViewSet(viewsets.ModelViewSet):
 
         serializer.save(user=self.request.user, game=game)
 
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request, game_pk=None):
+        """
+        Carga masiva: recibe una lista de eventos (o {"events": [...]}) con sus
+        drops, valida todos y escribe los válidos en una sola transacción.
+        Devuelve el resultado de cada ítem por índice.
+        """
+        try:
+            game = Game.objects.get(id=game_pk)
+        except Game.DoesNotExist:
+            return Response({"error": "El juego especificado no existe."}, status=404)
+
+        items = request.data.get("events") if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Se requiere una lista de eventos."}, status=400)
+
+        max_events = getattr(settings, "FARM_BULK_MAX_EVENTS", 500)
+        if len(items) > max_events:
+            return Response({"error": f"Máximo {max_events} eventos por petición."}, status=400)
+
+        # Fuentes del juego precargadas: la validación no consulta la BD por ítem
+        context = self.get_serializer_context()
+        context["sources"] = {source.pk: source for source in FarmSource.objects.filter(game=game)}
+
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            serializer = self.get_serializer_class()(data=item, context=context)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                results[index] = {"index": index, "status": "error", "errors": serializer.errors}
+
+        if valid:
+            events = ingest.create_events(game, request.user, [data for _, data in valid])
+            for (index, _), event in zip(valid, events):
+                results[index] = {"index": index, "status": "created", "id": event.id}
+
+        failed = len(items) - len(valid)
+        if not valid:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif failed:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+
+        return Response(
+            {"created": len(valid), "failed": failed, "results": results},
+            status=response_status,
+        )
+
+    def perform_update(self, serializer):
+        before = copy.copy(serializer.instance)
+        drops = list(serializer.instance.drops.all())
+        with transaction.atomic():
+            event = serializer.save()
+            # Los rollups no se pueden "restar" (min/max): se recalcula el día del evento
+            rollups.rebuild(game_id=event.game_id, start_date=event.date, end_date=event.date)
+            ingest.update_totals(removed=[(before, drops)], added=[(event, drops)])
+
+    def perform_destroy(self, instance):
+        entry = (copy.copy(instance), list(instance.drops.all()))
+        with transaction.atomic():
+            instance.delete()
+            ingest.record_removed([entry])
+
     
 # -------------------------------
 # Listar las recompensas posibles de un jefe específico dentro de un juego
@@ -86,6 +187,10 @@ class FarmSourceRewardsView(generics.ListAPIView):
         source_id = self.kwargs.get('source_id')
         return FarmReward.objects.filter(source__id=source_id, source__game__id=game_id)
 
+    @conditional_get("catalog")
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 # -------------------------------
 # Estadísticas generales de farmeo
 # -------------------------------
@@ -95,190 +200,129 @@ class FarmSourceRewardsView(generics.ListAPIView):
 class UserStatsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @conditional_get("user")
+    @cached_stats("user")
     def get(self, request):
-        user = request.user
-        game_id = request.query_params.get("game_id")
-        source_name = request.query_params.get("source")  # nombre del jefe/dominio
-        item_name = request.query_params.get("item")       # nombre del ítem
-        start_date = request.query_params.get("start_date")
-        end_date = request.query_params.get("end_date")
+        stats = stats_queries.UserStats(request.user, request.query_params, self.kwargs)
+        if stats.error:
+            return Response({"error": stats.error}, status=400)
+        return Response(stats.payload(stats_queries.run(stats.parts())))
 
-        if not game_id:
-            return Response({"error": "Debe especificar un game_id."}, status=400)
-
-        # --- Filtrar eventos base ---
-        events = FarmEvent.objects.filter(user=user, game__id=game_id)
-
-        if source_name:
-            events = events.filter(source__name__iexact=source_name)  # búsqueda por nombre
-
-        # --- Filtro por fecha (rango inclusivo) ---
-        if start_date:
-            events = events.filter(date__gte=start_date)
-        if end_date:
-            events = events.filter(date__lte=end_date)
-
-        # --- Drops relacionados (solo de los eventos filtrados) ---
-        drops = FarmDrop.objects.filter(event__in=events)
-
-        if item_name:
-            drops = drops.filter(reward__name__iexact=item_name)
-
-        # --- Cálculos principales ---
-        total_events = events.count()
-        total_drops = drops.aggregate(total=Sum("quantity"))["total"] or 0
-        avg_drops = drops.aggregate(avg=Avg("quantity"))["avg"] or 0
-
-        # --- Agrupar por ítem ---
-        drops_grouped = (
-            drops.values("reward__name", "reward__rarity")
-            .annotate(
-                total_quantity=Sum("quantity"),
-                avg_quantity=Avg("quantity"),
-                min_quantity=Min("quantity"),
-                max_quantity=Max("quantity"),
-                drop_count=Count("id"),
-            )
-            .order_by("-total_quantity")
-        )
-
-        # --- Distribución por tipo (JEFE, DOMINIO, etc.) ---
-        by_type = (
-            events.values("source__name", "farm_type")
-            .annotate(count=Count("id"))
-            .order_by("source__name")
-        )
+class UserStatsSeriesView(APIView):
+    """
+    Serie temporal personal (?game_id=, obligatorio). Filtros: source, item,
+    start_date, end_date. bucket=day|week|month; max_points acota el número de
+    puntos (se agrupa en periodos mayores si hace falta). Periodos sin datos a 0.
+    """
+    permission_classes = [permissions.IsAuthenticated]
 
-        # --- Promedio de drops por día ---
-        by_day = (
-            events.values("date")
-            .annotate(avg_drops=Avg("drops__quantity"))
-            .order_by("date")
-        )
+    @conditional_get("user")
+    @cached_stats("user")
+    def get(self, request):
+        stats = stats_queries.UserSeries(request.user, request.query_params, self.kwargs)
+        if stats.error:
+            return Response({"error": stats.error}, status=400)
+        return Response(stats.payload(stats_queries.run(stats.parts())))
 
-        return Response({
-            "user": user.username,
-            "game_id": game_id,
-            "filters": {
-                "source": source_name,
-                "item": item_name,
-                "start_date": start_date,
-                "end_date": end_date,
-            },
-            "summary": {
-                "total_events": total_events,
-                "total_drops": total_drops,
-                "avg_drops": round(avg_drops, 2),
-            },
-            "drops": drops_grouped,
-            "by_type": list(by_type),
-            "by_day": list(by_day),
-        })
-    
 # --------------------
 # Probabilidad de drop
 # --------------------
 class DropRateStatsView(APIView):
+    """
+    Probabilidad de drop del usuario en una fuente (?sourceID=, obligatorio).
+    - itemID: ID de una recompensa, o "all" para la tabla de todas las
+      recompensas de la fuente con intervalo de Wilson
+    - confidence: nivel del intervalo en modo "all" (por defecto 0.95)
+    - scope: "user" (por defecto) o "global", la tasa de toda la comunidad
+      leída de los agregados de farm.community en tiempo constante
+    """
     permission_classes = [permissions.IsAuthenticated]
 
+    @conditional_get("audience")
+    @cached_stats("audience")
     def get(self, request, game_id):
-        user = request.user
-        source_id = request.query_params.get("sourceID")
-        item_id = request.query_params.get("itemID")
-
-        if not source_id:
-            return Response({"error": "Se requiere el parámetro sourceID."}, status=400)
-
-        # Eventos del usuario para esa fuente
-        total_events = FarmEvent.objects.filter(
-            user=user, game__id=game_id, source__id=source_id
-        ).count()
-
-        if total_events == 0:
-            return Response({
-                "message": "No hay eventos registrados para esta fuente.",
-                "drop_rate": 0
-            })
-
-        # Eventos en los que cayó el ítem (si se especifica)
-        drops_qs = FarmDrop.objects.filter(
-            event__user=user,
-            event__game__id=game_id,
-            event__source__id=source_id
-        )
-
-        if item_id:
-            drops_qs = drops_qs.filter(reward__id=item_id)
-
-        # Número de eventos únicos donde cayó ese ítem
-        events_with_item = drops_qs.values("event").distinct().count()
+        stats = stats_queries.DropRateStats(request.user, request.query_params, self.kwargs)
+        if stats.error:
+            return Response({"error": stats.error}, status=400)
+        return Response(stats.payload(stats_queries.run(stats.parts())))
 
-        # Drop rate base
-        drop_rate = events_with_item / total_events if total_events else 0
-
-        # --- Drop rate por rareza ---
-        rarity_data = drops_qs.values("reward__rarity").annotate(
-            event_count=Count("event", distinct=True)
-        )
-
-        drop_rate_by_rarity = [
-            {
-                "rarity": r["reward__rarity"],
-                "drop_rate": round(r["event_count"] / total_events, 3)
-            }
-            for r in rarity_data
-        ]
-
-        return Response({
-            "game_id": game_id,
-            "source_id": source_id,
-            "item_id": item_id,
-            "total_events": total_events,
-            "events_with_item": events_with_item,
-            "drop_rate": round(drop_rate, 3),
-            "drop_rate_by_rarity": drop_rate_by_rarity
-        })
-    
 # ---------------------
 # Historial de eventos
 # ---------------------
 class FarmHistoryView(generics.ListAPIView):
+    """
+    Historial paginado por cursor (?cursor=, ?page_size=), del más reciente
+    al más antiguo. Filtros opcionales: user, gameID, sourceID, type.
+    """
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = FarmEventSerializer
+    pagination_class = DateIdCursorPagination
 
     def get_queryset(self):
-        user_param = self.request.query_params.get('user')
-        game_id = self.request.query_params.get('gameID')
-        source_id = self.request.query_params.get('sourceID')
-        type_param = self.request.query_params.get('type')
-
-        # Si se pasa ?user=, buscar ese usuario; si no, usar el autenticado
-        if user_param:
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            try:
-                user = User.objects.get(username=user_param)
-            except User.DoesNotExist:
-                return FarmEvent.objects.none()
-        else:
-            user = self.request.user
+        # Prefetch para traer los drops relacionados en una sola consulta
+        return history_events(self.request).prefetch_related(
+            Prefetch('drops', queryset=FarmDrop.objects.select_related('reward'))
+        )
 
-        # Base query
-        queryset = FarmEvent.objects.filter(user=user).order_by('-date')
 
-        # Filtros opcionales
-        if game_id:
-            queryset = queryset.filter(game__id=game_id)
-        if source_id:
-            queryset = queryset.filter(source__id=source_id)
-        if type_param:
-            queryset = queryset.filter(source__type__iexact=type_param)
+def history_events(request):
+    """Eventos del historial con los filtros de la petición (user, gameID, sourceID, type)."""
+    user_param = request.query_params.get('user')
+    game_id = request.query_params.get('gameID')
+    source_id = request.query_params.get('sourceID')
+    type_param = request.query_params.get('type')
+
+    # Si se pasa ?user=, buscar ese usuario; si no, usar el autenticado
+    if user_param:
+        from django.contrib.auth import get_user_model
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=user_param)
+        except User.DoesNotExist:
+            return FarmEvent.objects.none()
+    else:
+        user = request.user
+
+    # Base query (el orden -date, -id lo fija quien la usa)
+    queryset = FarmEvent.objects.filter(user=user)
+
+    # Filtros opcionales
+    if game_id:
+        queryset = queryset.filter(game__id=game_id)
+    if source_id:
+        queryset = queryset.filter(source__id=source_id)
+    if type_param:
+        queryset = queryset.filter(farm_type__iexact=type_param)
+    return queryset
+
+
+class FarmHistoryExportView(APIView):
+    """
+    Exporta el historial completo en streaming, con los mismos filtros que
+    FarmHistoryView. ?output=csv (por defecto, una fila por drop) o
+    ?output=ndjson (una línea por evento con sus drops). Solo los eventos
+    del juego de la URL; el historial de otro usuario (?user=) solo lo puede
+    exportar el staff.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, game_id):
+        output = request.query_params.get("output", "csv").strip().lower()
+        if output not in export.FORMATS:
+            return Response({"error": "output debe ser csv o ndjson."}, status=400)
+
+        user_param = request.query_params.get("user")
+        if user_param and user_param != request.user.get_username() and not request.user.is_staff:
+            return Response({"error": "Solo puedes exportar tu propio historial."}, status=403)
+
+        chunks = export.stream(history_events(request).filter(game_id=game_id), output)
+        if isinstance(request._request, ASGIRequest):
+            chunks = export.aiter_chunks(chunks)
+        content_type, extension = export.FORMATS[output]
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="farm-history.{extension}"'
+        return response
 
-        # Prefetch para traer los drops relacionados en una sola consulta
-        return queryset.prefetch_related(
-            Prefetch('farmdrop_set', queryset=FarmDrop.objects.select_related('reward'))
-        )
-    
 # -----------------------
 # Vista de Estadisticas Globales
 # -----------------------
@@ -287,6 +331,14 @@ class GameViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = GameSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @conditional_get("catalog")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get("catalog")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 class FarmStatsView(APIView):
     """
     Estadísticas globales por juego, con filtros opcionales:
@@ -294,82 +346,69 @@ class FarmStatsView(APIView):
     - sourceID: ID de la fuente
     - itemID: ID del ítem
     - startDate / endDate: rango de fechas
+    - percentiles: percentiles extra por ítem, p. ej. "25,75,90"
+
+    Mediana y percentiles salen de los sketches diarios de los rollups
+    (FARM_PERCENTILES_ENGINE="sketch") o de FarmDrop ("exact").
     """
     permission_classes = [permissions.IsAuthenticated]
 
+    @conditional_get("game")
+    @cached_stats("game")
     def get(self, request, game_id):
-        # Filtros
-        type_filter = request.query_params.get("type")          # tipo de farmevent
-        source_id = request.query_params.get("sourceID")        # ID de jefe/fuente
-        item_id = request.query_params.get("itemID")            # ID de ítem
-        start_date = request.query_params.get("startDate")      # YYYY-MM-DD
-        end_date = request.query_params.get("endDate")          # YYYY-MM-DD
-
-        # Base: todos los eventos del juego
-        events = FarmEvent.objects.filter(game__id=game_id)
-
-        # Filtrar por tipo
-        if type_filter:
-            events = events.filter(farm_type__iexact=type_filter)
-
-        # Filtrar por fuente
-        if source_id:
-            events = events.filter(source__id=source_id)
-
-        # Filtrar por fechas (rango inclusivo)
-        if start_date and end_date:
-            events = events.filter(date__range=[start_date, end_date])
-        elif start_date:
-            events = events.filter(date__gte=start_date)
-        elif end_date:
-            events = events.filter(date__lte=end_date)
-
-        # Drops relacionados
-        drops = FarmDrop.objects.filter(event__in=events)
-        if item_id:
-            drops = drops.filter(reward__id=item_id)
-
-        # Estadísticas generales
-        total_events = events.count()
-        total_drops = drops.aggregate(total=Sum('quantity'))['total'] or 0
-        avg_drops = drops.aggregate(avg=Avg('quantity'))['avg'] or 0
-
-        # Agrupar por ítem y rareza
-        drops_grouped = (
-            drops.values("reward__name", "reward__rarity")
-            .annotate(
-                total_quantity=Sum("quantity"),
-                avg_quantity=Avg("quantity"),
-                min_quantity=Min("quantity"),
-                max_quantity=Max("quantity"),
-                drop_count=Count("id"),
-                stddev_quantity=StdDev("quantity"),
-            )
-            .order_by("-total_quantity")
-        )
+        stats = stats_queries.FarmStats(request.user, request.query_params, self.kwargs)
+        if stats.error:
+            return Response({"error": stats.error}, status=400)
+        return Response(stats.payload(stats_queries.run(stats.parts())))
+
+
+class FarmStatsSeriesView(APIView):
+    """
+    Serie temporal global por juego, desde los rollups diarios. Filtros: type,
+    sourceID, itemID, startDate, endDate; bucket y max_points como en
+    UserStatsSeriesView.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @conditional_get("game")
+    @cached_stats("game")
+    def get(self, request, game_id):
+        stats = stats_queries.FarmSeries(request.user, request.query_params, self.kwargs)
+        if stats.error:
+            return Response({"error": stats.error}, status=400)
+        return Response(stats.payload(stats_queries.run(stats.parts())))
+
+
+# -----------------------------
+# Rankings por juego
+# -----------------------------
+class LeaderboardView(APIView):
+    """
+    Top de un ranking del juego (board: runs, legendary o luck). Filtros:
+    sourceID (sin él, el juego completo) y limit (10 por defecto, máx. 100).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @conditional_get("game")
+    @cached_stats("game")
+    def get(self, request, game_id, board):
+        stats = leaderboards.Top(request.user, request.query_params, self.kwargs)
+        if stats.error:
+            return Response({"error": stats.error}, status=400)
+        return Response(stats.payload(stats_queries.run(stats.parts())))
+
+
+class LeaderboardRankView(APIView):
+    """
+    Posición de un usuario en un ranking del juego: ?user=<username>, por
+    defecto el autenticado. Mismo sourceID que LeaderboardView.
+    """
+    permission_classes = [permissions.IsAuthenticated]
 
-        # Calcular mediana manualmente
-        for g in drops_grouped:
-            quantities = list(
-                drops.filter(
-                    reward__name=g["reward__name"],
-                    reward__rarity=g["reward__rarity"]
-                ).values_list("quantity", flat=True)
-            )
-            g["median_quantity"] = float(median(quantities)) if quantities else 0
-
-        return Response({
-            "game_id": game_id,
-            "filters": {
-                "type": type_filter,
-                "sourceID": source_id,
-                "itemID": item_id,
-                "date_range": [start_date, end_date],
-            },
-            "summary": {
-                "total_events": total_events,
-                "total_drops": total_drops,
-                "avg_drops": round(avg_drops, 2),
-            },
-            "drops": drops_grouped
-        })
\ No newline at end of file
+    @conditional_get("game", "user")
+    @cached_stats("game", "user")
+    def get(self, request, game_id, board):
+        stats = leaderboards.Rank(request.user, request.query_params, self.kwargs)
+        if stats.error:
+            return Response({"error": stats.error}, status=400)
+        return Response(stats.payload(stats_queries.run(stats.parts())))
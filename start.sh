@@ -1,10 +1,25 @@
 #!/usr/bin/env bash
 
+echo "🔎 Comprobando la configuración..."
+# Falla si, p. ej., la caché no es compartida entre workers (farm.E001)
+python manage.py check --deploy --fail-level ERROR || exit 1
+
 echo "🗂 Aplicando migraciones..."
 python manage.py migrate --noinput
+# Solo crea algo con CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache
+python manage.py createcachetable
 
 echo "📦 Recopilando archivos estáticos..."
 python manage.py collectstatic --noinput
 
 echo "🚀 Iniciando servidor..."
-gunicorn statsprime.wsgi:application --bind 0.0.0.0:$PORT
\ No newline at end of file
+if [ "$SERVER_MODE" = "asgi" ]; then
+    # Necesario para las vistas asíncronas de estadísticas (/api/async/...). El resto
+    # de la API (vistas síncronas) corre en hilos de cada worker: varios workers para
+    # que una petición lenta no frene a las demás. Sin /api/async/, mejor el modo WSGI.
+    gunicorn statsprime.asgi:application -k uvicorn.workers.UvicornWorker \
+        --workers "${GUNICORN_WORKERS:-4}" --bind 0.0.0.0:$PORT
+else
+    # Hilos por worker: comparten el pool de conexiones (DB_POOL=True, DB_POOL_MAX_SIZE >= GUNICORN_THREADS)
+    gunicorn statsprime.wsgi:application -k gthread --threads "${GUNICORN_THREADS:-4}" --bind 0.0.0.0:$PORT
+fi
\ No newline at end of file
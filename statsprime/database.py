@@ -0,0 +1,73 @@
+"""
+DATABASES['default'] a partir de variables de entorno.
+
+- Sin ``DATABASE_URL``: SQLite local (``db.sqlite3``), para desarrollo y tests.
+- PostgreSQL sin pool: conexiones persistentes de ``DB_CONN_MAX_AGE``
+  segundos por hilo, como hasta ahora, con health check al reutilizarlas.
+- PostgreSQL con ``DB_POOL=True``: pool nativo de psycopg 3 (Django >= 5.1)
+  compartido por los hilos del proceso, entre ``DB_POOL_MIN_SIZE`` y
+  ``DB_POOL_MAX_SIZE`` conexiones. Cada conexión se comprueba al sacarla
+  del pool y se recicla tras ``DB_POOL_MAX_LIFETIME`` segundos, así que un
+  reciclado de worker ya no paga el handshake TLS en la primera petición.
+
+SSL (``DB_SSL_REQUIRE``) solo se aplica a PostgreSQL.
+"""
+import os
+
+import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
+
+POSTGRES_ENGINES = ("django.db.backends.postgresql", "django.contrib.gis.db.backends.postgis")
+
+
+def _bool(env, name, default):
+    return env.get(name, str(default)) == "True"
+
+
+def database_config(base_dir, env=None):
+    env = os.environ if env is None else env
+    url = env.get("DATABASE_URL")
+    if not url:
+        return {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": str(base_dir / "db.sqlite3"),
+        }
+
+    engine = dj_database_url.parse(url)["ENGINE"]
+    postgres = engine in POSTGRES_ENGINES
+    pooled = postgres and _bool(env, "DB_POOL", False)
+
+    config = dj_database_url.parse(
+        url,
+        # Con pool las conexiones las guarda el pool: Django exige CONN_MAX_AGE=0
+        conn_max_age=0 if pooled else int(env.get("DB_CONN_MAX_AGE", "600")),
+        conn_health_checks=True,
+        ssl_require=postgres and _bool(env, "DB_SSL_REQUIRE", True),
+    )
+    if pooled:
+        min_size = int(env.get("DB_POOL_MIN_SIZE", "2"))
+        max_size = int(env.get("DB_POOL_MAX_SIZE", "4"))
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ImproperlyConfigured("DB_POOL_MIN_SIZE y DB_POOL_MAX_SIZE: 0 <= mínimo <= máximo, máximo >= 1.")
+        config.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": min_size,
+            "max_size": max_size,
+            # Segundos esperando una conexión libre antes de fallar
+            "timeout": float(env.get("DB_POOL_TIMEOUT", "10")),
+            "max_idle": float(env.get("DB_POOL_MAX_IDLE", "600")),
+            "max_lifetime": float(env.get("DB_POOL_MAX_LIFETIME", "3600")),
+        }
+    return config
+
+
+def pool_stats():
+    """{alias: métricas de psycopg_pool} de los pools abiertos en este proceso."""
+    from django.db import connections  # este módulo se importa desde settings
+
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        pool = getattr(connection, "pool", None) if connection.vendor == "postgresql" else None
+        if pool is not None and not pool.closed:
+            stats[alias] = pool.get_stats()
+    return stats
@@ -0,0 +1,177 @@
+"""
+Instrumentación de consultas SQL por petición.
+
+El middleware envuelve todas las conexiones con ``execute_wrapper`` y mide,
+para cada petición, cuántas consultas se hicieron, el tiempo total en la base
+de datos y la sentencia más lenta. Los datos salen en la cabecera
+``Server-Timing`` y se acumulan en memoria por endpoint (nombre de la ruta).
+"""
+import contextvars
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from . import database
+
+_lock = threading.Lock()
+_endpoints = {}
+# Métricas de la petición en curso (visibles desde los hilos de sync_to_async)
+_current = contextvars.ContextVar("query_stats", default=None)
+
+
+class QueryStats:
+    """Consultas de una petición."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_duration = 0.0
+        self.slowest_sql = None
+        # Las vistas asíncronas ejecutan consultas en varios hilos a la vez
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.count += 1
+                self.duration += elapsed
+                if elapsed >= self.slowest_duration:
+                    self.slowest_duration = elapsed
+                    self.slowest_sql = sql
+
+
+@contextmanager
+def track(stats):
+    """Registra en ``stats`` las consultas de las conexiones del hilo actual."""
+    with ExitStack() as stack:
+        # connections.all() no abre conexiones, solo crea los wrappers del hilo
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        yield stats
+
+
+def current_stats():
+    """QueryStats de la petición en curso, o None fuera del middleware."""
+    return _current.get()
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Síncrono y asíncrono: bajo ASGI no obliga a Django a pasar cada petición
+    (también las de las vistas asíncronas) por un hilo para este middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, "QUERY_INSTRUMENTATION_ENABLED", True):
+            return self.get_response(request)
+
+        stats = QueryStats()
+        start = time.perf_counter()
+        token = _current.set(stats)
+        try:
+            with track(stats):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not getattr(settings, "QUERY_INSTRUMENTATION_ENABLED", True):
+            return await self.get_response(request)
+
+        stats = QueryStats()
+        start = time.perf_counter()
+        token = _current.set(stats)
+        # Las consultas síncronas de la petición (vistas síncronas, sync_to_async)
+        # van por el hilo thread-sensitive: se envuelven sus conexiones
+        stack = ExitStack()
+        await sync_to_async(stack.enter_context)(track(stats))
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    @staticmethod
+    def _finish(request, response, stats, total):
+        match = getattr(request, "resolver_match", None)
+        view_name = match.view_name if match else "<unresolved>"
+        response.query_stats = stats
+        response["Server-Timing"] = server_timing(stats, total)
+        _record(view_name, stats, total)
+        return response
+
+
+def server_timing(stats, total):
+    """Valor de la cabecera Server-Timing (duraciones en ms)."""
+    entries = [
+        f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"',
+        f"db-slowest;dur={stats.slowest_duration * 1000:.2f}",
+        f"app;dur={total * 1000:.2f}",
+    ]
+    # Estado del pool de conexiones (DB_POOL=True) al terminar la petición
+    for alias, pool in database.pool_stats().items():
+        entries.append(
+            f'db-pool-{alias};desc="size={pool.get("pool_size", 0)} '
+            f'available={pool.get("pool_available", 0)} waiting={pool.get("requests_waiting", 0)}"'
+        )
+    return ", ".join(entries)
+
+
+def _record(view_name, stats, total):
+    with _lock:
+        entry = _endpoints.setdefault(view_name, {
+            "requests": 0,
+            "queries": 0,
+            "max_queries": 0,
+            "db_ms": 0.0,
+            "total_ms": 0.0,
+            "slowest_ms": 0.0,
+            "slowest_sql": None,
+        })
+        entry["requests"] += 1
+        entry["queries"] += stats.count
+        entry["max_queries"] = max(entry["max_queries"], stats.count)
+        entry["db_ms"] += stats.duration * 1000
+        entry["total_ms"] += total * 1000
+        if stats.slowest_duration * 1000 >= entry["slowest_ms"] and stats.slowest_sql:
+            entry["slowest_ms"] = stats.slowest_duration * 1000
+            entry["slowest_sql"] = stats.slowest_sql
+
+
+def endpoint_stats():
+    """{endpoint: agregados} con medias por petición."""
+    with _lock:
+        report = {}
+        for view_name, entry in sorted(_endpoints.items()):
+            requests = entry["requests"]
+            report[view_name] = dict(
+                entry,
+                avg_queries=round(entry["queries"] / requests, 2),
+                avg_db_ms=round(entry["db_ms"] / requests, 2),
+                avg_total_ms=round(entry["total_ms"] / requests, 2),
+            )
+        return report
+
+
+def reset():
+    with _lock:
+        _endpoints.clear()
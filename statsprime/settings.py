@@ -14,7 +14,8 @@ from pathlib import Path
 from dotenv import load_dotenv
 from datetime import timedelta
 import os
-import dj_database_url
+
+from .database import database_config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -51,7 +52,7 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'users.User'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
@@ -67,7 +68,75 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
 }
 
+# Login y admin: verificación de contraseña con concurrencia acotada (users.hashing)
+AUTHENTICATION_BACKENDS = ['users.hashing.PooledModelBackend']
+
+# Hashes PBKDF2 simultáneos por proceso (0 = núcleos de CPU), en cola y segundos de espera
+AUTH_HASH_CONCURRENCY = int(os.getenv('AUTH_HASH_CONCURRENCY', '0')) or None
+AUTH_HASH_QUEUE = int(os.getenv('AUTH_HASH_QUEUE', '16'))
+AUTH_HASH_QUEUE_TIMEOUT = float(os.getenv('AUTH_HASH_QUEUE_TIMEOUT', '2'))
+
+# Token bucket de login, registro, perfil y reset (users.throttling): ráfaga y fichas por minuto
+AUTH_THROTTLE_ENABLED = os.getenv('AUTH_THROTTLE_ENABLED', 'True') == 'True'
+AUTH_THROTTLE_IP_BURST = int(os.getenv('AUTH_THROTTLE_IP_BURST', '120'))
+AUTH_THROTTLE_IP_PER_MINUTE = int(os.getenv('AUTH_THROTTLE_IP_PER_MINUTE', '60'))
+AUTH_THROTTLE_IDENTIFIER_BURST = int(os.getenv('AUTH_THROTTLE_IDENTIFIER_BURST', '30'))
+AUTH_THROTTLE_IDENTIFIER_PER_MINUTE = int(os.getenv('AUTH_THROTTLE_IDENTIFIER_PER_MINUTE', '10'))
+
+# Caché. Guarda las versiones de datos (farm.versions), así que con varios
+# procesos debe ser compartida: REDIS_URL=redis://... usa Redis; si no,
+# CACHE_BACKEND (p. ej. django.core.cache.backends.db.DatabaseCache con
+# CACHE_LOCATION=<tabla>). La memoria local solo vale con DEBUG=True (farm.E001).
+REDIS_URL = os.getenv('REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.redis.RedisCache' if REDIS_URL else 'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', REDIS_URL or 'statsprime'),
+    }
+}
+
+# Segundos que se guarda en caché el usuario autenticado por JWT (0 = sin caché)
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', '60'))
+
+# Caché versionada de los endpoints de estadísticas (segundos)
+FARM_STATS_CACHE_ENABLED = os.getenv('FARM_STATS_CACHE_ENABLED', 'True') == 'True'
+FARM_STATS_CACHE_TIMEOUT = int(os.getenv('FARM_STATS_CACHE_TIMEOUT', '300'))
+
+# Máximo de eventos por petición en /farm-events/bulk/
+FARM_BULK_MAX_EVENTS = int(os.getenv('FARM_BULK_MAX_EVENTS', '500'))
+
+# Filas por bloque al exportar el historial en streaming
+FARM_EXPORT_CHUNK_SIZE = int(os.getenv('FARM_EXPORT_CHUNK_SIZE', '2000'))
+
+# Entradas de la caché LRU de recompensas (source_id, nombre, rareza) -> id
+FARM_REWARD_CACHE_SIZE = int(os.getenv('FARM_REWARD_CACHE_SIZE', '4096'))
+
+# Las vistas asíncronas de estadísticas lanzan sus consultas en paralelo
+FARM_ASYNC_STATS_CONCURRENT = os.getenv('FARM_ASYNC_STATS_CONCURRENT', 'True') == 'True'
+
+# Snapshots del catálogo por juego que guarda cada proceso (farm.catalog)
+FARM_CATALOG_MAX_GAMES = int(os.getenv('FARM_CATALOG_MAX_GAMES', '64'))
+
+# Cubo NumPy en memoria para FarmStatsView (farm.cube); requiere numpy
+FARM_CUBE_ENABLED = os.getenv('FARM_CUBE_ENABLED', 'False') == 'True'
+FARM_CUBE_MAX_GAMES = int(os.getenv('FARM_CUBE_MAX_GAMES', '4'))
+FARM_CUBE_RELOAD_SECONDS = int(os.getenv('FARM_CUBE_RELOAD_SECONDS', '3600'))
+# Ids de evento por debajo del último cargado que se vuelven a leer (commits fuera de orden)
+FARM_CUBE_RESCAN_IDS = int(os.getenv('FARM_CUBE_RESCAN_IDS', '1000'))
+
+# Mediana y percentiles de FarmStatsView: "sketch" (sketches KLL de los rollups
+# diarios, farm.sketches) o "exact" (sobre FarmDrop, farm.percentiles)
+FARM_PERCENTILES_ENGINE = os.getenv('FARM_PERCENTILES_ENGINE', 'sketch')
+FARM_SKETCH_K = int(os.getenv('FARM_SKETCH_K', '200'))
+
+# Métricas de consultas SQL por petición (cabecera Server-Timing)
+QUERY_INSTRUMENTATION_ENABLED = os.getenv('QUERY_INSTRUMENTATION_ENABLED', 'True') == 'True'
+
 MIDDLEWARE = [
+    'statsprime.instrumentation.QueryInstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -107,12 +176,9 @@ WSGI_APPLICATION = 'statsprime.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# DATABASE_URL (SQLite si no hay) y pool de conexiones con DB_POOL=True: ver statsprime/database.py
 DATABASES = {
-    'default': dj_database_url.config(
-        default=os.environ.get('DATABASE_URL'), 
-        conn_max_age=600, 
-        ssl_require=True,
-    )
+    'default': database_config(BASE_DIR),
 }
 
 
@@ -0,0 +1,32 @@
+"""
+Utilidades para tests: presupuestos de consultas SQL por endpoint.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    Añade ``assertQueryBudget`` a un TestCase/APITestCase. Hace la petición con
+    ``self.client`` y falla si el endpoint supera ``budget`` consultas según
+    QueryInstrumentationMiddleware; el mensaje incluye el SQL ejecutado.
+    """
+
+    def assertQueryBudget(self, budget, method, url, *args, view_name=None, **kwargs):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, *args, **kwargs)
+
+        stats = getattr(response, "query_stats", None)
+        self.assertIsNotNone(stats, "QueryInstrumentationMiddleware no está activo")
+        if view_name is not None:
+            self.assertEqual(response.resolver_match.view_name, view_name)
+
+        if stats.count > budget:
+            queries = "\n".join(
+                f"{i}. {query['sql']}" for i, query in enumerate(ctx.captured_queries, start=1)
+            )
+            self.fail(
+                f"{method.upper()} {url} hizo {stats.count} consultas "
+                f"(presupuesto: {budget}):\n{queries}"
+            )
+        return response
@@ -0,0 +1,80 @@
+"""
+Autenticación JWT con el usuario en caché.
+
+JWTAuthentication lee la fila del usuario en cada petición autenticada. Aquí
+se guardan en la caché de Django solo los campos que usan las vistas (ver
+CACHED_FIELDS) durante ``AUTH_USER_CACHE_TIMEOUT`` segundos, y el usuario se
+reconstruye con ``User.from_db``: el resto de campos quedan diferidos y se
+leen de la base de datos solo si alguien los usa (p. ej. ``password`` al
+cambiar el perfil).
+
+Cualquier ``save()`` o borrado del usuario invalida la entrada (ver
+users.signals), y las vistas que cambian la cuenta la invalidan además de
+forma explícita. ``QuerySet.update()`` no emite señales: quien desactive
+usuarios así tiene que llamar a ``invalidate``.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+KEY_PREFIX = "users:auth"
+# Campos que leen los permisos, ProfileSerializer y las vistas de estadísticas
+CACHED_FIELDS = (
+    "id", "username", "email", "first_name", "last_name", "secret_question",
+    "is_active", "is_staff", "is_superuser",
+)
+
+
+def _fields():
+    # from_db espera los valores en el orden de los campos del modelo
+    User = get_user_model()
+    return [field.attname for field in User._meta.concrete_fields if field.attname in CACHED_FIELDS]
+
+
+def _key(user_id):
+    return f"{KEY_PREFIX}:{user_id}"
+
+
+def invalidate(user_id):
+    """Borra el usuario de la caché ahora y otra vez tras el commit (como farm.versions.bump)."""
+    def apply():
+        cache.delete(_key(user_id))
+
+    apply()
+    transaction.on_commit(apply)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        timeout = getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 60)
+        if api_settings.USER_ID_FIELD != "id" or not timeout:
+            return super().get_user(validated_token)
+
+        cached = cache.get(_key(user_id))
+        if cached is None:
+            # Misma consulta y comprobaciones que JWTAuthentication
+            user = super().get_user(validated_token)
+            values = [getattr(user, field) for field in _fields()]
+            cache.set(_key(user_id), (values, get_md5_hash_password(user.password)), timeout)
+            return user
+
+        values, password_hash = cached
+        User = get_user_model()
+        user = User.from_db(User.objects.db, _fields(), values)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
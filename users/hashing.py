@@ -0,0 +1,87 @@
+"""
+Verificaciones de contraseña y respuesta secreta con concurrencia acotada.
+
+Cada hash PBKDF2 ocupa la CPU durante decenas de milisegundos. Sin límite,
+una ráfaga de logins o resets ocupa todos los hilos del proceso y las
+estadísticas esperan detrás. Aquí como mucho ``AUTH_HASH_CONCURRENCY``
+hashes se calculan a la vez por proceso y ``AUTH_HASH_QUEUE`` esperan turno
+(hasta ``AUTH_HASH_QUEUE_TIMEOUT`` segundos); el resto recibe un 429 al
+momento en vez de sumar latencia a todo lo demás.
+
+El hash se calcula en el hilo de la petición: los huecos del pool son un
+semáforo, no hilos aparte. Con workers síncronos de gunicorn cada proceso
+atiende una petición y el límite real lo pone el número de workers; con
+gthread o ASGI es este semáforo.
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from rest_framework.exceptions import Throttled
+
+
+class HashingOverloaded(Throttled):
+    default_detail = "Demasiadas verificaciones de contraseña en curso. Inténtalo de nuevo en unos segundos."
+
+
+class _Pool:
+    def __init__(self, size, queue, timeout):
+        self.running = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        self.waiting = 0
+        self.queue = queue
+        self.timeout = timeout
+
+    def run(self, func, *args, **kwargs):
+        if not self.running.acquire(blocking=False):
+            with self.lock:
+                if self.waiting >= self.queue:
+                    raise HashingOverloaded(wait=1)
+                self.waiting += 1
+            try:
+                acquired = self.running.acquire(timeout=self.timeout)
+            finally:
+                with self.lock:
+                    self.waiting -= 1
+            if not acquired:
+                raise HashingOverloaded(wait=1)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.running.release()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _Pool(
+                getattr(settings, "AUTH_HASH_CONCURRENCY", None) or os.cpu_count() or 2,
+                getattr(settings, "AUTH_HASH_QUEUE", 16),
+                getattr(settings, "AUTH_HASH_QUEUE_TIMEOUT", 2.0),
+            )
+        return _pool
+
+
+def run(func, *args, **kwargs):
+    """Ejecuta ``func`` (check_password, set_password...) ocupando un hueco del pool."""
+    return _get_pool().run(func, *args, **kwargs)
+
+
+def reset():
+    """Vuelve a crear el pool con los settings actuales."""
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+class PooledModelBackend(ModelBackend):
+    """ModelBackend cuyo ``authenticate`` (login JWT, admin) pasa por el pool."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        return run(super().authenticate, request, username=username, password=password, **kwargs)
@@ -1,12 +1,54 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.db import models
+from django.db.models import CharField, Q, Value
+from django.db.models.functions import Lower
 from django.contrib.auth.hashers import make_password, check_password
 
+# username__lower / email__lower: LOWER(campo) = valor, que usa los índices funcionales de User.
+# (__iexact compila a UPPER(...) en PostgreSQL y no puede usarlos)
+CharField.register_lookup(Lower)
+
+
+def lowered(value):
+    """
+    LOWER(valor) en SQL, para comparar con username__lower/email__lower: los
+    dos lados pasan por el mismo LOWER de la base de datos. Con ``str.lower()``
+    no coincidirían fuera de ASCII (el LOWER de SQLite no cambia la Ñ).
+    """
+    return Lower(Value(value, output_field=CharField()))
+
+
+class UserManager(BaseUserManager):
+    def get_by_identifier(self, identifier):
+        """
+        Usuario cuyo username o email coincide con ``identifier`` sin distinguir
+        mayúsculas, en una sola consulta indexada. Si hay uno por username y otro
+        por email, gana el username. None si no hay ninguno.
+        """
+        if not identifier:
+            return None
+        value = lowered(identifier)
+        matches = list(self.filter(Q(username__lower=value) | Q(email__lower=value)).order_by("id")[:2])
+        for user in matches:
+            if user.username.lower() == identifier.lower():
+                return user
+        return matches[0] if matches else None
+
+
 class User(AbstractUser):
     email = models.EmailField(unique=True)
     secret_question = models.CharField(max_length=255, blank=True, null=True)
     secret_answer = models.CharField(max_length=255, blank=True, null=True)
 
+    objects = UserManager()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Login por identificador, reset por pregunta secreta y unicidad al registrarse
+            models.Index(Lower("username"), name="users_user_username_lower"),
+            models.Index(Lower("email"), name="users_user_email_lower"),
+        ]
+
     def set_secret_answer(self, raw_answer):
         if raw_answer is None or raw_answer == "":
             self.secret_answer = None
@@ -2,6 +2,9 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 
+from . import hashing
+from .models import lowered
+
 User = get_user_model()
 
 class UserRegisterSerializer(serializers.ModelSerializer):
@@ -27,13 +30,13 @@ class UserRegisterSerializer(serializers.ModelSerializer):
     
     # Validar username único (sin distinción de mayúsculas/minúsculas)
     def validate_username(self, value):
-        if User.objects.filter(username__iexact=value).exists():
+        if User.objects.filter(username__lower=lowered(value)).exists():
             raise serializers.ValidationError("El nombre de usuario ya está en uso.")
         return value
     
     # Validar email único (sin distinción de mayúsculas/minúsculas)
     def validate_email(self, value):
-        if User.objects.filter(email__iexact=value).exists():
+        if User.objects.filter(email__lower=lowered(value)).exists():
             raise serializers.ValidationError("El correo ya está en uso.")
         return value
     
@@ -51,11 +54,11 @@ class UserRegisterSerializer(serializers.ModelSerializer):
             secret_question=validated_data.get('secret_question', None),
         )
 
-        user.set_password(raw_password)
+        hashing.run(user.set_password, raw_password)
 
         # Hashear respuesta secreta si existe
         if raw_secret and hasattr(user, 'set_secret_answer'):
-            user.set_secret_answer(raw_secret)
+            hashing.run(user.set_secret_answer, raw_secret)
 
 
         user.save()
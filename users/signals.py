@@ -0,0 +1,14 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import authentication
+
+User = get_user_model()
+
+
+# Perfil, contraseña, desactivación desde el admin... cualquier cambio saca al usuario de la caché
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    authentication.invalidate(instance.pk)
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    """El usuario autenticado se sirve desde la caché hasta que cambia."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", email="usuario@correo.com", password="StrongPass123!"
+        )
+        self.user.secret_question = "¿Color favorito?"
+        self.user.set_secret_answer("azul")
+        self.user.save()
+        response = self.client.post(reverse('users:token_obtain_pair'), {
+            "username": "testuser", "password": "StrongPass123!"
+        }, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.url = reverse('users:profile')
+
+    def test_cached_after_first_request(self):
+        with self.assertNumQueries(1):
+            first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.data, first.data)
+
+    def test_profile_update_invalidates(self):
+        self.client.get(self.url)
+        response = self.client.put(self.url, {
+            "current_password": "StrongPass123!", "first_name": "Nuevo",
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.url).data["first_name"], "Nuevo")
+
+    def test_deactivated_user_rejected(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deleted_user_rejected(self):
+        self.client.get(self.url)
+        response = self.client.delete(self.url, {"password": "StrongPass123!"}, format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_password_reset_invalidates(self):
+        self.client.get(self.url)
+        response = self.client.put(reverse('users:password_reset_secret'), {
+            "identifier": "testuser", "answer": "azul", "new_password": "OtraClave123!",
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        # La siguiente petición vuelve a leer el usuario de la base de datos
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
@@ -0,0 +1,70 @@
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users.models import lowered
+
+User = get_user_model()
+
+
+class IdentityLookupTest(TestCase):
+    """Búsqueda de usuarios por username o email sin distinguir mayúsculas."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="TestUser", email="Usuario@Correo.com", password="StrongPass123!")
+
+    def test_get_by_identifier(self):
+        for identifier in ("testuser", "TESTUSER", "usuario@correo.com"):
+            with self.subTest(identifier), self.assertNumQueries(1):
+                self.assertEqual(User.objects.get_by_identifier(identifier), self.user)
+        self.assertIsNone(User.objects.get_by_identifier("nadie"))
+        self.assertIsNone(User.objects.get_by_identifier(""))
+
+    def test_non_ascii_identifiers(self):
+        # Misma función LOWER en los dos lados aunque la base no pliegue la Ñ
+        user = User.objects.create_user(username="Ñandú", email="ñandú@correo.com", password="x")
+        self.assertEqual(User.objects.get_by_identifier("Ñandú"), user)
+        self.assertEqual(User.objects.get_by_identifier("ñandú@correo.com"), user)
+        response = APIClient().post(reverse('users:register'), {
+            "username": "Ñandú",
+            "email": "ñandú@correo.com",
+            "password": "StrongPass123!",
+            "password2": "StrongPass123!",
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {"username", "email"})
+
+    def test_username_wins_over_email(self):
+        other = User.objects.create_user(username="usuario@correo.com", email="otro@correo.com", password="x")
+        self.assertEqual(User.objects.get_by_identifier("Usuario@correo.com"), other)
+
+    def test_register_rejects_case_variants(self):
+        response = APIClient().post(reverse('users:register'), {
+            "username": "testuser",
+            "email": "USUARIO@correo.com",
+            "password": "StrongPass123!",
+            "password2": "StrongPass123!",
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {"username", "email"})
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN es específico de SQLite")
+    def test_lookups_use_lower_indexes(self):
+        queries = [
+            User.objects.filter(username__lower=lowered("testuser")),
+            User.objects.filter(email__lower=lowered("usuario@correo.com")),
+        ]
+        with CaptureQueriesContext(connection) as captured:
+            User.objects.get_by_identifier("testuser")
+        with connection.cursor() as cursor:
+            for sql, params in [query.query.sql_with_params() for query in queries] + [
+                (captured.captured_queries[0]["sql"], ())
+            ]:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+                plan = [row[-1] for row in cursor.fetchall()]
+                self.assertFalse([step for step in plan if step.startswith("SCAN")], plan)
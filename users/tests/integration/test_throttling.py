@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+
+@override_settings(
+    AUTH_THROTTLE_IP_BURST=5, AUTH_THROTTLE_IP_PER_MINUTE=1,
+    AUTH_THROTTLE_IDENTIFIER_BURST=2, AUTH_THROTTLE_IDENTIFIER_PER_MINUTE=1,
+)
+class AuthThrottlingTest(TestCase):
+    """Token bucket por cuenta y por IP en los endpoints que verifican secretos."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        User.objects.create_user(username="testuser", email="usuario@correo.com", password="StrongPass123!")
+        self.login_url = reverse('users:token_obtain_pair')
+
+    def login(self, username, password="Incorrecta1!", **extra):
+        return self.client.post(self.login_url, {"username": username, "password": password}, format='json', **extra)
+
+    def test_per_identifier(self):
+        self.assertEqual(self.login("testuser").status_code, 401)
+        self.assertEqual(self.login("TestUser").status_code, 401)
+        # La cuenta se queda sin fichas, aunque ahora la contraseña sea correcta
+        response = self.login("testuser", "StrongPass123!")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        # Otra cuenta desde la misma IP sigue pudiendo
+        self.assertEqual(self.login("otro").status_code, 401)
+
+    def test_per_ip(self):
+        for i in range(5):
+            self.assertEqual(self.login(f"usuario{i}").status_code, 401)
+        self.assertEqual(self.login("usuario9").status_code, 429)
+        # Otra IP tiene su propio cubo
+        self.assertEqual(self.login("testuser", "StrongPass123!", REMOTE_ADDR="10.0.0.2").status_code, 200)
+
+    def test_reads_not_throttled(self):
+        self.client.force_authenticate(User.objects.get())
+        for _ in range(5):
+            self.assertEqual(self.client.get(reverse('users:profile')).status_code, 200)
+
+    @override_settings(AUTH_THROTTLE_ENABLED=False)
+    def test_disabled(self):
+        for _ in range(4):
+            self.assertEqual(self.login("testuser").status_code, 401)
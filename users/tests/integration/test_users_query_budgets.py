@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from statsprime.testing import QueryBudgetMixin
+
+User = get_user_model()
+
+
+class UsersQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Consultas máximas por endpoint de usuarios."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="usuario@correo.com",
+            password="StrongPass123!"
+        )
+        self.user.secret_question = "¿Color favorito?"
+        self.user.set_secret_answer("azul")
+        self.user.save()
+
+    def login(self):
+        response = self.assertQueryBudget(1, "post", reverse('users:token_obtain_pair'), {
+            "username": "testuser",
+            "password": "StrongPass123!"
+        }, format='json', view_name='users:token_obtain_pair')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_register_and_login(self):
+        response = self.assertQueryBudget(5, "post", reverse('users:register'), {
+            "username": "nuevo_usuario",
+            "email": "nuevo@correo.com",
+            "password": "StrongPass123!",
+            "password2": "StrongPass123!",
+        }, format='json', view_name='users:register')
+        self.assertEqual(response.status_code, 201)
+        self.login()
+
+    def test_profile(self):
+        self.login()
+        url = reverse('users:profile')
+        self.assertEqual(self.assertQueryBudget(1, "get", url, view_name='users:profile').status_code, 200)
+        # Después, el usuario autenticado sale de la caché
+        self.assertEqual(self.assertQueryBudget(0, "get", url, view_name='users:profile').status_code, 200)
+        response = self.assertQueryBudget(3, "put", url, {
+            "current_password": "StrongPass123!",
+            "first_name": "Nuevo",
+            "email": "otro@correo.com",
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_password_reset(self):
+        url = reverse('users:password_reset_secret')
+        # Username o email en una sola consulta (User.objects.get_by_identifier)
+        response = self.assertQueryBudget(1, "post", url, {"identifier": "usuario@correo.com"}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.assertQueryBudget(2, "put", url, {
+            "identifier": "usuario@correo.com",
+            "answer": "azul",
+            "new_password": "OtraClave123!",
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
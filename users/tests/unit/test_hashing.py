@@ -0,0 +1,36 @@
+import threading
+
+from django.test import SimpleTestCase, override_settings
+
+from users import hashing
+
+
+@override_settings(AUTH_HASH_CONCURRENCY=1, AUTH_HASH_QUEUE=1, AUTH_HASH_QUEUE_TIMEOUT=0.05)
+class HashingPoolTest(SimpleTestCase):
+    def setUp(self):
+        hashing.reset()
+        self.addCleanup(hashing.reset)
+
+    def test_runs_and_returns(self):
+        self.assertEqual(hashing.run(sum, [1, 2]), 3)
+
+    def test_overloaded_when_queue_full(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+
+        busy = threading.Thread(target=hashing.run, args=(slow,))
+        busy.start()
+        started.wait(5)
+        try:
+            # El único hueco está ocupado: se espera en cola y se agota el tiempo
+            with self.assertRaises(hashing.HashingOverloaded) as raised:
+                hashing.run(sum, [1])
+            self.assertEqual(raised.exception.status_code, 429)
+        finally:
+            release.set()
+            busy.join()
+        # Liberado el hueco, vuelve a aceptar trabajo
+        self.assertEqual(hashing.run(sum, [1]), 1)
@@ -0,0 +1,18 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import SimpleTestCase
+from rest_framework.test import APIRequestFactory
+
+from users.throttling import TokenBucketThrottle
+
+
+class DefaultBucketIdentTest(SimpleTestCase):
+    def request(self, user):
+        request = APIRequestFactory().post("/", REMOTE_ADDR="10.0.0.7")
+        request.user = user
+        return request
+
+    def test_user_or_client_ip(self):
+        throttle = TokenBucketThrottle()
+        member = type("Member", (), {"pk": 42, "is_authenticated": True})()
+        self.assertEqual(throttle.get_bucket_ident(self.request(member)), "user:42")
+        self.assertEqual(throttle.get_bucket_ident(self.request(AnonymousUser())), "10.0.0.7")
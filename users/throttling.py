@@ -0,0 +1,87 @@
+"""
+Throttling por token bucket para login, registro, perfil y reset de contraseña.
+
+Cada cliente tiene un cubo de ``burst`` fichas que se rellena a ``per_minute``
+fichas por minuto; cada petición gasta una y sin fichas se responde 429 con
+Retry-After. El estado vive en la caché de Django, así que se comparte entre
+procesos si la caché es compartida (Redis, Memcached). La lectura y escritura
+no son atómicas: con peticiones simultáneas del mismo cliente el límite es
+aproximado, suficiente para frenar ráfagas.
+
+Solo se limitan los métodos que escriben o verifican secretos (no GET).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+KEY_PREFIX = "users:throttle"
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+
+    def get_bucket_ident(self, request):
+        """Cubo del usuario autenticado o, sin sesión, de la IP del cliente."""
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return self.get_ident(request)
+
+    def rate(self):
+        """(burst, fichas por minuto) de ``AUTH_THROTTLE_<SCOPE>_*``."""
+        prefix = f"AUTH_THROTTLE_{self.scope.upper()}"
+        return getattr(settings, f"{prefix}_BURST"), getattr(settings, f"{prefix}_PER_MINUTE")
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        if not getattr(settings, "AUTH_THROTTLE_ENABLED", True) or request.method in SAFE_METHODS:
+            return True
+        ident = self.get_bucket_ident(request)
+        if not ident:
+            return True
+
+        burst, per_minute = self.rate()
+        refill = per_minute / 60
+        digest = hashlib.sha256(str(ident).encode()).hexdigest()[:32]
+        key = f"{KEY_PREFIX}:{self.scope}:{digest}"
+        now = time.time()
+
+        tokens, updated = cache.get(key) or (burst, now)
+        tokens = min(burst, tokens + (now - updated) * refill)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        else:
+            self.wait_seconds = (1 - tokens) / refill
+        # La entrada caduca cuando el cubo volvería a estar lleno
+        cache.set(key, (tokens, now), timeout=int((burst - tokens) / refill) + 1)
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPThrottle(TokenBucketThrottle):
+    """Por IP del cliente (X-Forwarded-For según NUM_PROXIES de DRF)."""
+    scope = "ip"
+
+    def get_bucket_ident(self, request):
+        return self.get_ident(request)
+
+
+class IdentifierThrottle(TokenBucketThrottle):
+    """Por cuenta: el usuario autenticado o el username/identifier enviado."""
+    scope = "identifier"
+
+    def get_bucket_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        data = request.data if hasattr(request.data, "get") else {}
+        identifier = data.get("identifier") or data.get(get_user_model().USERNAME_FIELD)
+        if not isinstance(identifier, str) or not identifier.strip():
+            return None
+        return f"name:{identifier.strip().lower()}"
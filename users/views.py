@@ -3,6 +3,8 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 
+from . import authentication, hashing
+from .throttling import IdentifierThrottle, IPThrottle
 from .serializers import UserRegisterSerializer, ProfileSerializer
 
 User = get_user_model()
@@ -11,9 +13,11 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegisterSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [IPThrottle]
 
 class ProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [IPThrottle, IdentifierThrottle]
 
     def get(self, request):
         serializer = ProfileSerializer(request.user)
@@ -25,7 +29,7 @@ class ProfileView(APIView):
         current_password = data.get('current_password')
 
         # Validar contraseña actual
-        if not current_password or not user.check_password(current_password):
+        if not current_password or not hashing.run(user.check_password, current_password):
             return Response(
                 {"detail": "Contraseña actual requerida para actualizar."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -46,38 +50,38 @@ class ProfileView(APIView):
         # Actualizar respuesta secreta (usando método seguro)
         new_secret = data.get('secret_answer')
         if new_secret:
-            user.set_secret_answer(new_secret)
+            hashing.run(user.set_secret_answer, new_secret)
 
         # Cambiar contraseña (opcional)
         new_password = data.get('new_password')
         if new_password:
-            user.set_password(new_password)
+            hashing.run(user.set_password, new_password)
 
         user.save()
+        authentication.invalidate(user.pk)
         return Response(ProfileSerializer(user).data)
 
     def delete(self, request):
         user = request.user
         password = request.data.get('password')
-        if not password or not user.check_password(password):
+        if not password or not hashing.run(user.check_password, password):
             return Response({"detail": "Contraseña requerida para eliminar la cuenta."}, status=status.HTTP_400_BAD_REQUEST)
+        user_id = user.pk
         user.delete()
+        authentication.invalidate(user_id)
         return Response(status=status.HTTP_204_NO_CONTENT)
     
 class PasswordResetBySecretView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [IPThrottle, IdentifierThrottle]
 
     def post(self, request):
         identifier = request.data.get('identifier')
         if not identifier:
             return Response({"detail": "identificador requerido (username o email)."}, status=400)
-        try:
-            user = User.objects.get(username__iexact=identifier)
-        except User.DoesNotExist:
-            try:
-                user = User.objects.get(email__iexact=identifier)
-            except User.DoesNotExist:
-                return Response({"detail": "No existe usuario con ese identificador."}, status=400)
+        user = User.objects.get_by_identifier(identifier)
+        if user is None:
+            return Response({"detail": "No existe usuario con ese identificador."}, status=400)
         if not user.secret_question:
             return Response({"detail": "Este usuario no tiene pregunta secreta configurada."}, status=400)
         return Response({"secret_question": user.secret_question})
@@ -91,15 +95,12 @@ class PasswordResetBySecretView(APIView):
         if not identifier or not answer or not new_password:
             return Response({"detail": "identifier, answer y new_password requeridos."}, status=400)
         
-        try:
-            user = User.objects.get(username__iexact=identifier)
-        except User.DoesNotExist:
-            try:
-                user = User.objects.get(email__iexact=identifier)
-            except User.DoesNotExist:
-                return Response({"detail": "No existe usuario con ese identificador."}, status=400)
-        if user.check_secret_answer(answer):
-            user.set_password(new_password)
+        user = User.objects.get_by_identifier(identifier)
+        if user is None:
+            return Response({"detail": "No existe usuario con ese identificador."}, status=400)
+        if hashing.run(user.check_secret_answer, answer):
+            hashing.run(user.set_password, new_password)
             user.save()
+            authentication.invalidate(user.pk)
             return Response({"detail": "Contraseña actualizada."})
         return Response({"detail": "Respuesta secreta incorrecta."}, status=400)
\ No newline at end of file